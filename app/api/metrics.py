@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import registry
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+	return PlainTextResponse(
+		registry.render(),
+		media_type="text/plain; version=0.0.4; charset=utf-8",
+	)
@@ -1,57 +1,231 @@
 from __future__ import annotations
 
-from typing import Iterable
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.core.database import get_async_read_session, get_async_session, get_read_session
+from app.core.etags import etag_matches
+from app.core.filters import parse_ids, parse_nutrient_filters
+from app.core.pagination import (
+	MISSING_IDS_HEADER,
+	NEXT_CURSOR_HEADER,
+	SortKey,
+	decode_cursor,
+	next_cursor,
+)
+from app.core.serialization import RawJSONResponse, dumps
+from app.domain.repositories import FoodRepository, food_cache
+from app.domain.schemas import (
+	FoodBatchIn,
+	FoodBatchOut,
+	FoodCacheStatsOut,
+	FoodCreate,
+	FoodImportResult,
+	FoodOut,
+	FoodSearchHit,
+	FoodUpdate,
+)
+from app.domain.schemas.food import MAX_BATCH_IDS
+from app.domain.services import AsyncFoodService, FoodImporter, FoodService
+from app.domain.services.food_import import ConflictPolicy, ImportFormat
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+router = APIRouter(prefix="/foods", tags=["foods"])
 
-from app.core.database import get_session
-from app.domain.repositories import FoodRepository
-from app.domain.schemas import FoodCreate, FoodOut, FoodUpdate
-from app.domain.services import FoodService
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
-router = APIRouter(prefix="/foods", tags=["foods"])
+
+async def get_service() -> AsyncIterator[AsyncFoodService]:
+	async with get_async_session() as session:
+		yield AsyncFoodService(session)
 
 
-def get_service():
-	with get_session() as session:
-		repo = FoodRepository(session)
-		yield FoodService(repo)
+async def get_read_service() -> AsyncIterator[AsyncFoodService]:
+	# Read-only pool: GETs never queue behind a write
+	async with get_async_read_session() as session:
+		yield AsyncFoodService(session)
 
 
 @router.post("/", response_model=FoodOut, status_code=status.HTTP_201_CREATED)
-async def create_food(payload: FoodCreate, service: FoodService = Depends(get_service)) -> FoodOut:
+async def create_food(
+	payload: FoodCreate,
+	service: AsyncFoodService = Depends(get_service),
+) -> FoodOut:
 	try:
-		return service.create_food(data=payload)
+		return await service.create_food(data=payload)
 	except ValueError as exc:  # duplicate
 		raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
 
 
+async def _request_lines(request: Request) -> AsyncIterator[Tuple[int, str]]:
+	buffer = b""
+	line_no = 0
+	async for chunk in request.stream():
+		buffer += chunk
+		*complete, buffer = buffer.split(b"\n")
+		for raw in complete:
+			line_no += 1
+			yield line_no, raw.decode("utf-8", errors="replace")
+	if buffer:
+		yield line_no + 1, buffer.decode("utf-8", errors="replace")
+
+
+@router.post("/import", response_model=FoodImportResult)
+async def import_foods(
+	request: Request,
+	format: Optional[ImportFormat] = Query(
+		None,
+		description="Defaults from Content-Type, else ndjson",
+	),
+	on_conflict: ConflictPolicy = Query("skip"),
+	chunk_size: int = Query(1000, ge=1, le=10_000),
+) -> FoodImportResult:
+	if format is None:
+		format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+	async with get_async_session() as session:
+		importer = FoodImporter(
+			FoodRepository(session.sync_session),
+			format=format,
+			on_conflict=on_conflict,
+		)
+		chunk: list[Tuple[int, str]] = []
+		async for line in _request_lines(request):
+			chunk.append(line)
+			if len(chunk) >= chunk_size:
+				batch, chunk = chunk, []
+				await session.run_sync(lambda _, batch=batch: importer.feed(batch))
+		await session.run_sync(lambda _: importer.feed(chunk))
+	return importer.result
+
+
+def _export_lines() -> Iterator[bytes]:
+	# Owns its session: the response body is streamed after the request dependencies exit
+	with get_read_session() as session:
+		for food in FoodService(FoodRepository(session)).export_foods():
+			yield food.model_dump_json().encode() + b"\n"
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_foods() -> StreamingResponse:
+	return StreamingResponse(_export_lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.post("/batch", response_model=FoodBatchOut)
+async def get_foods_batch(
+	payload: FoodBatchIn,
+	service: AsyncFoodService = Depends(get_read_service),
+) -> FoodBatchOut:
+	# POST only because long id lists outgrow a URL; nothing is written
+	return await service.get_foods(food_ids=payload.ids)
+
+
+@router.get("/search", response_model=list[FoodSearchHit])
+async def search_foods(
+	q: str = Query(..., min_length=1, max_length=120),
+	limit: int = Query(20, ge=1, le=100),
+	fuzzy: bool = Query(True, description="Fill remaining slots with typo-tolerant matches"),
+	service: AsyncFoodService = Depends(get_read_service),
+) -> list[FoodSearchHit]:
+	return await service.search_foods(query=q, limit=limit, fuzzy=fuzzy)
+
+
+@router.get("/cache", response_model=FoodCacheStatsOut)
+async def food_cache_stats() -> FoodCacheStatsOut:
+	return FoodCacheStatsOut.model_validate(food_cache.stats())
+
+
 @router.get("/{food_id}", response_model=FoodOut | None)
-async def get_food(food_id: int, service: FoodService = Depends(get_service)) -> FoodOut | None:
-	return service.get_food(food_id=food_id)
+async def get_food(
+	food_id: int,
+	response: Response,
+	if_none_match: Optional[str] = Header(None),
+	service: AsyncFoodService = Depends(get_read_service),
+) -> FoodOut | Response | None:
+	# Tag first, body second: a body newer than its tag is harmless, the reverse is not
+	etag = await service.food_etag(food_id=food_id)
+	if etag is not None:
+		if etag_matches(if_none_match, etag):
+			return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+		response.headers["ETag"] = etag
+	return await service.get_food(food_id=food_id)
 
 
 @router.get("/", response_model=list[FoodOut])
 async def list_foods(
 	limit: int = Query(100, ge=1, le=500),
 	offset: int = Query(0, ge=0),
-	service: FoodService = Depends(get_service),
-) -> list[FoodOut]:
-	rows: Iterable[FoodOut] = service.list_foods(limit=limit, offset=offset)
-	return list(rows)
+	cursor: Optional[str] = Query(
+		None,
+		description="Opaque cursor from a previous page's X-Next-Cursor",
+	),
+	sort: SortKey = Query("id"),
+	filters: list[str] = Query(
+		[],
+		alias="filter",
+		description=(
+			'Nutrient range such as "protein_g>20" or "vitamin_c_mg>=15"; repeat to AND several'
+		),
+	),
+	ids: list[str] = Query(
+		[],
+		description=(
+			"Fetch these ids instead of a page, in order (comma-separated or repeated,"
+			f" at most {MAX_BATCH_IDS}); missing ones are listed in X-Missing-Ids"
+		),
+	),
+	service: AsyncFoodService = Depends(get_read_service),
+) -> Response:
+	if cursor is not None and offset:
+		raise HTTPException(
+			status_code=status.HTTP_400_BAD_REQUEST,
+			detail="Use either offset or cursor",
+		)
+	try:
+		after = None if cursor is None else decode_cursor(cursor, sort=sort)
+		ranges = parse_nutrient_filters(filters)
+		wanted = parse_ids(ids, limit=MAX_BATCH_IDS)
+	except ValueError as exc:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+	if wanted:
+		if cursor is not None or offset or ranges:
+			raise HTTPException(
+				status_code=status.HTTP_400_BAD_REQUEST,
+				detail="ids cannot be combined with paging or filters",
+			)
+		batch = await service.get_foods(food_ids=wanted)
+		foods = [food.model_dump() for food in batch.items]
+		missing = ",".join(map(str, batch.missing_ids))
+		headers = {MISSING_IDS_HEADER: missing} if missing else {}
+		return RawJSONResponse(dumps(foods), headers=headers)
+	# Rows straight to JSON bytes; response_model only documents the shape
+	page = await service.list_food_payloads(
+		limit=limit,
+		offset=offset,
+		sort=sort,
+		after=after,
+		ranges=ranges,
+	)
+	token = next_cursor(page, sort=sort, limit=limit)
+	headers = {} if token is None else {NEXT_CURSOR_HEADER: token}
+	return RawJSONResponse(dumps(page), headers=headers)
 
 
 @router.patch("/{food_id}", response_model=FoodOut)
-async def update_food(food_id: int, payload: FoodUpdate, service: FoodService = Depends(get_service)) -> FoodOut:
-	updated = service.update_food(food_id=food_id, data=payload)
+async def update_food(
+	food_id: int,
+	payload: FoodUpdate,
+	service: AsyncFoodService = Depends(get_service),
+) -> FoodOut:
+	updated = await service.update_food(food_id=food_id, data=payload)
 	if updated is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Food not found")
 	return updated
 
 
 @router.delete("/{food_id}", status_code=status.HTTP_204_NO_CONTENT, response_model=None)
-async def delete_food(food_id: int, service: FoodService = Depends(get_service)) -> Response:
-	deleted = service.delete_food(food_id=food_id)
+async def delete_food(food_id: int, service: AsyncFoodService = Depends(get_service)) -> Response:
+	deleted = await service.delete_food(food_id=food_id)
 	if not deleted:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Food not found")
 	return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from app.core.database import get_async_read_session, get_async_session
+from app.domain.schemas import DailyIntakeOut, IntakeSummaryOut, MealLogEntryIn, MealLogEntryOut
+from app.domain.services import AsyncMealLogService
+
+router = APIRouter(prefix="/meal-logs", tags=["meal-logs"])
+
+
+async def get_service() -> AsyncIterator[AsyncMealLogService]:
+	async with get_async_session() as session:
+		yield AsyncMealLogService(session)
+
+
+async def get_read_service() -> AsyncIterator[AsyncMealLogService]:
+	async with get_async_read_session() as session:
+		yield AsyncMealLogService(session)
+
+
+def _check_range(start: date, end: date) -> None:
+	if end < start:
+		raise HTTPException(
+			status_code=status.HTTP_400_BAD_REQUEST,
+			detail="end must not be before start",
+		)
+
+
+@router.post("/", response_model=MealLogEntryOut, status_code=status.HTTP_201_CREATED)
+async def log_entry(
+	payload: MealLogEntryIn,
+	service: AsyncMealLogService = Depends(get_service),
+) -> MealLogEntryOut:
+	try:
+		return await service.log_entry(payload)
+	except ValueError as exc:  # missing food or recipe
+		raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+
+
+@router.get("/", response_model=list[MealLogEntryOut])
+async def list_entries(
+	start: date,
+	end: date,
+	limit: int = Query(100, ge=1, le=1000),
+	offset: int = Query(0, ge=0),
+	service: AsyncMealLogService = Depends(get_read_service),
+) -> list[MealLogEntryOut]:
+	_check_range(start, end)
+	return await service.list_entries(start=start, end=end, limit=limit, offset=offset)
+
+
+@router.get("/days", response_model=list[DailyIntakeOut])
+async def daily_intake(
+	start: date, end: date, service: AsyncMealLogService = Depends(get_read_service)
+) -> list[DailyIntakeOut]:
+	_check_range(start, end)
+	return await service.daily_intake(start=start, end=end)
+
+
+@router.get("/summary", response_model=IntakeSummaryOut)
+async def summary(
+	start: date,
+	end: date,
+	service: AsyncMealLogService = Depends(get_read_service),
+) -> IntakeSummaryOut:
+	_check_range(start, end)
+	return await service.summary(start=start, end=end)
+
+
+@router.get("/{entry_id}", response_model=MealLogEntryOut)
+async def get_entry(
+	entry_id: int,
+	service: AsyncMealLogService = Depends(get_read_service),
+) -> MealLogEntryOut:
+	entry = await service.get_entry(entry_id)
+	if entry is None:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entry not found")
+	return entry
+
+
+@router.delete("/{entry_id}", status_code=status.HTTP_204_NO_CONTENT, response_model=None)
+async def delete_entry(
+	entry_id: int,
+	service: AsyncMealLogService = Depends(get_service),
+) -> Response:
+	if not await service.delete_entry(entry_id):
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entry not found")
+	return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,67 +1,206 @@
 from __future__ import annotations
 
-from typing import Iterable
-
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
-
-from app.core.database import get_session
+from typing import AsyncIterator, Iterator, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.api.v1.food import NDJSON_MEDIA_TYPE
+from app.core.database import get_async_read_session, get_async_session, get_read_session
+from app.core.etags import etag_matches
+from app.core.filters import parse_ids
+from app.core.pagination import (
+	MISSING_IDS_HEADER,
+	NEXT_CURSOR_HEADER,
+	SortKey,
+	decode_cursor,
+	next_cursor,
+)
+from app.core.serialization import RawJSONResponse, dumps
 from app.domain.repositories import FoodRepository, RecipeRepository
-from app.domain.schemas import RecipeCreate, RecipeItemIn, RecipeOut, RecipeUpdate
-from app.domain.services import RecipeService
+from app.domain.schemas import (
+	RecipeBatchIn,
+	RecipeBatchOut,
+	RecipeCreate,
+	RecipeItemIn,
+	RecipeOut,
+	RecipeUpdate,
+	ScenarioBatchIn,
+	ScenarioBatchOut,
+)
+from app.domain.schemas.food import MAX_BATCH_IDS
+from app.domain.services import AsyncRecipeService, RecipeService, recipe_reads
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
 
-def get_service():
-	with get_session() as session:
-		service = RecipeService(RecipeRepository(session), FoodRepository(session))
-		yield service
+async def get_service() -> AsyncIterator[AsyncRecipeService]:
+	async with get_async_session() as session:
+		yield AsyncRecipeService(session)
+
+
+async def get_read_service() -> AsyncIterator[AsyncRecipeService]:
+	# Read-only pool: GETs never queue behind a write
+	async with get_async_read_session() as session:
+		yield AsyncRecipeService(session)
 
 
 @router.post("/", response_model=RecipeOut, status_code=status.HTTP_201_CREATED)
-async def create_recipe(payload: RecipeCreate, service: RecipeService = Depends(get_service)) -> RecipeOut:
+async def create_recipe(
+	payload: RecipeCreate,
+	service: AsyncRecipeService = Depends(get_service),
+) -> RecipeOut:
 	try:
-		return service.create_recipe(data=payload)
+		return await service.create_recipe(data=payload)
 	except ValueError as exc:
 		raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
 
 
+@router.post("/evaluate", response_model=ScenarioBatchOut)
+async def evaluate_scenarios(
+	payload: ScenarioBatchIn, service: AsyncRecipeService = Depends(get_read_service)
+) -> ScenarioBatchOut:
+	# What-if totals for unsaved ingredient lists; runs on the read-only pool, nothing is written
+	return ScenarioBatchOut(scenarios=await service.evaluate(payload.scenarios))
+
+
+@router.post("/batch", response_model=RecipeBatchOut)
+async def get_recipes_batch(
+	payload: RecipeBatchIn, service: AsyncRecipeService = Depends(get_read_service)
+) -> RecipeBatchOut:
+	# One request for a recipe page: the recipes and, optionally, the foods their items use
+	return await service.get_recipes(payload.ids, include_foods=payload.include_foods)
+
+
+def _export_lines() -> Iterator[bytes]:
+	# Owns its session: the response body is streamed after the request dependencies exit
+	with get_read_session() as session:
+		service = RecipeService(RecipeRepository(session), FoodRepository(session))
+		for recipe in service.export_recipes():
+			yield recipe.model_dump_json().encode() + b"\n"
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_recipes() -> StreamingResponse:
+	return StreamingResponse(_export_lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
 @router.get("/{recipe_id}", response_model=RecipeOut | None)
-async def get_recipe(recipe_id: int, service: RecipeService = Depends(get_service)) -> RecipeOut | None:
-	return service.get_recipe(recipe_id)
+async def get_recipe(recipe_id: int, if_none_match: Optional[str] = Header(None)) -> Response:
+	# Concurrent identical reads share one session, load and encoding (no per-request session)
+	if if_none_match is not None:
+		# 304s are answered from versions alone, without loading items or building RecipeOut
+		etag = await recipe_reads.etag(recipe_id)
+		if etag is not None and etag_matches(if_none_match, etag):
+			return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+	read = await recipe_reads.get(recipe_id)
+	headers = {} if read.etag is None else {"ETag": read.etag}
+	return RawJSONResponse(read.body, headers=headers)
 
 
 @router.get("/", response_model=list[RecipeOut])
 async def list_recipes(
 	limit: int = Query(100, ge=1, le=500),
 	offset: int = Query(0, ge=0),
-	service: RecipeService = Depends(get_service),
-) -> list[RecipeOut]:
-	rows: Iterable[RecipeOut] = service.list_recipes(limit=limit, offset=offset)
-	return list(rows)
+	cursor: Optional[str] = Query(
+		None,
+		description="Opaque cursor from a previous page's X-Next-Cursor",
+	),
+	sort: SortKey = Query("id"),
+	ids: list[str] = Query(
+		[],
+		description=(
+			"Fetch these ids instead of a page, in order (comma-separated or repeated,"
+			f" at most {MAX_BATCH_IDS}); missing ones are listed in X-Missing-Ids"
+		),
+	),
+	service: AsyncRecipeService = Depends(get_read_service),
+) -> Response:
+	if cursor is not None and offset:
+		raise HTTPException(
+			status_code=status.HTTP_400_BAD_REQUEST,
+			detail="Use either offset or cursor",
+		)
+	try:
+		after = None if cursor is None else decode_cursor(cursor, sort=sort)
+		wanted = parse_ids(ids, limit=MAX_BATCH_IDS)
+	except ValueError as exc:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+	if wanted:
+		if cursor is not None or offset:
+			raise HTTPException(
+				status_code=status.HTTP_400_BAD_REQUEST,
+				detail="ids cannot be combined with paging",
+			)
+		batch = await service.get_recipes(wanted)
+		recipes = [recipe.model_dump(exclude={"foods"}) for recipe in batch.items]
+		missing = ",".join(map(str, batch.missing_ids))
+		headers = {MISSING_IDS_HEADER: missing} if missing else {}
+		return RawJSONResponse(dumps(recipes), headers=headers)
+	# Rows straight to JSON bytes; response_model only documents the shape
+	page = await service.list_recipe_payloads(limit=limit, offset=offset, sort=sort, after=after)
+	token = next_cursor(page, sort=sort, limit=limit)
+	headers = {} if token is None else {NEXT_CURSOR_HEADER: token}
+	return RawJSONResponse(dumps(page), headers=headers)
 
 
 @router.patch("/{recipe_id}", response_model=RecipeOut)
-async def update_recipe(recipe_id: int, payload: RecipeUpdate, service: RecipeService = Depends(get_service)) -> RecipeOut:
-	updated = service.update_recipe(recipe_id, payload)
+async def update_recipe(
+	recipe_id: int,
+	payload: RecipeUpdate,
+	service: AsyncRecipeService = Depends(get_service),
+) -> RecipeOut:
+	updated = await service.update_recipe(recipe_id, payload)
 	if updated is None:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
 	return updated
 
 
 @router.delete("/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT, response_model=None)
-async def delete_recipe(recipe_id: int, service: RecipeService = Depends(get_service)) -> Response:
-	deleted = service.delete_recipe(recipe_id)
+async def delete_recipe(
+	recipe_id: int,
+	service: AsyncRecipeService = Depends(get_service),
+) -> Response:
+	try:
+		deleted = await service.delete_recipe(recipe_id)
+	except ValueError as exc:  # still used as a sub-recipe
+		raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
 	if not deleted:
 		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
 	return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.post("/{recipe_id}/items", response_model=RecipeOut)
-async def add_item(recipe_id: int, payload: RecipeItemIn, service: RecipeService = Depends(get_service)) -> RecipeOut:
-	updated = service.add_item(recipe_id, payload)
+async def add_item(
+	recipe_id: int,
+	payload: RecipeItemIn,
+	service: AsyncRecipeService = Depends(get_service),
+) -> RecipeOut:
+	try:
+		updated = await service.add_item(recipe_id, payload)
+	except ValueError as exc:  # missing food/sub-recipe, or a cycle
+		raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
 	if updated is None:
-		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found or food missing")
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Recipe not found or food missing",
+		)
+	return updated
+
+
+@router.put("/{recipe_id}/items", response_model=RecipeOut)
+async def replace_items(
+	recipe_id: int,
+	payload: list[RecipeItemIn],
+	service: AsyncRecipeService = Depends(get_service),
+) -> RecipeOut:
+	# The whole item list in one request: one diff, one flush, one recompute
+	try:
+		updated = await service.replace_items(recipe_id, payload)
+	except ValueError as exc:  # missing foods/sub-recipes, or a cycle
+		raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+	if updated is None:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
 	return updated
 
 
@@ -70,17 +209,31 @@ async def update_item_quantity(
 	recipe_id: int,
 	item_id: int,
 	quantity: float,
-	service: RecipeService = Depends(get_service),
+	service: AsyncRecipeService = Depends(get_service),
 ) -> RecipeOut:
-	updated = service.update_item_quantity(recipe_id, item_id, quantity)
+	updated = await service.update_item_quantity(recipe_id, item_id, quantity)
 	if updated is None:
-		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe or item not found")
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Recipe or item not found",
+		)
 	return updated
 
 
-@router.delete("/{recipe_id}/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT, response_model=None)
-async def remove_item(recipe_id: int, item_id: int, service: RecipeService = Depends(get_service)) -> Response:
-	ok = service.remove_item(recipe_id, item_id)
+@router.delete(
+	"/{recipe_id}/items/{item_id}",
+	status_code=status.HTTP_204_NO_CONTENT,
+	response_model=None,
+)
+async def remove_item(
+	recipe_id: int,
+	item_id: int,
+	service: AsyncRecipeService = Depends(get_service),
+) -> Response:
+	ok = await service.remove_item(recipe_id, item_id)
 	if not ok:
-		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe or item not found")
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Recipe or item not found",
+		)
 	return Response(status_code=status.HTTP_204_NO_CONTENT)
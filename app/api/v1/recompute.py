@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from app.domain.schemas import RecomputeJobOut, RecomputeStatusOut
+from app.domain.services import recompute_queue
+
+router = APIRouter(prefix="/recompute", tags=["recompute"])
+
+
+@router.get("/", response_model=RecomputeStatusOut)
+async def get_status() -> RecomputeStatusOut:
+	return recompute_queue.status()
+
+
+@router.get("/jobs", response_model=list[RecomputeJobOut])
+async def list_jobs(
+	food_id: Optional[int] = Query(None, ge=1),
+	recipe_id: Optional[int] = Query(None, ge=1),
+	limit: int = Query(100, ge=1, le=1000),
+) -> list[RecomputeJobOut]:
+	return recompute_queue.list_jobs(food_id=food_id, recipe_id=recipe_id, limit=limit)
+
+
+@router.get("/jobs/{job_id}", response_model=RecomputeJobOut)
+async def get_job(job_id: int) -> RecomputeJobOut:
+	job = recompute_queue.get_job(job_id)
+	if job is None:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+	return job
@@ -1,14 +1,13 @@
 from __future__ import annotations
 
 import random
-from typing import List
+from typing import AsyncIterator, List
 
 from fastapi import APIRouter, Depends
 
-from app.core.database import get_session
-from app.domain.repositories import FoodRepository
+from app.core.database import get_async_session
 from app.domain.schemas import FoodCreate, FoodOut
-from app.domain.services import FoodService
+from app.domain.services import AsyncFoodService
 
 router = APIRouter(prefix="/seed", tags=["seed"])
 
@@ -23,20 +22,23 @@ FOOD_SAMPLES: List[FoodCreate] = [
 ]
 
 
-def get_food_service():
-	with get_session() as session:
-		yield FoodService(FoodRepository(session))
+async def get_food_service() -> AsyncIterator[AsyncFoodService]:
+	async with get_async_session() as session:
+		yield AsyncFoodService(session)
 
 
 @router.post("/foods", response_model=list[FoodOut])
-async def seed_foods(count: int = 6, service: FoodService = Depends(get_food_service)) -> list[FoodOut]:
+async def seed_foods(
+	count: int = 6,
+	service: AsyncFoodService = Depends(get_food_service),
+) -> list[FoodOut]:
 	out: list[FoodOut] = []
 	choices = FOOD_SAMPLES * ((count // len(FOOD_SAMPLES)) + 1)
 	random.shuffle(choices)
 	for sample in choices[:count]:
 		name = sample.name
 		try:
-			created = service.create_food(data=sample)
+			created = await service.create_food(data=sample)
 			out.append(created)
 		except ValueError:
 			# duplicate, skip
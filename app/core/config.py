@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,14 +10,83 @@ class SqliteSettings(BaseModel):
 	database_path: str = "sqlite+sqlite:///./nutrition.db"
 	echo: bool = False
 
+	# Connection tuning, applied as PRAGMAs on every new connection
+	journal_mode: Literal["wal", "delete", "truncate", "persist", "memory", "off"] = "wal"
+	synchronous: Literal["off", "normal", "full", "extra"] = "normal"
+	busy_timeout_ms: int = Field(5000, ge=0)
+	cache_size_kib: int = Field(65536, ge=0)
+	mmap_size: int = Field(256 * 1024 * 1024, ge=0)
+	# Read-only connections per engine; each writer engine (sync and async) holds one connection
+	reader_pool_size: int = Field(8, ge=1)
+
+
+class RecomputeSettings(BaseModel):
+	batch_size: int = 200
+	job_history: int = 1000
+
+
+class FoodCacheSettings(BaseModel):
+	max_size: int = Field(10_000, ge=0)
+	ttl_seconds: float = Field(300.0, gt=0)
+
+
+class FilterIndexSettings(BaseModel):
+	# In-memory nutrient index for GET /foods range filters (needs numpy; SQL is used otherwise)
+	enabled: bool = True
+	# Foods changed since the last snapshot before it is rebuilt
+	max_dirty: int = Field(5000, ge=0)
+
+
+class FoodCatalogSettings(BaseModel):
+	# Memory-mapped food catalog snapshot shared by all workers (needs numpy)
+	enabled: bool = True
+	# Snapshot file; empty means "<database file>.catalog" next to the SQLite database
+	path: str = ""
+	# Foods changed since the snapshot before it is rewritten
+	max_dirty: int = Field(5000, ge=0)
+
+
+class ChangeFeedSettings(BaseModel):
+	# Replays other workers' changes from the change_log table into local caches
+	enabled: bool = True
+	poll_interval_seconds: float = Field(0.5, gt=0)
+	batch_size: int = Field(1000, ge=1)
+	retain_rows: int = Field(100_000, ge=1)
+	prune_interval_seconds: float = Field(60.0, gt=0)
+
+
+class RecipeReadSettings(BaseModel):
+	# GET /recipes/{id}: identical concurrent requests share one load and one serialized body
+	coalesce: bool = True
+	# Also serve a finished read again for this long (0 disables); recipe and food changes drop
+	# it sooner
+	cache_ttl_seconds: float = Field(0.0, ge=0)
+	cache_max_entries: int = Field(1024, ge=0)
+
+
+class MetricsSettings(BaseModel):
+	# Request/SQL instrumentation exposed at GET /metrics (Prometheus text format)
+	enabled: bool = True
+	# Log a warning for requests running more SQL statements than this (0 disables)
+	warn_query_count: int = Field(50, ge=0)
+
 
 class AppSettings(BaseSettings):
-	model_config = SettingsConfigDict(env_file=".env", env_prefix="APP_", case_sensitive=False)
+	model_config = SettingsConfigDict(
+		env_file=".env", env_prefix="APP_", env_nested_delimiter="__", case_sensitive=False
+	)
 
 	env: str = "dev"
 	title: str = "Nutrition Analysis API"
 	version: str = "0.1.0"
 	sqlite: SqliteSettings = SqliteSettings()
+	recompute: RecomputeSettings = RecomputeSettings()
+	filter_index: FilterIndexSettings = FilterIndexSettings()
+	food_cache: FoodCacheSettings = FoodCacheSettings()
+	catalog: FoodCatalogSettings = FoodCatalogSettings()
+	change_feed: ChangeFeedSettings = ChangeFeedSettings()
+	recipe_reads: RecipeReadSettings = RecipeReadSettings()
+	metrics: MetricsSettings = MetricsSettings()
 
 
 settings = AppSettings()
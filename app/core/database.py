@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncGenerator, Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.ext.asyncio import (
+	AsyncEngine,
+	AsyncSession,
+	async_sessionmaker,
+	create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
 
@@ -13,8 +20,70 @@ class Base(DeclarativeBase):
 	pass
 
 
-engine = create_engine(settings.sqlite.database_path.replace("sqlite+", ""), echo=settings.sqlite.echo)
+def database_url(driver: str | None = None) -> str:
+	"""SQLAlchemy URL for the configured SQLite file, optionally with an explicit driver."""
+	url = settings.sqlite.database_path.replace("sqlite+", "")
+	return url if driver is None else url.replace("sqlite://", f"sqlite+{driver}://", 1)
+
+
+def _configure_connection(dbapi_connection: Any, *, readonly: bool) -> None:
+	cfg = settings.sqlite
+	cursor = dbapi_connection.cursor()
+	cursor.execute(f"PRAGMA busy_timeout = {cfg.busy_timeout_ms}")
+	cursor.execute(f"PRAGMA cache_size = -{cfg.cache_size_kib}")
+	cursor.execute(f"PRAGMA mmap_size = {cfg.mmap_size}")
+	cursor.execute(f"PRAGMA synchronous = {cfg.synchronous}")
+	if readonly:
+		cursor.execute("PRAGMA query_only = ON")
+	else:
+		# WAL lets readers proceed on a snapshot while the writer commits
+		cursor.execute(f"PRAGMA journal_mode = {cfg.journal_mode}")
+	cursor.close()
+
+
+def _tune(target: Engine, *, readonly: bool) -> None:
+	@event.listens_for(target, "connect")
+	def _on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+		_configure_connection(dbapi_connection, readonly=readonly)
+
+
+def _writer_options() -> dict[str, Any]:
+	# A single pooled connection serializes this engine's writers instead of racing for the lock.
+	# The sync and async engines each get one, so a process has two writer connections; SQLite
+	# serializes those two through busy_timeout.
+	return {"echo": settings.sqlite.echo, "pool_size": 1, "max_overflow": 0}
+
+
+def _reader_options() -> dict[str, Any]:
+	return {
+		"echo": settings.sqlite.echo,
+		"pool_size": settings.sqlite.reader_pool_size,
+		"max_overflow": 0,
+	}
+
+
+engine = create_engine(database_url(), **_writer_options())
+read_engine = create_engine(database_url(), **_reader_options())
+_tune(engine, readonly=False)
+_tune(read_engine, readonly=True)
+# Unpooled: each raw_connection() opens its own handle, for long-lived connections (the change
+# feed's data_version probe) that would otherwise hold a reader slot for the process lifetime
+probe_engine = create_engine(database_url(), echo=settings.sqlite.echo, poolclass=NullPool)
+_tune(probe_engine, readonly=True)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, class_=Session)
+ReadSessionLocal = sessionmaker(bind=read_engine, autocommit=False, autoflush=False, class_=Session)
+
+# Same database through aiosqlite, so request handlers await I/O instead of blocking the event loop
+async_engine: AsyncEngine = create_async_engine(database_url("aiosqlite"), **_writer_options())
+async_read_engine: AsyncEngine = create_async_engine(database_url("aiosqlite"), **_reader_options())
+_tune(async_engine.sync_engine, readonly=False)
+_tune(async_read_engine.sync_engine, readonly=True)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(
+	bind=async_read_engine,
+	autoflush=False,
+	expire_on_commit=False,
+)
 
 
 @contextmanager
@@ -28,3 +97,35 @@ def get_session() -> Generator[Session, None, None]:
 		raise
 	finally:
 		session.close()
+
+
+@contextmanager
+def get_read_session() -> Generator[Session, None, None]:
+	"""Session on the read-only pool: never commits and never waits behind the writer."""
+	session = ReadSessionLocal()
+	try:
+		yield session
+	finally:
+		session.close()
+
+
+@asynccontextmanager
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+	session = AsyncSessionLocal()
+	try:
+		yield session
+		await session.commit()
+	except Exception:
+		await session.rollback()
+		raise
+	finally:
+		await session.close()
+
+
+@asynccontextmanager
+async def get_async_read_session() -> AsyncGenerator[AsyncSession, None]:
+	session = AsyncReadSessionLocal()
+	try:
+		yield session
+	finally:
+		await session.close()
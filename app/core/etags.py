@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Iterable, Optional, Tuple
+
+
+def make_etag(
+	kind: str,
+	entity_id: int,
+	version: int,
+	dependencies: Iterable[Tuple[Any, ...]] = (),
+) -> str:
+	"""
+	Strong ETag for one versioned row, e.g. "f12-3".
+	`dependencies` are (..., id, version) keys of rows the representation also depends on
+	(a recipe's foods and sub-recipes).
+	"""
+	tag = f"{kind}{entity_id}-{version}"
+	deps = sorted(dependencies)
+	if deps:
+		digest = hashlib.blake2b(repr(deps).encode(), digest_size=8).hexdigest()
+		tag = f"{tag}-{digest}"
+	return f'"{tag}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+	"""Evaluate an If-None-Match header against the current ETag (weak comparison, RFC 9110)."""
+	if not if_none_match:
+		return False
+	if if_none_match.strip() == "*":
+		return True
+	current = etag.removeprefix("W/")
+	candidates = if_none_match.split(",")
+	return any(candidate.strip().removeprefix("W/") == current for candidate in candidates)
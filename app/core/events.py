@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import logging
+import os
+from typing import Callable, List, Literal
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+
+logger = logging.getLogger(__name__)
+
+Entity = Literal["food", "recipe"]
+Action = Literal["created", "updated", "deleted"]
+
+
+@dataclass(frozen=True)
+class Change:
+	entity: Entity
+	entity_id: int
+	action: Action
+	# Committed by another worker process and replayed from the change log
+	remote: bool = False
+
+
+Subscriber = Callable[[Change], None]
+CommitHook = Callable[[Session, List[Change]], None]
+
+# Identifies this process in the shared change log
+PROCESS_ORIGIN = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class ChangeBus:
+	"""In-process fan-out of committed domain changes to caches, indexes and background work."""
+
+	def __init__(self) -> None:
+		self._subscribers: List[Subscriber] = []
+
+	def subscribe(self, subscriber: Subscriber) -> None:
+		if subscriber not in self._subscribers:
+			self._subscribers.append(subscriber)
+
+	def unsubscribe(self, subscriber: Subscriber) -> None:
+		if subscriber in self._subscribers:
+			self._subscribers.remove(subscriber)
+
+	def publish(self, change: Change) -> None:
+		for subscriber in list(self._subscribers):
+			try:
+				subscriber(change)
+			except Exception:  # a failing subscriber must not break the others
+				logger.exception("Change subscriber %r failed for %r", subscriber, change)
+
+
+changes = ChangeBus()
+
+_PENDING_KEY = "pending_changes"
+_commit_hooks: List[CommitHook] = []
+
+
+def on_commit_changes(hook: CommitHook) -> CommitHook:
+	"""Register a hook run inside each committing transaction with its pending changes."""
+	if hook not in _commit_hooks:
+		_commit_hooks.append(hook)
+	return hook
+
+
+def publish_after_commit(session: Session, change: Change) -> None:
+	"""Queue a change on the session; it is published only once the transaction commits."""
+	pending: List[Change] | None = session.info.get(_PENDING_KEY)
+	if pending is None:
+		pending = session.info[_PENDING_KEY] = []
+		event.listen(session, "before_commit", _run_commit_hooks)
+		event.listen(session, "after_commit", _publish_pending)
+		event.listen(session, "after_soft_rollback", _discard_pending)
+	pending.append(change)
+
+
+def pending_changes(session: Session) -> List[Change]:
+	"""Changes recorded on the session that have not been committed yet."""
+	return list(session.info.get(_PENDING_KEY) or [])
+
+
+def _run_commit_hooks(session: Session) -> None:
+	pending = list(dict.fromkeys(session.info.get(_PENDING_KEY) or []))
+	if pending:
+		for hook in _commit_hooks:
+			hook(session, pending)
+
+
+def _publish_pending(session: Session) -> None:
+	pending: List[Change] = session.info.get(_PENDING_KEY) or []
+	session.info[_PENDING_KEY] = []
+	for change in dict.fromkeys(pending):  # drop repeats, keep order
+		changes.publish(change)
+
+
+def _discard_pending(session: Session, previous_transaction: SessionTransaction) -> None:
+	if previous_transaction.parent is None:  # savepoint rollbacks keep the outer changes
+		session.info[_PENDING_KEY] = []
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+import math
+import re
+from typing import Dict, List, Optional, Sequence
+
+_PREDICATE_RE = re.compile(
+	r"^\s*(\w+)\s*(>=|<=|>|<|=)\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*$"
+)
+
+
+@dataclass(frozen=True)
+class NutrientRange:
+	"""Closed, open or half-bounded interval on one nutrient; a missing nutrient never matches."""
+
+	nutrient: str
+	low: Optional[float] = None
+	high: Optional[float] = None
+	low_inclusive: bool = True
+	high_inclusive: bool = True
+
+	def matches(self, value: Optional[float]) -> bool:
+		if value is None:
+			return False
+		if self.low is not None and (
+			value < self.low or (value == self.low and not self.low_inclusive)
+		):
+			return False
+		if self.high is not None and (
+			value > self.high or (value == self.high and not self.high_inclusive)
+		):
+			return False
+		return True
+
+	def intersect(self, other: NutrientRange) -> NutrientRange:
+		merged = self
+		if other.low is not None and (
+			merged.low is None
+			or other.low > merged.low
+			or (other.low == merged.low and not other.low_inclusive)
+		):
+			merged = replace(merged, low=other.low, low_inclusive=other.low_inclusive)
+		if other.high is not None and (
+			merged.high is None
+			or other.high < merged.high
+			or (other.high == merged.high and not other.high_inclusive)
+		):
+			merged = replace(merged, high=other.high, high_inclusive=other.high_inclusive)
+		return merged
+
+
+def parse_nutrient_filters(expressions: Sequence[str]) -> List[NutrientRange]:
+	"""
+	Parse predicates like "protein_g>20" or "vitamin_c_mg>=15" into one range per nutrient.
+	Predicates on the same nutrient are intersected. Raises ValueError on malformed input.
+	"""
+	ranges: Dict[str, NutrientRange] = {}
+	for expression in expressions:
+		match = _PREDICATE_RE.match(expression)
+		if match is None:
+			raise ValueError(
+				f"Invalid filter {expression!r}; expected <nutrient><op><number>,"
+				" op one of > >= < <= ="
+			)
+		nutrient, op, raw = match.groups()
+		value = float(raw)
+		if not math.isfinite(value):
+			raise ValueError(f"Invalid filter {expression!r}: value must be finite")
+		if op == "=":
+			bound = NutrientRange(nutrient, low=value, high=value)
+		elif op.startswith(">"):
+			bound = NutrientRange(nutrient, low=value, low_inclusive=op == ">=")
+		else:
+			bound = NutrientRange(nutrient, high=value, high_inclusive=op == "<=")
+		ranges[nutrient] = ranges[nutrient].intersect(bound) if nutrient in ranges else bound
+	return list(ranges.values())
+
+
+def parse_ids(values: Sequence[str], *, limit: int) -> List[int]:
+	"""
+	Ids from repeated and/or comma-separated query values ("ids=1,2&ids=3"), in request order.
+	Raises ValueError on anything but positive integers, or on more than `limit` ids.
+	"""
+	ids: List[int] = []
+	for value in values:
+		for part in value.split(","):
+			part = part.strip()
+			if not part:
+				continue
+			if not (part.isascii() and part.isdigit()) or int(part) < 1:
+				raise ValueError(f"Invalid id {part!r}; expected a positive integer")
+			ids.append(int(part))
+	if len(ids) > limit:
+		raise ValueError(f"At most {limit} ids per request")
+	return ids
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import bisect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Engine, event
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class _Metric:
+	kind = ""
+
+	def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+		self.name = name
+		self.documentation = documentation
+		self.labelnames = tuple(labelnames)
+		self._lock = threading.Lock()
+
+	def _key(self, labels: Dict[str, str]) -> LabelValues:
+		return tuple(str(labels[name]) for name in self.labelnames)
+
+	def _labels(self, values: LabelValues, extra: str = "") -> str:
+		pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, values, strict=True)]
+		if extra:
+			pairs.append(extra)
+		return "{" + ",".join(pairs) + "}" if pairs else ""
+
+	def render(self) -> List[str]:
+		return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+	kind = "counter"
+
+	def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+		super().__init__(name, documentation, labelnames)
+		self._values: Dict[LabelValues, float] = {}
+
+	def inc(self, amount: float = 1.0, **labels: str) -> None:
+		key = self._key(labels)
+		with self._lock:
+			self._values[key] = self._values.get(key, 0.0) + amount
+
+	def value(self, **labels: str) -> float:
+		return self._values.get(self._key(labels), 0.0)
+
+	def render(self) -> List[str]:
+		with self._lock:
+			items = sorted(self._values.items())
+		return super().render() + [f"{self.name}{self._labels(k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+	"""Cumulative-bucket histogram, rendered as Prometheus _bucket/_sum/_count series."""
+
+	kind = "histogram"
+
+	def __init__(
+		self,
+		name: str,
+		documentation: str,
+		labelnames: Sequence[str] = (),
+		*,
+		buckets: Sequence[float],
+	) -> None:
+		super().__init__(name, documentation, labelnames)
+		self.buckets = tuple(sorted(buckets))
+		# Per label set: per-bucket (non-cumulative) counts with a trailing +Inf slot, sum
+		self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+	def observe(self, value: float, **labels: str) -> None:
+		key = self._key(labels)
+		# First bucket whose bound is >= value; past the last bound lands in the +Inf slot
+		slot = bisect.bisect_left(self.buckets, value)
+		with self._lock:
+			counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+			counts[slot] += 1
+			total[0] += value
+
+	def count(self, **labels: str) -> int:
+		series = self._series.get(self._key(labels))
+		return 0 if series is None else sum(series[0])
+
+	def render(self) -> List[str]:
+		with self._lock:
+			items = sorted((k, (list(c), t[0])) for k, (c, t) in self._series.items())
+		lines = super().render()
+		for key, (counts, total) in items:
+			running = 0
+			for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+				running += count
+				le = "+Inf" if bound == math.inf else _number(bound)
+				labels = self._labels(key, 'le="' + le + '"')
+				lines.append(f"{self.name}_bucket{labels} {running}")
+			lines.append(f"{self.name}_sum{self._labels(key)} {_number(total)}")
+			lines.append(f"{self.name}_count{self._labels(key)} {running}")
+		return lines
+
+
+class MetricsRegistry:
+	def __init__(self) -> None:
+		self._metrics: Dict[str, _Metric] = {}
+
+	def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+		metric = Counter(name, documentation, labelnames)
+		self._metrics[name] = metric
+		return metric
+
+	def histogram(
+		self,
+		name: str,
+		documentation: str,
+		labelnames: Sequence[str] = (),
+		*,
+		buckets: Sequence[float],
+	) -> Histogram:
+		metric = Histogram(name, documentation, labelnames, buckets=buckets)
+		self._metrics[name] = metric
+		return metric
+
+	def render(self) -> str:
+		"""Prometheus text exposition format (version 0.0.4)."""
+		lines: List[str] = []
+		for metric in self._metrics.values():
+			lines.extend(metric.render())
+		return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+	"http_requests_total",
+	"HTTP requests by route template and status.",
+	("method", "route", "status"),
+)
+http_request_seconds = registry.histogram(
+	"http_request_duration_seconds",
+	"HTTP request latency.",
+	("method", "route"),
+	buckets=LATENCY_BUCKETS,
+)
+http_request_queries = registry.histogram(
+	"http_request_sql_queries",
+	"SQL statements executed per HTTP request.",
+	("method", "route"),
+	buckets=COUNT_BUCKETS,
+)
+http_request_sql_seconds = registry.histogram(
+	"http_request_sql_duration_seconds",
+	"Time spent in SQL per HTTP request.",
+	("method", "route"),
+	buckets=LATENCY_BUCKETS,
+)
+sql_queries = registry.counter(
+	"sql_queries_total",
+	"SQL statements executed, in or outside requests.",
+)
+sql_seconds = registry.counter(
+	"sql_query_duration_seconds_total",
+	"Time spent executing SQL statements.",
+)
+recipe_aggregation_seconds = registry.histogram(
+	"recipe_aggregation_duration_seconds",
+	"Time spent rebuilding stored recipe totals, by RecipeService operation.",
+	("operation",),
+	buckets=LATENCY_BUCKETS,
+)
+
+recipe_reads_total = registry.counter(
+	"recipe_reads_total",
+	"GET /recipes/{id} reads by how they were served: load, shared or cache.",
+	("source",),
+)
+
+
+@dataclass
+class RequestStats:
+	queries: int = 0
+	sql_seconds: float = 0.0
+
+
+# Set by the metrics middleware for the duration of one request; sync code run through
+# AsyncSession.run_sync sees it too (SQLAlchemy's greenlets share the task's context)
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+_QUERY_START = "metrics_query_start"
+
+
+def _before_cursor_execute(conn: Any, *args: Any) -> None:
+	conn.info.setdefault(_QUERY_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, *args: Any) -> None:
+	starts = conn.info.get(_QUERY_START)
+	if not starts:
+		return
+	elapsed = time.perf_counter() - starts.pop()
+	sql_queries.inc()
+	sql_seconds.inc(elapsed)
+	stats = current_request.get()
+	if stats is not None:
+		stats.queries += 1
+		stats.sql_seconds += elapsed
+
+
+def _handle_error(context: Any) -> None:
+	connection = context.connection
+	if connection is not None and connection.info.get(_QUERY_START):
+		connection.info[_QUERY_START].pop()
+
+
+def instrument_sql() -> None:
+	"""Count and time every statement of every engine (sync, and async through its sync_engine)."""
+	if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+		event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+		event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+		event.listen(Engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+	"""
+	ASGI middleware recording latency, SQL statement count and SQL time per request,
+	labelled by route template so /recipes/{recipe_id} is one series rather than one per id.
+	"""
+
+	def __init__(self, app: Any, *, warn_query_count: int = 0) -> None:
+		self.app = app
+		self.warn_query_count = warn_query_count
+
+	async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+		stats = RequestStats()
+		token = current_request.set(stats)
+		status_code = 500
+		started = time.perf_counter()
+
+		async def send_wrapper(message: Any) -> None:
+			nonlocal status_code
+			if message["type"] == "http.response.start":
+				status_code = message["status"]
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_wrapper)
+		finally:
+			current_request.reset(token)
+			elapsed = time.perf_counter() - started
+			method = scope["method"]
+			route = _route_template(scope)
+			http_requests.inc(method=method, route=route, status=str(status_code))
+			http_request_seconds.observe(elapsed, method=method, route=route)
+			http_request_queries.observe(stats.queries, method=method, route=route)
+			http_request_sql_seconds.observe(stats.sql_seconds, method=method, route=route)
+			if self.warn_query_count and stats.queries > self.warn_query_count:
+				logger.warning(
+					"%s %s ran %d SQL statements (%.1f ms in SQL, %.1f ms total)",
+					method,
+					scope["path"],
+					stats.queries,
+					stats.sql_seconds * 1000,
+					elapsed * 1000,
+				)
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels: str) -> Iterator[None]:
+	"""Observe the duration of a block; also usable as a function decorator."""
+	started = time.perf_counter()
+	try:
+		yield
+	finally:
+		histogram.observe(time.perf_counter() - started, **labels)
+
+
+def _route_template(scope: Any) -> str:
+	# Routes of included routers only know their own path; newer FastAPI records the full one
+	context = (scope.get("fastapi") or {}).get("effective_route_context")
+	route = getattr(scope.get("route"), "path", None)
+	return getattr(context, "path", None) or route or "unmatched"
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+	return repr(float(value)) if not float(value).is_integer() else str(int(value))
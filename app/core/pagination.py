@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass
+import json
+from typing import Any, Literal, Mapping, Optional, Sequence, TypeVar
+
+from sqlalchemy import Select
+from sqlalchemy.orm import InstrumentedAttribute
+
+SortKey = Literal["id", "name"]
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Multi-get by ?ids=: requested ids that were not found, comma-separated
+MISSING_IDS_HEADER = "X-Missing-Ids"
+
+_S = TypeVar("_S", bound=Select[Any])
+
+
+@dataclass(frozen=True)
+class Cursor:
+	"""Position after the last row of a page, for keyset (seek) pagination."""
+
+	sort: SortKey
+	last_id: int
+	last_name: Optional[str] = None
+
+
+def encode_cursor(cursor: Cursor) -> str:
+	raw = json.dumps([cursor.sort, cursor.last_id, cursor.last_name], separators=(",", ":"))
+	return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, *, sort: SortKey) -> Cursor:
+	try:
+		padded = token + "=" * (-len(token) % 4)
+		key, last_id, last_name = json.loads(base64.urlsafe_b64decode(padded.encode()))
+	except (ValueError, TypeError) as exc:
+		raise ValueError("Invalid cursor") from exc
+	if (
+		key != sort
+		or not isinstance(last_id, int)
+		or (key == "name" and not isinstance(last_name, str))
+	):
+		raise ValueError("Cursor does not match the requested sort")
+	return Cursor(sort=key, last_id=last_id, last_name=last_name)
+
+
+def next_cursor(rows: Sequence[Any], *, sort: SortKey, limit: int) -> Optional[str]:
+	"""Cursor for the page after `rows` (objects or id/name mappings), or None on the last page."""
+	if len(rows) < limit or not rows:
+		return None
+	last = rows[-1]
+	if isinstance(last, Mapping):
+		last_id, last_name = last["id"], last["name"]
+	else:
+		last_id, last_name = last.id, last.name
+	if sort != "name":
+		last_name = None
+	return encode_cursor(Cursor(sort=sort, last_id=last_id, last_name=last_name))
+
+
+def paginate(
+	stmt: _S,
+	*,
+	id_column: InstrumentedAttribute[int],
+	name_column: InstrumentedAttribute[str],
+	sort: SortKey = "id",
+	after: Optional[Cursor] = None,
+	limit: int = 100,
+	offset: int = 0,
+) -> _S:
+	"""
+	Apply a stable order plus either a keyset seek (`after`) or a classic OFFSET.
+	- Names are unique, so seeking on the indexed name alone is stable.
+	"""
+	column: InstrumentedAttribute[Any] = name_column if sort == "name" else id_column
+	stmt = stmt.order_by(column)
+	if after is not None:
+		stmt = stmt.where(column > (after.last_name if sort == "name" else after.last_id))
+	elif offset:
+		stmt = stmt.offset(offset)
+	return stmt.limit(limit)
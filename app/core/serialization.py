@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from importlib.util import find_spec
+import json
+from typing import Any, Callable
+
+from fastapi.responses import Response
+
+if find_spec("orjson") is not None:
+	import orjson
+
+	_dumps: Callable[[Any], bytes] = orjson.dumps
+else:
+
+	def _dumps(value: Any) -> bytes:
+		return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def dumps(value: Any) -> bytes:
+	"""Compact JSON bytes for plain dicts/lists; orjson when installed (pip install -e .[fast])."""
+	return _dumps(value)
+
+
+class RawJSONResponse(Response):
+	"""
+	A body already encoded with `dumps`. FastAPI passes returned Response objects through, so the
+	route's response_model still documents the payload but is not re-validated or re-encoded.
+	"""
+
+	media_type = "application/json"
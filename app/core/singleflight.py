@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Literal, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+Source = Literal["load", "shared", "cache"]
+
+
+class SingleFlight(Generic[K, V]):
+	"""
+	Coalesces concurrent async loads of the same key, with an optional short-lived result cache.
+	- The first caller for a key starts the load as its own task; callers arriving while it
+		runs await that task instead of loading again. A caller that is cancelled (client gone)
+		does not cancel the load for the others.
+	- Finished results are kept for ttl_seconds (0 disables), at most max_entries of them.
+	- invalidate()/clear() drop cached results and detach running loads, so later callers
+		start a fresh one; a load that overlapped an invalidation is returned but not cached.
+		Both are safe to call from other threads (e.g. the change feed).
+	"""
+
+	def __init__(
+		self,
+		*,
+		enabled: bool = True,
+		ttl_seconds: float = 0.0,
+		max_entries: int = 1024,
+		clock: Callable[[], float] = time.monotonic,
+	) -> None:
+		self._enabled = enabled
+		self._ttl = ttl_seconds
+		self._max_entries = max_entries
+		self._clock = clock
+		self._lock = threading.Lock()
+		self._inflight: Dict[K, asyncio.Task[V]] = {}
+		self._cached: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+		self._generation = 0
+
+	async def do(self, key: K, load: Callable[[], Awaitable[V]]) -> Tuple[V, Source]:
+		"""load()'s result for `key`, and whether it was loaded, shared or cached."""
+		if not self._enabled:
+			return await load(), "load"
+		loop = asyncio.get_running_loop()
+		with self._lock:
+			entry = self._cached.get(key)
+			if entry is not None and entry[0] > self._clock():
+				return entry[1], "cache"
+			task = self._inflight.get(key)
+			# Tasks belong to one event loop; callers on another one load for themselves
+			if task is not None and task.get_loop() is loop:
+				source: Source = "shared"
+			else:
+				task = loop.create_task(self._load(key, load, self._generation))
+				self._inflight[key] = task
+				source = "load"
+		return await asyncio.shield(task), source
+
+	def invalidate(self, key: K) -> None:
+		with self._lock:
+			self._generation += 1
+			self._cached.pop(key, None)
+			self._inflight.pop(key, None)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._generation += 1
+			self._cached.clear()
+			self._inflight.clear()
+
+	async def _load(self, key: K, load: Callable[[], Awaitable[V]], generation: int) -> V:
+		try:
+			value = await load()
+		except BaseException:
+			with self._lock:
+				if self._inflight.get(key) is asyncio.current_task():
+					del self._inflight[key]
+			raise
+		with self._lock:
+			if self._inflight.get(key) is asyncio.current_task():
+				del self._inflight[key]
+			if self._ttl > 0 and self._max_entries > 0 and generation == self._generation:
+				self._cached[key] = (self._clock() + self._ttl, value)
+				self._cached.move_to_end(key)
+				while len(self._cached) > self._max_entries:
+					self._cached.popitem(last=False)
+		return value
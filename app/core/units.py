@@ -1,9 +1,16 @@
 from __future__ import annotations
 
-from typing import Literal
+from typing import TYPE_CHECKING, Literal, Sequence
+
+if TYPE_CHECKING:
+	import numpy as np
+	import numpy.typing as npt
 
 Unit = Literal["serving", "g", "ml", "piece"]
 
+# Integer codes used by the vectorized helpers; unknown units map to -1
+UNIT_CODES: dict[str, int] = {"serving": 0, "g": 1, "ml": 2, "piece": 3}
+
 
 def to_serving_multiplier(
 	*, quantity: float, unit: Unit, food_serving_size: float, food_serving_unit: Unit, grams_per_ml: float | None
@@ -35,3 +42,32 @@ def to_serving_multiplier(
 
 	# Fallback naive ratio when no specific mapping
 	return quantity / food_serving_size
+
+
+def unit_codes(units: Sequence[str]) -> npt.NDArray[np.int8]:
+	import numpy as np
+
+	return np.fromiter((UNIT_CODES.get(u, -1) for u in units), dtype=np.int8, count=len(units))
+
+
+def to_serving_multipliers(
+	*,
+	quantity: npt.NDArray[np.float64],
+	unit: npt.NDArray[np.int8],
+	food_serving_size: npt.NDArray[np.float64],
+	food_serving_unit: npt.NDArray[np.int8],
+	grams_per_ml: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+	"""
+	Vectorized to_serving_multiplier over parallel arrays (requires numpy).
+	- Units are UNIT_CODES integers; a missing density is NaN.
+	- Only g<->ml between differing units uses the density.
+	- Every other case is quantity / serving size.
+	"""
+	import numpy as np
+
+	density = np.where(np.isnan(grams_per_ml) | (grams_per_ml <= 0), 1.0, grams_per_ml)
+	g, ml = UNIT_CODES["g"], UNIT_CODES["ml"]
+	amount = np.where((unit == g) & (food_serving_unit == ml), quantity / density, quantity)
+	amount = np.where((unit == ml) & (food_serving_unit == g), quantity * density, amount)
+	return amount / food_serving_size
@@ -1,2 +1,7 @@
-from app.domain.models.food import Food  # noqa: F401
+from app.domain.models.change_log import ChangeLogEntry, ChangeLogGeneration  # noqa: F401
+from app.domain.models.food import NUTRIENT_COLUMNS, Food  # noqa: F401
+from app.domain.models.food_search import FOODS_FTS, FOODS_TRGM, ensure_food_search_index  # noqa: F401
+from app.domain.models.meal_log import DailyIntake, MealLogEntry  # noqa: F401
+from app.domain.models.migrations import upgrade_schema  # noqa: F401
 from app.domain.models.recipe import Recipe, RecipeItem  # noqa: F401
+from app.domain.models.versioning import Versioned, bump_version  # noqa: F401
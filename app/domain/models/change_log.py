@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+import uuid
+
+from sqlalchemy import Connection, String, event, func, insert
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ChangeLogEntry(Base):
+	"""One committed food/recipe change, read by other worker processes to invalidate caches."""
+
+	__tablename__ = "change_log"
+	# AUTOINCREMENT: ids are never reused after pruning, so readers can resume from the last id
+	__table_args__ = {"sqlite_autoincrement": True}
+
+	id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+	entity: Mapped[str] = mapped_column(String(16))  # food|recipe
+	entity_id: Mapped[int] = mapped_column()
+	action: Mapped[str] = mapped_column(String(16))  # created|updated|deleted
+	origin: Mapped[str] = mapped_column(String(64))  # writing process, see PROCESS_ORIGIN
+	created_at: Mapped[datetime] = mapped_column(server_default=func.current_timestamp())
+
+
+class ChangeLogGeneration(Base):
+	"""
+	Random token minted whenever the schema is created. Log ids restart in a recreated
+	database, so a position is only meaningful together with the token it was read under.
+	"""
+
+	__tablename__ = "change_log_generation"
+
+	token: Mapped[str] = mapped_column(String(32), primary_key=True)
+
+
+@event.listens_for(ChangeLogGeneration.__table__, "after_create")
+def _mint_generation(target: Any, connection: Connection, **kw: Any) -> None:
+	connection.execute(insert(ChangeLogGeneration).values(token=uuid.uuid4().hex))
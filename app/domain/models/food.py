@@ -1,13 +1,35 @@
 from __future__ import annotations
 
-from sqlalchemy import JSON, String
+from typing import Tuple
+
+from sqlalchemy import JSON, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
+from app.domain.models.versioning import Versioned
+
+# Per-serving nutrient columns, in the order used by vectorized views of the catalog
+NUTRIENT_COLUMNS: Tuple[str, ...] = (
+	"calories",
+	"protein_g",
+	"carbs_g",
+	"fat_g",
+	"fiber_g",
+	"sugar_g",
+	"saturated_fat_g",
+	"sodium_mg",
+	"potassium_mg",
+	"cholesterol_mg",
+)
 
 
-class Food(Base):
+class Food(Versioned, Base):
 	__tablename__ = "foods"
+	__table_args__ = (
+		# Range filters: lead with the usual bounding column, later columns are checked in the index
+		Index("ix_foods_calories_macros", "calories", "protein_g", "carbs_g", "fat_g"),
+		Index("ix_foods_protein_calories", "protein_g", "calories", "sodium_mg"),
+	)
 
 	id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
 	name: Mapped[str] = mapped_column(String(120), unique=True, index=True)
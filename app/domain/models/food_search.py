@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import Connection, column, event, table, text
+
+from app.domain.models.food import Food
+
+# External-content FTS5 indexes over foods.name, kept in sync by triggers so every write path
+# (ORM, bulk import, other processes) updates them in the same transaction.
+# - foods_fts: word tokens with prefix indexes, for prefix/token search ranked by bm25
+# - foods_trgm: trigram tokens, for typo-tolerant candidate lookup
+FOODS_FTS = table("foods_fts", column("rowid"), column("rank"))
+FOODS_TRGM = table("foods_trgm", column("rowid"), column("rank"))
+
+_CREATE = [
+	"""CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(
+		name, content='foods', content_rowid='id',
+		tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+	)""",
+	"""CREATE VIRTUAL TABLE IF NOT EXISTS foods_trgm USING fts5(
+		name, content='foods', content_rowid='id', tokenize='trigram'
+	)""",
+	"""CREATE TRIGGER IF NOT EXISTS foods_search_ai AFTER INSERT ON foods BEGIN
+		INSERT INTO foods_fts(rowid, name) VALUES (new.id, new.name);
+		INSERT INTO foods_trgm(rowid, name) VALUES (new.id, new.name);
+	END""",
+	"""CREATE TRIGGER IF NOT EXISTS foods_search_ad AFTER DELETE ON foods BEGIN
+		INSERT INTO foods_fts(foods_fts, rowid, name) VALUES ('delete', old.id, old.name);
+		INSERT INTO foods_trgm(foods_trgm, rowid, name) VALUES ('delete', old.id, old.name);
+	END""",
+	"""CREATE TRIGGER IF NOT EXISTS foods_search_au AFTER UPDATE OF name ON foods BEGIN
+		INSERT INTO foods_fts(foods_fts, rowid, name) VALUES ('delete', old.id, old.name);
+		INSERT INTO foods_trgm(foods_trgm, rowid, name) VALUES ('delete', old.id, old.name);
+		INSERT INTO foods_fts(rowid, name) VALUES (new.id, new.name);
+		INSERT INTO foods_trgm(rowid, name) VALUES (new.id, new.name);
+	END""",
+]
+
+
+def ensure_food_search_index(connection: Connection) -> None:
+	"""Create the search tables and triggers if missing; first creation indexes existing rows."""
+	existing = connection.execute(
+		text("SELECT count(*) FROM sqlite_master WHERE name IN ('foods_fts', 'foods_trgm')")
+	).scalar_one()
+	for statement in _CREATE:
+		connection.execute(text(statement))
+	if existing < 2:
+		connection.execute(text("INSERT INTO foods_fts(foods_fts) VALUES ('rebuild')"))
+		connection.execute(text("INSERT INTO foods_trgm(foods_trgm) VALUES ('rebuild')"))
+
+
+def _drop_food_search_index(connection: Connection) -> None:
+	connection.execute(text("DROP TABLE IF EXISTS foods_fts"))
+	connection.execute(text("DROP TABLE IF EXISTS foods_trgm"))
+
+
+@event.listens_for(Food.__table__, "after_create")
+def _after_foods_create(target: Any, connection: Connection, **kw: Any) -> None:
+	_drop_food_search_index(connection)
+	ensure_food_search_index(connection)
+
+
+@event.listens_for(Food.__table__, "before_drop")
+def _before_foods_drop(target: Any, connection: Connection, **kw: Any) -> None:
+	_drop_food_search_index(connection)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import JSON, ForeignKey, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class MealLogEntry(Base):
+	"""One eaten portion of a food or recipe; nutrients are recorded as they were when logged."""
+
+	__tablename__ = "meal_log_entries"
+
+	id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+	day: Mapped[date] = mapped_column(index=True)
+	food_id: Mapped[Optional[int]] = mapped_column(ForeignKey("foods.id", ondelete="SET NULL"))
+	recipe_id: Mapped[Optional[int]] = mapped_column(ForeignKey("recipes.id", ondelete="SET NULL"))
+	name: Mapped[str] = mapped_column(String(160))
+	quantity: Mapped[float] = mapped_column(default=1.0)
+	unit: Mapped[str] = mapped_column(String(16), default="serving")  # serving|g|ml|piece
+
+	# This entry's contribution
+	calories: Mapped[int] = mapped_column(default=0)
+	protein_g: Mapped[float] = mapped_column(default=0.0)
+	carbs_g: Mapped[float] = mapped_column(default=0.0)
+	fat_g: Mapped[float] = mapped_column(default=0.0)
+	fiber_g: Mapped[float] = mapped_column(default=0.0)
+	sugar_g: Mapped[float] = mapped_column(default=0.0)
+	saturated_fat_g: Mapped[float] = mapped_column(default=0.0)
+	sodium_mg: Mapped[float] = mapped_column(default=0.0)
+	potassium_mg: Mapped[float] = mapped_column(default=0.0)
+	cholesterol_mg: Mapped[float] = mapped_column(default=0.0)
+	additional_nutrients: Mapped[dict[str, float]] = mapped_column(JSON, default=dict)
+
+	created_at: Mapped[datetime] = mapped_column(server_default=func.current_timestamp())
+
+
+class DailyIntake(Base):
+	"""
+	Per-day rollup of the meal log, kept up to date on every entry write.
+	- The plain columns are that day's totals.
+	- The cum_* columns are running totals over every day up to and including this one, so the
+		total for any date range is the difference of two rows (two index lookups).
+	- cum_additional_nutrients does the same per key for the nutrients outside the fixed columns.
+	"""
+
+	__tablename__ = "daily_intake"
+
+	day: Mapped[date] = mapped_column(primary_key=True)
+	entries: Mapped[int] = mapped_column(default=0)
+	calories: Mapped[int] = mapped_column(default=0)
+	protein_g: Mapped[float] = mapped_column(default=0.0)
+	carbs_g: Mapped[float] = mapped_column(default=0.0)
+	fat_g: Mapped[float] = mapped_column(default=0.0)
+	fiber_g: Mapped[float] = mapped_column(default=0.0)
+	sugar_g: Mapped[float] = mapped_column(default=0.0)
+	saturated_fat_g: Mapped[float] = mapped_column(default=0.0)
+	sodium_mg: Mapped[float] = mapped_column(default=0.0)
+	potassium_mg: Mapped[float] = mapped_column(default=0.0)
+	cholesterol_mg: Mapped[float] = mapped_column(default=0.0)
+	additional_nutrients: Mapped[dict[str, float]] = mapped_column(JSON, default=dict)
+
+	cum_entries: Mapped[int] = mapped_column(default=0)
+	cum_calories: Mapped[int] = mapped_column(default=0)
+	cum_protein_g: Mapped[float] = mapped_column(default=0.0)
+	cum_carbs_g: Mapped[float] = mapped_column(default=0.0)
+	cum_fat_g: Mapped[float] = mapped_column(default=0.0)
+	cum_fiber_g: Mapped[float] = mapped_column(default=0.0)
+	cum_sugar_g: Mapped[float] = mapped_column(default=0.0)
+	cum_saturated_fat_g: Mapped[float] = mapped_column(default=0.0)
+	cum_sodium_mg: Mapped[float] = mapped_column(default=0.0)
+	cum_potassium_mg: Mapped[float] = mapped_column(default=0.0)
+	cum_cholesterol_mg: Mapped[float] = mapped_column(default=0.0)
+	cum_additional_nutrients: Mapped[dict[str, float]] = mapped_column(JSON, default=dict)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from typing import Dict, Set
+
+from sqlalchemy import Connection, MetaData, Table, bindparam, inspect, select, text, update
+from sqlalchemy.schema import CreateTable
+
+from app.domain.models.food import Food
+from app.domain.models.recipe import Recipe, RecipeItem
+
+# create_all only adds missing tables; the steps below bring tables written by earlier releases
+# up to the current models. Each step checks the live schema first, so upgrading is idempotent.
+
+
+def _columns(connection: Connection, table: str) -> Set[str]:
+	return {c["name"] for c in inspect(connection).get_columns(table)}
+
+
+def _create_indexes(connection: Connection, table: Table) -> None:
+	for index in table.indexes:
+		index.create(connection, checkfirst=True)
+
+
+def upgrade_schema(connection: Connection) -> bool:
+	"""
+	Upgrade existing tables in place (run after create_all, before serving).
+	Returns whether stored recipe totals must be rebuilt before they are served.
+	"""
+	rebuild_totals = False
+	for table in ("foods", "recipes"):
+		if "version" not in _columns(connection, table):
+			# Existing rows start at version 1, like rows inserted without one
+			connection.execute(
+				text(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+			)
+	if "sub_recipe_id" not in _columns(connection, "recipe_items"):
+		_rebuild_recipe_items(connection)
+	if "nutrient_overrides" not in _columns(connection, "recipes"):
+		_add_nutrient_overrides(connection)
+		rebuild_totals = True
+	_create_indexes(connection, Food.__table__)
+	return rebuild_totals
+
+
+def _add_nutrient_overrides(connection: Connection) -> None:
+	connection.execute(
+		text("ALTER TABLE recipes ADD COLUMN nutrient_overrides JSON NOT NULL DEFAULT '{}'")
+	)
+	# additional_nutrients used to hold the overrides plus the item totals. Keys none of a
+	# recipe's foods carry are exactly its overrides; shared keys cannot be split and are
+	# left to the rebuild from the foods.
+	food_keys: Dict[int, Set[str]] = {}
+	items = select(RecipeItem.recipe_id, Food.additional_nutrients).join(
+		Food, Food.id == RecipeItem.food_id
+	)
+	for recipe_id, additional in connection.execute(items):
+		food_keys.setdefault(recipe_id, set()).update(additional or {})
+	rows = []
+	for recipe_id, additional in connection.execute(select(Recipe.id, Recipe.additional_nutrients)):
+		shared = food_keys.get(recipe_id, set())
+		overrides = {k: v for k, v in (additional or {}).items() if k not in shared}
+		if overrides:
+			rows.append({"recipe_id": recipe_id, "overrides": overrides})
+	if rows:
+		stmt = (
+			update(Recipe.__table__)
+			.where(Recipe.__table__.c.id == bindparam("recipe_id"))
+			.values(nutrient_overrides=bindparam("overrides"))
+		)
+		connection.execute(stmt, rows)
+
+
+def _rebuild_recipe_items(connection: Connection) -> None:
+	# SQLite cannot relax NOT NULL or add a CHECK constraint in place: build the new table
+	# beside the old one, copy the rows over, then swap it in under the old name.
+	metadata = MetaData()
+	for table in (Food.__table__, Recipe.__table__):
+		table.to_metadata(metadata)
+	new = RecipeItem.__table__.to_metadata(metadata, name="recipe_items_new")
+	connection.execute(CreateTable(new))
+	connection.execute(
+		text(
+			"INSERT INTO recipe_items_new (id, recipe_id, food_id, quantity, unit)"
+			" SELECT id, recipe_id, food_id, quantity, unit FROM recipe_items"
+		)
+	)
+	connection.execute(text("DROP TABLE recipe_items"))
+	connection.execute(text("ALTER TABLE recipe_items_new RENAME TO recipe_items"))
+	_create_indexes(connection, RecipeItem.__table__)
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
-from sqlalchemy import ForeignKey, JSON, String
+from sqlalchemy import CheckConstraint, ForeignKey, JSON, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
+from app.domain.models.food import Food
+from app.domain.models.versioning import Versioned
 
 
-class Recipe(Base):
+class Recipe(Versioned, Base):
 	__tablename__ = "recipes"
 
 	id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -26,21 +28,45 @@ class Recipe(Base):
 	potassium_mg: Mapped[float] = mapped_column(default=0.0)
 	cholesterol_mg: Mapped[float] = mapped_column(default=0.0)
 	additional_nutrients: Mapped[dict[str, float]] = mapped_column(JSON, default=dict)
+	# Recipe-level additional nutrients (manual overrides), already included in the totals above
+	nutrient_overrides: Mapped[dict[str, float]] = mapped_column(JSON, default=dict)
 
 	# Serving metadata for recipe
 	servings: Mapped[float] = mapped_column(default=1.0)
 	serving_unit: Mapped[str] = mapped_column(String(16), default="serving")
 
 	items: Mapped[List["RecipeItem"]] = relationship(
-		back_populates="recipe", cascade="all, delete-orphan"
+		back_populates="recipe",
+		cascade="all, delete-orphan",
+		order_by="RecipeItem.id",
+		foreign_keys="RecipeItem.recipe_id",
 	)
 
 
 class RecipeItem(Base):
 	__tablename__ = "recipe_items"
+	# An item is either a food or another recipe (a sub-recipe such as a sauce or dough)
+	__table_args__ = (
+		CheckConstraint(
+			"(food_id IS NULL) <> (sub_recipe_id IS NULL)",
+			name="ck_recipe_items_one_source",
+		),
+	)
 
 	id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
 	recipe_id: Mapped[int] = mapped_column(ForeignKey("recipes.id", ondelete="CASCADE"), index=True)
-	food_id: Mapped[int] = mapped_column(ForeignKey("foods.id", ondelete="RESTRICT"), index=True)
-	quantity: Mapped[float] = mapped_column(default=1.0)  # number of food servings by default
+	food_id: Mapped[Optional[int]] = mapped_column(
+		ForeignKey("foods.id", ondelete="RESTRICT"),
+		index=True,
+	)
+	# Reverse sub-recipe -> parents lookups (ancestor recompute) are served by this index
+	sub_recipe_id: Mapped[Optional[int]] = mapped_column(
+		ForeignKey("recipes.id", ondelete="RESTRICT"),
+		index=True,
+	)
+	# Number of food (or sub-recipe) servings by default
+	quantity: Mapped[float] = mapped_column(default=1.0)
 	unit: Mapped[str] = mapped_column(String(16), default="serving")  # serving|g|ml|piece
+
+	recipe: Mapped[Recipe] = relationship(back_populates="items", foreign_keys=[recipe_id])
+	food: Mapped[Optional[Food]] = relationship()
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Mapped, mapped_column, object_session
+
+
+class Versioned:
+	"""Mixin: `version` starts at 1 and is bumped on every ORM UPDATE of the row (ETags, caches)."""
+
+	version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
+
+
+def bump_version(target: Versioned) -> None:
+	"""Bump explicitly for changes stored outside the row itself (e.g. a recipe's items)."""
+	if not inspect(target).attrs.version.history.has_changes():
+		target.version += 1
+
+
+@event.listens_for(Versioned, "before_update", propagate=True)
+def _bump_on_update(mapper: Any, connection: Any, target: Versioned) -> None:
+	session = object_session(target)
+	if session is not None and session.is_modified(target, include_collections=False):
+		bump_version(target)
@@ -1,2 +1,6 @@
+from app.domain.repositories.change_log_repository import ChangeLogRepository  # noqa: F401
+from app.domain.repositories.food_cache import FoodCache, FoodSnapshot, food_cache  # noqa: F401
+from app.domain.repositories.food_catalog import CatalogSnapshot, FoodCatalog, food_catalog  # noqa: F401
 from app.domain.repositories.food_repository import FoodRepository  # noqa: F401
+from app.domain.repositories.meal_log_repository import MealLogRepository  # noqa: F401
 from app.domain.repositories.recipe_repository import RecipeRepository  # noqa: F401
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional, Sequence, Set
+
+from sqlalchemy import Row, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.events import PROCESS_ORIGIN, Change, Entity, on_commit_changes
+from app.domain.models import ChangeLogEntry, ChangeLogGeneration
+
+
+class ChangeLogRepository:
+	def __init__(self, session: Session) -> None:
+		self._session = session
+
+	def append(self, changes: Sequence[Change], *, origin: str = PROCESS_ORIGIN) -> None:
+		if changes:
+			rows = [
+				{"entity": c.entity, "entity_id": c.entity_id, "action": c.action, "origin": origin}
+				for c in changes
+			]
+			self._session.execute(insert(ChangeLogEntry), rows)
+
+	def latest_id(self) -> int:
+		return self._session.scalar(select(func.max(ChangeLogEntry.id))) or 0
+
+	def oldest_id(self) -> Optional[int]:
+		return self._session.scalar(select(func.min(ChangeLogEntry.id)))
+
+	def generation(self) -> Optional[str]:
+		"""Token of the database the log belongs to; changes when the schema is recreated."""
+		return self._session.scalar(select(ChangeLogGeneration.token).limit(1))
+
+	def entity_ids_after(self, *, entity: Entity, after_id: int) -> Set[int]:
+		"""Ids of the `entity` rows changed by entries after `after_id`."""
+		stmt = (
+			select(ChangeLogEntry.entity_id)
+			.where(ChangeLogEntry.id > after_id, ChangeLogEntry.entity == entity)
+			.distinct()
+		)
+		return set(self._session.scalars(stmt))
+
+	def entries_after(self, *, after_id: int, limit: int = 1000) -> List[Row[Any]]:
+		stmt = (
+			select(
+				ChangeLogEntry.id,
+				ChangeLogEntry.entity,
+				ChangeLogEntry.entity_id,
+				ChangeLogEntry.action,
+				ChangeLogEntry.origin,
+			)
+			.where(ChangeLogEntry.id > after_id)
+			.order_by(ChangeLogEntry.id)
+			.limit(limit)
+		)
+		return list(self._session.execute(stmt))
+
+	def prune(self, *, keep: int) -> int:
+		"""Delete all but the newest `keep` entries; returns the number deleted."""
+		cutoff = self.latest_id() - keep
+		if cutoff <= 0:
+			return 0
+		result = self._session.execute(delete(ChangeLogEntry).where(ChangeLogEntry.id <= cutoff))
+		return int(result.rowcount or 0)  # type: ignore[attr-defined]
+
+
+@on_commit_changes
+def _journal(session: Session, changes: List[Change]) -> None:
+	# Same transaction as the change itself: the log never disagrees with the data
+	ChangeLogRepository(session).append(changes)
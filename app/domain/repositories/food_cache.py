@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import itertools
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import Connection, event
+from sqlalchemy.orm import Session, SessionTransaction, UOWTransaction
+
+from app.core.config import settings
+from app.core.events import Change, pending_changes
+from app.domain.models import Food
+
+_WRITTEN_KEY = "written_food_ids"
+_EPOCH_KEY = "food_cache_epoch"
+
+# Invalidation epochs, shared by every cache: a load may be stored only if the cache has not
+# been invalidated since the loading transaction (or call) started
+_epoch = 0
+_epoch_lock = threading.Lock()
+
+
+def _next_epoch() -> int:
+	global _epoch
+	with _epoch_lock:
+		_epoch += 1
+		return _epoch
+
+
+def current_epoch() -> int:
+	return _epoch
+
+
+@dataclass(frozen=True, slots=True)
+class FoodSnapshot:
+	"""Immutable copy of a Food row, safe to share across sessions and threads."""
+
+	id: int
+	name: str
+	calories: int
+	protein_g: float
+	carbs_g: float
+	fat_g: float
+	fiber_g: float
+	sugar_g: float
+	saturated_fat_g: float
+	sodium_mg: float
+	potassium_mg: float
+	cholesterol_mg: float
+	additional_nutrients: Mapping[str, float]
+	serving_size: float
+	serving_unit: str
+	grams_per_ml: Optional[float]
+	version: int
+
+	@classmethod
+	def from_row(cls, row: Any) -> FoodSnapshot:
+		"""Build from anything with Food's attributes (ORM instance or Core row)."""
+		values = {name: getattr(row, name) for name in cls.__slots__}
+		extra = values["additional_nutrients"] or {}
+		values["additional_nutrients"] = MappingProxyType(dict(extra))
+		return cls(**values)
+
+
+@dataclass(frozen=True)
+class FoodCacheStats:
+	size: int
+	max_size: int
+	hits: int
+	misses: int
+	evictions: int
+
+
+Loader = Callable[[Iterable[int]], Dict[int, FoodSnapshot]]
+
+
+class FoodCache:
+	"""
+	Process-wide LRU of FoodSnapshots keyed by food id, with a per-entry TTL.
+	- Entries are dropped on food changes (see handle_change) and explicit invalidation.
+	- A load is returned but not stored when the cache was invalidated after the loading
+		transaction began, so a reader holding pre-change data cannot repopulate it.
+	"""
+
+	def __init__(
+		self,
+		*,
+		max_size: int = settings.food_cache.max_size,
+		ttl_seconds: float = settings.food_cache.ttl_seconds,
+		clock: Callable[[], float] = time.monotonic,
+	) -> None:
+		self._max_size = max_size
+		self._ttl = ttl_seconds
+		self._clock = clock
+		self._lock = threading.Lock()
+		self._entries: "OrderedDict[int, Tuple[float, FoodSnapshot]]" = OrderedDict()
+		self._invalidated_at = 0
+		self._hits = 0
+		self._misses = 0
+		self._evictions = 0
+
+	def get_many(
+		self, food_ids: Iterable[int], load: Loader, *, since: Optional[int] = None
+	) -> Dict[int, FoodSnapshot]:
+		"""
+		Snapshots for the ids that exist; misses are fetched with one load() call.
+		`since` is the epoch at which load()'s view of the data was taken (default: now).
+		"""
+		since = current_epoch() if since is None else since
+		found: Dict[int, FoodSnapshot] = {}
+		missing = []
+		now = self._clock()
+		with self._lock:
+			for food_id in dict.fromkeys(food_ids):
+				entry = self._entries.get(food_id)
+				if entry is not None and entry[0] > now:
+					self._entries.move_to_end(food_id)
+					found[food_id] = entry[1]
+					self._hits += 1
+				else:
+					missing.append(food_id)
+					self._misses += 1
+		if not missing:
+			return found
+		loaded = load(missing)
+		with self._lock:
+			if self._invalidated_at <= since and self._max_size > 0:
+				expires = self._clock() + self._ttl
+				for food_id, snapshot in loaded.items():
+					self._entries[food_id] = (expires, snapshot)
+					self._entries.move_to_end(food_id)
+				while len(self._entries) > self._max_size:
+					self._entries.popitem(last=False)
+					self._evictions += 1
+		found.update(loaded)
+		return found
+
+	def invalidate(self, food_id: int) -> None:
+		with self._lock:
+			self._invalidated_at = _next_epoch()
+			self._entries.pop(food_id, None)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._invalidated_at = _next_epoch()
+			self._entries.clear()
+
+	def handle_change(self, change: Change) -> None:
+		if change.entity == "food":
+			self.invalidate(change.entity_id)
+
+	def stats(self) -> FoodCacheStats:
+		with self._lock:
+			return FoodCacheStats(
+				size=len(self._entries),
+				max_size=self._max_size,
+				hits=self._hits,
+				misses=self._misses,
+				evictions=self._evictions,
+			)
+
+
+food_cache = FoodCache()
+
+
+def uncommitted_food_ids(session: Session) -> Set[int]:
+	"""Foods this session's open transaction has written (flushed ORM or recorded changes)."""
+	written: Set[int] = session.info.get(_WRITTEN_KEY, set())
+	return written | {c.entity_id for c in pending_changes(session) if c.entity == "food"}
+
+
+@event.listens_for(Session, "after_flush")
+def _track_food_writes(session: Session, flush_context: UOWTransaction) -> None:
+	for obj in itertools.chain(session.new, session.dirty, session.deleted):
+		if isinstance(obj, Food) and obj.id is not None:
+			session.info.setdefault(_WRITTEN_KEY, set()).add(obj.id)
+
+
+def transaction_epoch(session: Session) -> Optional[int]:
+	"""Epoch at which the session's open transaction began, if it has begun."""
+	return session.info.get(_EPOCH_KEY)
+
+
+@event.listens_for(Session, "after_begin")
+def _remember_epoch(
+	session: Session,
+	transaction: SessionTransaction,
+	connection: Connection,
+) -> None:
+	session.info.setdefault(_EPOCH_KEY, current_epoch())
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_transaction(session: Session, transaction: SessionTransaction) -> None:
+	if transaction.parent is None:
+		session.info.pop(_WRITTEN_KEY, None)
+		session.info.pop(_EPOCH_KEY, None)
+
+
+@event.listens_for(Food.__table__, "after_create")
+@event.listens_for(Food.__table__, "after_drop")
+def _clear_on_schema_change(target: Any, connection: Connection, **kw: Any) -> None:
+	food_cache.clear()
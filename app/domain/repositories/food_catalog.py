@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from importlib.util import find_spec
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from types import MappingProxyType
+from typing import (
+	TYPE_CHECKING,
+	Any,
+	Callable,
+	ContextManager,
+	Dict,
+	FrozenSet,
+	Iterable,
+	Iterator,
+	Optional,
+	Set,
+	Tuple,
+)
+
+from sqlalchemy import Connection, event, make_url, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import database_url, get_read_session
+from app.core.events import Change
+from app.domain.models import NUTRIENT_COLUMNS, Food
+from app.domain.repositories.change_log_repository import ChangeLogRepository
+from app.domain.repositories.food_cache import FoodSnapshot
+
+if TYPE_CHECKING:
+	import numpy as np
+	import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"FOODCAT1"
+# Arrays start on cache-line boundaries after the JSON header
+_ALIGN = 64
+
+
+def _aligned(offset: int) -> int:
+	return -(-offset // _ALIGN) * _ALIGN
+
+
+class CatalogSnapshot:
+	"""
+	Read-only food catalog as numpy arrays over one memory-mapped snapshot file.
+	- Rows are foods in id order; nutrients[j] holds NUTRIENT_COLUMNS[j] for every row.
+	- Row r's additional nutrients are extra_keys/extra_values[extra_indptr[r]:extra_indptr[r + 1]],
+		keys being positions in `keys`; names are UTF-8 slices of one byte blob.
+	- The arrays are views of the mapping: every process mapping the file shares its pages.
+	"""
+
+	def __init__(self, path: str) -> None:
+		import numpy as np
+
+		with open(path, "rb") as f:
+			self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		buffer = self._mmap
+		if len(buffer) < 16 or buffer[:8] != _MAGIC:
+			raise ValueError(f"{path} is not a food catalog snapshot")
+		(size,) = struct.unpack_from("<Q", buffer, 8)
+		header = json.loads(buffer[16 : 16 + size])
+		start = _aligned(16 + size)
+		arrays: Dict[str, Any] = {}
+		for name, (dtype, shape, offset) in header["arrays"].items():
+			count = math.prod(shape)
+			if start + offset + count * np.dtype(dtype).itemsize > len(buffer):
+				raise ValueError(f"{path} is truncated")
+			if count:
+				data = np.frombuffer(buffer, dtype=dtype, count=count, offset=start + offset)
+			else:
+				data = np.empty(0, dtype)
+			arrays[name] = data.reshape(shape)
+
+		self.path = path
+		# change_log id the snapshot is current up to, and the log generation that id belongs to
+		self.position: int = header["position"]
+		self.generation: Optional[str] = header.get("generation")
+		self.keys: Tuple[str, ...] = tuple(header["keys"])
+		self.units: Tuple[str, ...] = tuple(header["units"])
+		self.ids: npt.NDArray[np.int64] = arrays["ids"]
+		self.version: npt.NDArray[np.int64] = arrays["version"]
+		self.nutrients: npt.NDArray[np.float64] = arrays["nutrients"]
+		self.serving_size: npt.NDArray[np.float64] = arrays["serving_size"]
+		self.serving_unit: npt.NDArray[np.int8] = arrays["serving_unit"]  # positions in `units`
+		self.grams_per_ml: npt.NDArray[np.float64] = arrays["grams_per_ml"]  # NaN when unset
+		self.name_offsets: npt.NDArray[np.int64] = arrays["name_offsets"]
+		self.names: npt.NDArray[np.uint8] = arrays["names"]
+		self.extra_indptr: npt.NDArray[np.int64] = arrays["extra_indptr"]
+		self.extra_keys: npt.NDArray[np.int32] = arrays["extra_keys"]
+		self.extra_values: npt.NDArray[np.float64] = arrays["extra_values"]
+		# Rows in name order (str order, as SQLite's BINARY collation)
+		self.by_name: npt.NDArray[np.int64] = arrays["by_name"]
+
+	def __len__(self) -> int:
+		return len(self.ids)
+
+	def rows_for(self, food_ids: Iterable[int]) -> npt.NDArray[np.int64]:
+		"""Rows of the given food ids, -1 where the food is not in the snapshot."""
+		import numpy as np
+
+		wanted = np.fromiter(food_ids, dtype=np.int64)
+		if not len(self.ids):
+			return np.full(wanted.shape, -1, dtype=np.int64)
+		pos = np.minimum(np.searchsorted(self.ids, wanted), len(self.ids) - 1)
+		return np.where(self.ids[pos] == wanted, pos, -1)
+
+	def food(self, row: int) -> FoodSnapshot:
+		nutrients = self.nutrients[:, row].tolist()
+		start, stop = int(self.extra_indptr[row]), int(self.extra_indptr[row + 1])
+		density = float(self.grams_per_ml[row])
+		extra_keys = self.extra_keys[start:stop].tolist()
+		extra_values = self.extra_values[start:stop].tolist()
+		extra = zip(extra_keys, extra_values, strict=True)
+		return FoodSnapshot(
+			id=int(self.ids[row]),
+			name=self.names[self.name_offsets[row] : self.name_offsets[row + 1]].tobytes().decode(),
+			calories=int(nutrients[0]),
+			**dict(zip(NUTRIENT_COLUMNS[1:], nutrients[1:], strict=True)),
+			additional_nutrients=MappingProxyType({self.keys[k]: v for k, v in extra}),
+			serving_size=float(self.serving_size[row]),
+			serving_unit=self.units[self.serving_unit[row]],
+			grams_per_ml=None if math.isnan(density) else density,
+			version=int(self.version[row]),
+		)
+
+	def foods(self, food_ids: Iterable[int]) -> Dict[int, FoodSnapshot]:
+		"""FoodSnapshots of the ids present in the snapshot."""
+		rows = self.rows_for(food_ids).tolist()
+		return {int(self.ids[row]): self.food(row) for row in rows if row >= 0}
+
+
+def write_catalog(
+	path: str, foods: Iterable[Any], *, position: int, generation: Optional[str] = None
+) -> int:
+	"""
+	Write Food-like rows (ascending id order) as a snapshot file current up to change_log
+	entry `position` of log `generation`. The file is replaced atomically; returns the number
+	of foods written.
+	"""
+	import numpy as np
+
+	ids, versions, core, sizes, units, densities, names = [], [], [], [], [], [], []
+	unit_ids: Dict[str, int] = {}
+	keys: Dict[str, int] = {}
+	indptr, extra_keys, extra_values = [0], [], []
+	for food in foods:
+		ids.append(food.id)
+		versions.append(food.version)
+		core.append([getattr(food, name) for name in NUTRIENT_COLUMNS])
+		sizes.append(food.serving_size)
+		units.append(unit_ids.setdefault(food.serving_unit, len(unit_ids)))
+		densities.append(math.nan if food.grams_per_ml is None else food.grams_per_ml)
+		names.append(food.name)
+		for key, value in (food.additional_nutrients or {}).items():
+			extra_keys.append(keys.setdefault(key, len(keys)))
+			extra_values.append(value)
+		indptr.append(len(extra_keys))
+
+	encoded = [name.encode() for name in names]
+	name_ends = np.cumsum([len(b) for b in encoded], dtype="<i8")
+	arrays = {
+		"ids": np.asarray(ids, dtype="<i8"),
+		"version": np.asarray(versions, dtype="<i8"),
+		"nutrients": np.ascontiguousarray(
+			np.asarray(core, dtype="<f8").reshape(len(ids), len(NUTRIENT_COLUMNS)).T
+		),
+		"serving_size": np.asarray(sizes, dtype="<f8"),
+		"serving_unit": np.asarray(units, dtype="i1"),
+		"grams_per_ml": np.asarray(densities, dtype="<f8"),
+		"name_offsets": np.concatenate(([0], name_ends)).astype("<i8"),
+		"names": np.frombuffer(b"".join(encoded), dtype="u1"),
+		"extra_indptr": np.asarray(indptr, dtype="<i8"),
+		"extra_keys": np.asarray(extra_keys, dtype="<i4"),
+		"extra_values": np.asarray(extra_values, dtype="<f8"),
+		"by_name": np.asarray(sorted(range(len(ids)), key=names.__getitem__), dtype="<i8"),
+	}
+	layout = {}
+	offset = 0
+	for name, array in arrays.items():
+		layout[name] = (array.dtype.str, list(array.shape), offset)
+		offset = _aligned(offset + array.nbytes)
+	header = json.dumps(
+		{
+			"position": position,
+			"generation": generation,
+			"keys": list(keys),
+			"units": list(unit_ids),
+			"arrays": layout,
+		}
+	).encode()
+
+	directory = os.path.dirname(os.path.abspath(path))
+	fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+	try:
+		with os.fdopen(fd, "wb") as f:
+			f.write(_MAGIC + struct.pack("<Q", len(header)) + header)
+			start = _aligned(16 + len(header))
+			for name, array in arrays.items():
+				f.seek(start + layout[name][2])
+				f.write(array.tobytes())
+			f.truncate(start + offset)
+			f.flush()
+			os.fsync(f.fileno())
+		# Readers holding the old file keep their mapping; new opens see the new one
+		os.replace(tmp, path)
+	except BaseException:
+		os.unlink(tmp)
+		raise
+	return len(ids)
+
+
+def default_catalog_path() -> str:
+	"""settings.catalog.path, else "<database file>.catalog"; empty for in-memory databases."""
+	if settings.catalog.path:
+		return settings.catalog.path
+	database = make_url(database_url()).database
+	if not database or database == ":memory:" or database.startswith("file:"):
+		return ""
+	return database + ".catalog"
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+	# Serializes snapshot writers across worker processes (POSIX; elsewhere writers may overlap)
+	if find_spec("fcntl") is None:
+		yield
+		return
+	import fcntl
+
+	with open(path, "a+b") as f:
+		fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+		try:
+			yield
+		finally:
+			fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class FoodCatalog:
+	"""
+	Process-wide handle on the shared food catalog snapshot (requires numpy).
+	- Every worker maps the same file read-only, so the OS page cache holds one copy, and a
+		worker started after the file was written serves from it at once, without a warm-up.
+	- Foods changed since the snapshot are dirty: change_log entries after its position,
+		then change bus events. Readers skip dirty ids and fall back to the food cache / SQL.
+	- Past max_dirty the file is rewritten, one worker at a time (file lock); a worker whose
+		own dirty set overflows first maps a newer file written by another one, if there is one.
+	"""
+
+	def __init__(
+		self,
+		path: Optional[str] = None,
+		*,
+		enabled: bool = settings.catalog.enabled,
+		max_dirty: int = settings.catalog.max_dirty,
+		read_scope: Callable[[], ContextManager[Session]] = get_read_session,
+	) -> None:
+		self._path = default_catalog_path() if path is None else path
+		self._enabled = enabled and bool(self._path) and find_spec("numpy") is not None
+		self._max_dirty = max_dirty
+		self._read_scope = read_scope
+		self._lock = threading.Lock()
+		self._refresh_lock = threading.Lock()
+		self._snapshot: Optional[CatalogSnapshot] = None
+		self._dirty: Set[int] = set()
+		# Changes seen while a refresh is in progress; they join the new dirty set
+		self._building: Optional[Set[int]] = None
+		self._started = False
+		self._thread: Optional[threading.Thread] = None
+
+	@property
+	def ready(self) -> bool:
+		return self._snapshot is not None
+
+	def start(self) -> None:
+		"""Map the snapshot file if it is usable, else write one on a background thread."""
+		if not self._enabled:
+			return
+		self._started = True
+		if not self.refresh(write=False):
+			with self._lock:
+				self._start_refresh()
+
+	def view(self) -> Optional[Tuple[CatalogSnapshot, FrozenSet[int]]]:
+		"""(mapped snapshot, ids changed since it), or None while no snapshot is mapped."""
+		with self._lock:
+			if self._snapshot is None:
+				if self._started:
+					self._start_refresh()
+				return None
+			return self._snapshot, frozenset(self._dirty)
+
+	def get_many(self, food_ids: Iterable[int]) -> Dict[int, FoodSnapshot]:
+		"""Snapshots of the foods that the mapped snapshot holds and that did not change since."""
+		with self._lock:
+			snapshot = self._snapshot
+			if snapshot is None:
+				if self._started:
+					self._start_refresh()
+				return {}
+			ids = [i for i in food_ids if i not in self._dirty]
+		return snapshot.foods(ids) if ids else {}
+
+	def mark_dirty(self, food_id: int) -> None:
+		with self._lock:
+			if self._snapshot is None and self._building is None:
+				return  # the next snapshot recomputes its dirty set from the change log
+			self._dirty.add(food_id)
+			if self._building is not None:
+				self._building.add(food_id)
+			if self._snapshot is not None and len(self._dirty) > self._max_dirty:
+				self._start_refresh()
+
+	def handle_change(self, change: Change) -> None:
+		if change.entity == "food":
+			self.mark_dirty(change.entity_id)
+
+	def refresh(self, *, write: bool = True) -> bool:
+		"""
+		Map the snapshot file if it is usable; with `write`, first replace a missing, unusable
+		or too stale one. Returns whether a snapshot is mapped.
+		"""
+		if not self._enabled:
+			return False
+		with self._refresh_lock:
+			with self._lock:
+				self._building = set()
+			try:
+				found = self._open()
+				if write and (found is None or len(found[1]) > self._max_dirty):
+					with _file_lock(self._path + ".lock"):
+						# Another worker may have written a fresh one while this one waited
+						found = self._open()
+						if found is None or len(found[1]) > self._max_dirty:
+							self._write()
+							found = self._open()
+			except BaseException:
+				with self._lock:
+					self._building = None
+				raise
+			with self._lock:
+				if found is not None:
+					self._snapshot = found[0]
+					self._dirty = found[1] | self._building
+				self._building = None
+			return self._snapshot is not None
+
+	def invalidate(self) -> None:
+		"""Unmap the snapshot; once started, the next read begins a refresh."""
+		with self._lock:
+			self._snapshot = None
+			self._dirty = set()
+
+	def stop(self, timeout: Optional[float] = 5.0) -> None:
+		self._started = False
+		thread = self._thread
+		if thread is not None:
+			thread.join(timeout)
+		self._thread = None
+
+	def _open(self) -> Optional[Tuple[CatalogSnapshot, Set[int]]]:
+		try:
+			snapshot = CatalogSnapshot(self._path)
+		except FileNotFoundError:
+			return None
+		except ValueError as exc:
+			logger.warning("Ignoring food catalog snapshot: %s", exc)
+			return None
+		with self._read_scope() as session:
+			log = ChangeLogRepository(session)
+			# Written against another database (the schema was recreated since): ids may be reused
+			if snapshot.generation != log.generation():
+				return None
+			latest, oldest = log.latest_id(), log.oldest_id()
+			# A log reset or pruned past the snapshot leaves its dirty set unknown
+			pruned = oldest is not None and oldest > snapshot.position + 1
+			if latest < snapshot.position or pruned:
+				return None
+			return snapshot, log.entity_ids_after(entity="food", after_id=snapshot.position)
+
+	def _write(self) -> None:
+		with self._read_scope() as session:
+			# Position first: changes committed during the scan land above it and count as dirty
+			log = ChangeLogRepository(session)
+			position, generation = log.latest_id(), log.generation()
+			stmt = (
+				select(*Food.__table__.columns)
+				.order_by(Food.id)
+				.execution_options(yield_per=10_000)
+			)
+			rows = session.execute(stmt)
+			count = write_catalog(self._path, rows, position=position, generation=generation)
+		logger.info(
+			"Wrote food catalog snapshot %s: %d foods at change %d",
+			self._path,
+			count,
+			position,
+		)
+
+	def _start_refresh(self) -> None:
+		# Caller holds the lock
+		if self._building is not None or (self._thread is not None and self._thread.is_alive()):
+			return
+		self._thread = threading.Thread(target=self._run, name="food-catalog", daemon=True)
+		self._thread.start()
+
+	def _run(self) -> None:
+		try:
+			self.refresh()
+		except Exception:
+			logger.exception("Food catalog refresh failed")
+
+
+food_catalog = FoodCatalog()
+
+
+@event.listens_for(Food.__table__, "after_create")
+@event.listens_for(Food.__table__, "after_drop")
+def _invalidate_on_schema_change(target: Any, connection: Connection, **kw: Any) -> None:
+	food_catalog.invalidate()
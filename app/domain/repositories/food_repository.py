@@ -1,16 +1,50 @@
 from __future__ import annotations
 
-from typing import Iterable, Optional
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import ColumnElement, Row, Select, and_, func, literal_column, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from app.domain.models import Food
+from app.core.events import Action, Change, publish_after_commit
+from app.core.filters import NutrientRange
+from app.core.pagination import Cursor, SortKey, paginate
+from app.domain.models import FOODS_FTS, FOODS_TRGM, NUTRIENT_COLUMNS, Food
+from app.domain.repositories.food_cache import (
+	FoodCache,
+	FoodSnapshot,
+	food_cache,
+	transaction_epoch,
+	uncommitted_food_ids,
+)
+from app.domain.repositories.food_catalog import CatalogSnapshot, FoodCatalog, food_catalog
+
+
+def _range_clause(nutrient_range: NutrientRange) -> ColumnElement[bool]:
+	r = nutrient_range
+	if r.nutrient in NUTRIENT_COLUMNS:
+		value: ColumnElement[Any] = getattr(Food, r.nutrient)
+	else:
+		# Keys are \w+ (see parse_nutrient_filters), so quoting the JSON path is enough
+		value = func.json_extract(Food.additional_nutrients, f'$."{r.nutrient}"')
+	clauses = [value.is_not(None)]
+	if r.low is not None:
+		clauses.append(value >= r.low if r.low_inclusive else value > r.low)
+	if r.high is not None:
+		clauses.append(value <= r.high if r.high_inclusive else value < r.high)
+	return and_(*clauses)
 
 
 class FoodRepository:
-	def __init__(self, session: Session) -> None:
+	def __init__(
+		self,
+		session: Session,
+		cache: FoodCache = food_cache,
+		catalog: FoodCatalog = food_catalog,
+	) -> None:
 		self._session = session
+		self._cache = cache
+		self._catalog = catalog
 
 	def create(self, *, obj_in: Food) -> Food:
 		self._session.add(obj_in)
@@ -20,17 +54,187 @@ class FoodRepository:
 	def get_by_id(self, *, food_id: int) -> Optional[Food]:
 		return self._session.get(Food, food_id)
 
+	def get_snapshot(self, *, food_id: int) -> Optional[FoodSnapshot]:
+		return self.get_snapshots([food_id]).get(food_id)
+
+	def get_snapshots(self, food_ids: Iterable[int]) -> Dict[int, FoodSnapshot]:
+		"""
+		Read-only foods by id: the shared catalog snapshot first, then the shared cache;
+		missing ids are left out.
+		"""
+		ids = list(food_ids)
+		# Foods written by this open transaction bypass the catalog and cache in both directions
+		changed = uncommitted_food_ids(self._session)
+		since = transaction_epoch(self._session)
+		if not changed:
+			found = self._catalog.get_many(ids)
+			if len(found) < len(ids):
+				missing = [i for i in ids if i not in found]
+				found.update(self._cache.get_many(missing, self._load_snapshots, since=since))
+			return found
+		found = self._load_current([i for i in ids if i in changed])
+		shared = [i for i in ids if i not in changed]
+		found.update(self._catalog.get_many(shared))
+		missing = [i for i in shared if i not in found]
+		found.update(self._cache.get_many(missing, self._load_snapshots, since=since))
+		return found
+
+	def catalog_view(self) -> Optional[Tuple[CatalogSnapshot, FrozenSet[int]]]:
+		"""
+		(catalog snapshot, ids to read elsewhere): foods changed since the snapshot or written
+		by this open transaction. None when no snapshot is mapped.
+		"""
+		view = self._catalog.view()
+		if view is None:
+			return None
+		snapshot, dirty = view
+		return snapshot, dirty | uncommitted_food_ids(self._session)
+
+	def evict_cached(self, *, food_id: int) -> None:
+		self._cache.invalidate(food_id)
+		self._catalog.mark_dirty(food_id)
+
+	def _load_snapshots(self, food_ids: Iterable[int]) -> Dict[int, FoodSnapshot]:
+		ids = list(food_ids)
+		if not ids:
+			return {}
+		stmt = select(*Food.__table__.columns).where(Food.id.in_(ids))
+		return {row.id: FoodSnapshot.from_row(row) for row in self._session.execute(stmt)}
+
+	def _load_current(self, food_ids: Sequence[int]) -> Dict[int, FoodSnapshot]:
+		# ORM load so unflushed changes held in the identity map are reflected
+		if not food_ids:
+			return {}
+		foods = self._session.scalars(select(Food).where(Food.id.in_(food_ids)))
+		return {f.id: FoodSnapshot.from_row(f) for f in foods if f not in self._session.deleted}
+
 	def get_by_name(self, *, name: str) -> Optional[Food]:
 		stmt = select(Food).where(Food.name == name)
 		return self._session.scalar(stmt)
 
-	def list_all(self, *, limit: int = 100, offset: int = 0) -> Iterable[Food]:
-		stmt = select(Food).offset(offset).limit(limit)
+	def list_all(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+		ranges: Sequence[NutrientRange] = (),
+		ids: Optional[Iterable[int]] = None,
+	) -> Iterable[Food]:
+		"""One page of foods, optionally restricted to nutrient ranges and/or a set of ids."""
+		stmt = self._page(select(Food), limit, offset, sort, after, ranges, ids)
 		return self._session.scalars(stmt)
 
+	def list_rows(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+		ranges: Sequence[NutrientRange] = (),
+		ids: Optional[Iterable[int]] = None,
+	) -> List[Row[Any]]:
+		"""list_all as plain column rows, for read paths that never need Food objects."""
+		stmt = self._page(select(*Food.__table__.columns), limit, offset, sort, after, ranges, ids)
+		return list(self._session.execute(stmt))
+
+	@staticmethod
+	def _page(
+		stmt: Select[Any],
+		limit: int,
+		offset: int,
+		sort: SortKey,
+		after: Optional[Cursor],
+		ranges: Sequence[NutrientRange],
+		ids: Optional[Iterable[int]],
+	) -> Select[Any]:
+		stmt = stmt.where(*(_range_clause(r) for r in ranges))
+		if ids is not None:
+			stmt = stmt.where(Food.id.in_(list(ids)))
+		return paginate(
+			stmt,
+			id_column=Food.id,
+			name_column=Food.name,
+			sort=sort,
+			after=after,
+			limit=limit,
+			offset=offset,
+		)
+
+	def list_by_ids(self, ids: Sequence[int]) -> List[Food]:
+		if not ids:
+			return []
+		return list(self._session.scalars(select(Food).where(Food.id.in_(ids))))
+
+	def rows_by_ids(self, ids: Sequence[int]) -> List[Row[Any]]:
+		if not ids:
+			return []
+		return list(self._session.execute(select(*Food.__table__.columns).where(Food.id.in_(ids))))
+
+	def iter_rows(self, *, batch_size: int = 10_000) -> Iterable[Row[Any]]:
+		# Plain column rows streamed from the cursor: no ORM identity map for bulk readers
+		stmt = (
+			select(*Food.__table__.columns)
+			.order_by(Food.id)
+			.execution_options(yield_per=batch_size)
+		)
+		return self._session.execute(stmt)
+
+	def search_tokens(self, *, match: str, limit: int) -> List[Tuple[Food, float]]:
+		"""Full-text MATCH on the word index, best bm25 rank first."""
+		stmt = (
+			select(Food, FOODS_FTS.c.rank)
+			.join(FOODS_FTS, FOODS_FTS.c.rowid == Food.id)
+			.where(literal_column("foods_fts").op("MATCH")(match))
+			.order_by(FOODS_FTS.c.rank)
+			.limit(limit)
+		)
+		return [(food, rank) for food, rank in self._session.execute(stmt)]
+
+	def search_trigrams(self, *, match: str, limit: int) -> List[Food]:
+		"""Names sharing the most (and rarest) trigrams with the query, for fuzzy rescoring."""
+		stmt = (
+			select(Food)
+			.join(FOODS_TRGM, FOODS_TRGM.c.rowid == Food.id)
+			.where(literal_column("foods_trgm").op("MATCH")(match))
+			.order_by(FOODS_TRGM.c.rank)
+			.limit(limit)
+		)
+		return list(self._session.scalars(stmt))
+
+	def ids_by_name(self, names: Sequence[str]) -> Dict[str, int]:
+		stmt = select(Food.name, Food.id).where(Food.name.in_(names))
+		return {name: food_id for name, food_id in self._session.execute(stmt)}
+
+	def bulk_upsert(self, rows: Sequence[Dict[str, Any]], *, update: bool) -> Dict[str, int]:
+		"""
+		INSERT ... ON CONFLICT(name) DO NOTHING|UPDATE as one executemany.
+		Returns name -> id for every row written (inserted, or updated when update=True).
+		"""
+		if not rows:
+			return {}
+		# Core table insert: skips the ORM bulk-persistence layer, which dominated the cost
+		table = Food.__table__
+		stmt = sqlite_insert(table)
+		if update:
+			columns = [c for c in rows[0] if c != "name"]
+			stmt = stmt.on_conflict_do_update(
+				index_elements=[table.c.name],
+				set_={**{c: stmt.excluded[c] for c in columns}, "version": table.c.version + 1},
+			)
+		else:
+			stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.name])
+		written = self._session.execute(stmt.returning(table.c.name, table.c.id), list(rows))
+		return {name: food_id for name, food_id in written}
+
 	def delete(self, *, food_id: int) -> bool:
 		food = self.get_by_id(food_id=food_id)
 		if food is None:
 			return False
 		self._session.delete(food)
 		return True
+
+	def record_change(self, *, food_id: int, action: Action) -> None:
+		publish_after_commit(self._session, Change("food", food_id, action))
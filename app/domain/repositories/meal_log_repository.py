@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, List, Mapping, Optional
+
+from sqlalchemy import ColumnElement, func, select, update
+from sqlalchemy.orm import Session
+
+from app.domain.models import NUTRIENT_COLUMNS, DailyIntake, MealLogEntry
+
+_CUMULATIVE = ("cum_entries", *(f"cum_{name}" for name in NUTRIENT_COLUMNS))
+
+
+class MealLogRepository:
+	def __init__(self, session: Session) -> None:
+		self._session = session
+
+	def add_entry(self, entry: MealLogEntry) -> MealLogEntry:
+		self._session.add(entry)
+		self._session.flush()
+		return entry
+
+	def get_entry(self, *, entry_id: int) -> Optional[MealLogEntry]:
+		return self._session.get(MealLogEntry, entry_id)
+
+	def delete_entry(self, entry: MealLogEntry) -> None:
+		self._session.delete(entry)
+
+	def list_entries(
+		self,
+		*,
+		start: date,
+		end: date,
+		limit: int = 100,
+		offset: int = 0,
+	) -> List[MealLogEntry]:
+		stmt = (
+			select(MealLogEntry)
+			.where(MealLogEntry.day.between(start, end))
+			.order_by(MealLogEntry.day, MealLogEntry.id)
+			.limit(limit)
+			.offset(offset)
+		)
+		return list(self._session.scalars(stmt))
+
+	def daily_rows(self, *, start: date, end: date) -> List[DailyIntake]:
+		stmt = (
+			select(DailyIntake)
+			.where(DailyIntake.day.between(start, end))
+			.order_by(DailyIntake.day)
+		)
+		return list(self._session.scalars(stmt))
+
+	def running_totals(self, *, on_or_before: date) -> Optional[DailyIntake]:
+		"""The last rollup row at or before a day; its cum_* columns cover every day up to it."""
+		stmt = (
+			select(DailyIntake)
+			.where(DailyIntake.day <= on_or_before)
+			.order_by(DailyIntake.day.desc())
+			.limit(1)
+		)
+		return self._session.scalar(stmt)
+
+	def apply_to_day(self, *, day: date, delta: Mapping[str, Any], entries: int) -> None:
+		"""
+		Add (or, with negative values, remove) one entry's nutrients to a day's rollup.
+		Running totals move for that day and every later one in a single UPDATE; logging
+		for today touches one row, a backdated entry touches the days since.
+		"""
+		row = self._session.get(DailyIntake, day)
+		if row is None:
+			# A new day starts from the running totals of the last logged day before it
+			previous = self.running_totals(on_or_before=date.fromordinal(day.toordinal() - 1))
+			row = DailyIntake(day=day)
+			if previous is not None:
+				for name in _CUMULATIVE:
+					setattr(row, name, getattr(previous, name))
+				row.cum_additional_nutrients = dict(previous.cum_additional_nutrients)
+			self._session.add(row)
+			self._session.flush()
+
+		row.entries += entries
+		row.calories += delta["calories"]
+		for name in NUTRIENT_COLUMNS[1:]:
+			setattr(row, name, _snap(getattr(row, name) + delta[name]))
+		extra = delta.get("additional_nutrients") or {}
+		merged = dict(row.additional_nutrients or {})
+		for key, value in extra.items():
+			merged[key] = _snap(merged.get(key, 0.0) + value)
+		# Reassign so the JSON column is flagged as modified
+		row.additional_nutrients = merged
+		self._session.flush()
+
+		values = {"cum_entries": DailyIntake.cum_entries + entries}
+		for name in NUTRIENT_COLUMNS:
+			values[f"cum_{name}"] = getattr(DailyIntake, f"cum_{name}") + delta[name]
+		if extra:
+			cum_extra = DailyIntake.cum_additional_nutrients
+			values["cum_additional_nutrients"] = _json_add(cum_extra, extra)
+		self._session.execute(update(DailyIntake).where(DailyIntake.day >= day).values(values))
+		if row.entries <= 0:
+			# An emptied day adds nothing to the running totals after it
+			self._session.delete(row)
+
+
+def _json_add(column: Any, delta: Mapping[str, float]) -> ColumnElement[Any]:
+	# One json_set over every key; json_extract reads the row's value from before the UPDATE
+	args: List[Any] = []
+	for key, value in delta.items():
+		path = f'$."{key}"'
+		args += [path, func.coalesce(func.json_extract(column, path), 0.0) + value]
+	return func.json_set(column, *args)
+
+
+def _snap(value: float) -> float:
+	# Absorb float drift left behind when an entry is removed again
+	return 0.0 if abs(value) < 1e-9 else value
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
-from typing import Iterable, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, inspect, select, update
+from sqlalchemy.orm import Session, aliased, selectinload
 
-from app.domain.models import Food, Recipe, RecipeItem
+from app.core.events import Action, Change, publish_after_commit
+from app.core.pagination import Cursor, SortKey, paginate
+from app.domain.models import NUTRIENT_COLUMNS, Food, Recipe, RecipeItem, bump_version
+from app.domain.repositories.food_cache import FoodSnapshot
+
+# Eager-load a recipe's items (and optionally their foods) with one SELECT ... IN per relationship
+_ITEMS = selectinload(Recipe.items)
+_ITEMS_WITH_FOODS = selectinload(Recipe.items).selectinload(RecipeItem.food)
 
 
 class RecipeRepository:
@@ -17,17 +25,206 @@ class RecipeRepository:
 		self._session.flush()
 		return recipe
 
-	def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
+	def get_recipe(
+		self, recipe_id: int, *, with_items: bool = False, with_foods: bool = False
+	) -> Optional[Recipe]:
+		if with_foods:
+			return self._session.get(Recipe, recipe_id, options=[_ITEMS_WITH_FOODS])
+		if with_items:
+			return self._session.get(Recipe, recipe_id, options=[_ITEMS])
 		return self._session.get(Recipe, recipe_id)
 
 	def get_recipe_by_name(self, name: str) -> Optional[Recipe]:
 		stmt = select(Recipe).where(Recipe.name == name)
 		return self._session.scalar(stmt)
 
-	def list_recipes(self, *, limit: int = 100, offset: int = 0) -> Iterable[Recipe]:
-		stmt = select(Recipe).offset(offset).limit(limit)
+	def list_recipes(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+		with_items: bool = False,
+		with_foods: bool = False,
+	) -> Iterable[Recipe]:
+		stmt = paginate(
+			select(Recipe),
+			id_column=Recipe.id,
+			name_column=Recipe.name,
+			sort=sort,
+			after=after,
+			limit=limit,
+			offset=offset,
+		)
+		if with_foods:
+			stmt = stmt.options(_ITEMS_WITH_FOODS)
+		elif with_items:
+			stmt = stmt.options(_ITEMS)
 		return self._session.scalars(stmt)
 
+	def list_recipe_rows(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+	) -> List[Row[Any]]:
+		"""list_recipes as plain column rows (no items), for reads that need no Recipe objects."""
+		stmt = paginate(
+			select(*Recipe.__table__.columns),
+			id_column=Recipe.id,
+			name_column=Recipe.name,
+			sort=sort,
+			after=after,
+			limit=limit,
+			offset=offset,
+		)
+		return list(self._session.execute(stmt))
+
+	def list_by_ids(
+		self, recipe_ids: Sequence[int], *, with_items: bool = False, with_foods: bool = False
+	) -> List[Recipe]:
+		stmt = select(Recipe).where(Recipe.id.in_(recipe_ids)).order_by(Recipe.id)
+		if with_foods:
+			stmt = stmt.options(_ITEMS_WITH_FOODS)
+		elif with_items:
+			stmt = stmt.options(_ITEMS)
+		return list(self._session.scalars(stmt))
+
+	def version_key(self, recipe_id: int) -> Optional[Tuple[int, List[Tuple[str, int, int]]]]:
+		"""
+		(recipe version, sorted ("f" | "r", id, version) of the foods and sub-recipes its items
+		use), or None if missing.
+		"""
+		sub = aliased(Recipe)
+		stmt = (
+			select(Recipe.version, Food.id, Food.version, sub.id, sub.version)
+			.select_from(Recipe)
+			.outerjoin(RecipeItem, RecipeItem.recipe_id == Recipe.id)
+			.outerjoin(Food, Food.id == RecipeItem.food_id)
+			.outerjoin(sub, sub.id == RecipeItem.sub_recipe_id)
+			.where(Recipe.id == recipe_id)
+		)
+		rows = list(self._session.execute(stmt))
+		if not rows:
+			return None
+		deps: Set[Tuple[str, int, int]] = set()
+		for _, food_id, food_version, sub_id, sub_version in rows:
+			if food_id is not None:
+				deps.add(("f", food_id, food_version))
+			if sub_id is not None:
+				deps.add(("r", sub_id, sub_version))
+		return rows[0][0], sorted(deps)
+
+	@staticmethod
+	def as_component(recipe: Recipe | Row[Any]) -> FoodSnapshot:
+		"""A recipe as an ingredient: its whole-recipe totals per `servings` of `serving_unit`."""
+		values = {name: getattr(recipe, name) for name in NUTRIENT_COLUMNS}
+		return FoodSnapshot(
+			id=recipe.id,
+			name=recipe.name,
+			additional_nutrients=MappingProxyType(dict(recipe.additional_nutrients or {})),
+			serving_size=recipe.servings,
+			serving_unit=recipe.serving_unit,
+			grams_per_ml=None,
+			version=recipe.version,
+			**values,
+		)
+
+	def component_snapshots(self, recipe_ids: Iterable[int]) -> Dict[int, FoodSnapshot]:
+		ids = list(dict.fromkeys(recipe_ids))
+		if not ids:
+			return {}
+		# ORM load: totals rebuilt earlier in this session but not flushed yet are what count
+		recipes = self._session.scalars(select(Recipe).where(Recipe.id.in_(ids)))
+		return {recipe.id: self.as_component(recipe) for recipe in recipes}
+
+	def recipe_ids_using_food(self, *, food_id: int) -> List[int]:
+		# Reverse food -> recipes lookup, served by the index on recipe_items.food_id
+		stmt = select(RecipeItem.recipe_id).where(RecipeItem.food_id == food_id).distinct()
+		return list(self._session.scalars(stmt))
+
+	def recipe_ids_using_recipe(self, *, recipe_id: int) -> List[int]:
+		stmt = select(RecipeItem.recipe_id).where(RecipeItem.sub_recipe_id == recipe_id).distinct()
+		return list(self._session.scalars(stmt))
+
+	def descendant_ids(self, *, recipe_id: int) -> Set[int]:
+		"""Every recipe nested (at any depth) inside the given one, by one recursive query."""
+		down = (
+			select(RecipeItem.sub_recipe_id.label("id"))
+			.where(RecipeItem.recipe_id == recipe_id, RecipeItem.sub_recipe_id.is_not(None))
+			.cte("down", recursive=True)
+		)
+		down = down.union(
+			select(RecipeItem.sub_recipe_id)
+			.join(down, RecipeItem.recipe_id == down.c.id)
+			.where(RecipeItem.sub_recipe_id.is_not(None))
+		)
+		return set(self._session.scalars(select(down.c.id)))
+
+	def ancestor_edges(self, recipe_ids: Sequence[int]) -> List[Tuple[int, int]]:
+		"""
+		(child, parent) containment edges of every recipe that uses the given ones at any depth,
+		walked upward through the index on recipe_items.sub_recipe_id.
+		"""
+		if not recipe_ids:
+			return []
+		up = (
+			select(RecipeItem.sub_recipe_id.label("child"), RecipeItem.recipe_id.label("parent"))
+			.where(RecipeItem.sub_recipe_id.in_(recipe_ids))
+			.cte("up", recursive=True)
+		)
+		step = select(RecipeItem.sub_recipe_id, RecipeItem.recipe_id)
+		up = up.union(step.join(up, RecipeItem.sub_recipe_id == up.c.parent))
+		rows = self._session.execute(select(up.c.child, up.c.parent))
+		return [(child, parent) for child, parent in rows]
+
+	def recipe_rows_after(self, *, after_id: int = 0, limit: int = 5000) -> List[Row[Any]]:
+		stmt = (
+			select(*Recipe.__table__.columns)
+			.where(Recipe.id > after_id)
+			.order_by(Recipe.id)
+			.limit(limit)
+		)
+		return list(self._session.execute(stmt))
+
+	def item_rows(self, recipe_ids: Sequence[int]) -> List[Row[Any]]:
+		stmt = (
+			select(
+				RecipeItem.id,
+				RecipeItem.recipe_id,
+				RecipeItem.food_id,
+				RecipeItem.sub_recipe_id,
+				RecipeItem.quantity,
+				RecipeItem.unit,
+			)
+			.where(RecipeItem.recipe_id.in_(recipe_ids))
+			.order_by(RecipeItem.recipe_id, RecipeItem.id)
+		)
+		return list(self._session.execute(stmt))
+
+	def iter_recipe_batches(
+		self, *, batch_size: int = 1000
+	) -> Iterator[Tuple[Sequence[Row[Any]], Dict[int, List[Row[Any]]]]]:
+		"""Stream recipe rows in partitions, each with its items fetched by one IN query."""
+		stmt = (
+			select(*Recipe.__table__.columns)
+			.order_by(Recipe.id)
+			.execution_options(yield_per=batch_size)
+		)
+		for recipes in self._session.execute(stmt).partitions():
+			items: Dict[int, List[Row[Any]]] = {}
+			for item in self.item_rows([r.id for r in recipes]):
+				items.setdefault(item.recipe_id, []).append(item)
+			yield recipes, items
+
+	def bulk_update_totals(self, rows: Sequence[Dict[str, Any]]) -> None:
+		# ORM bulk UPDATE by primary key: one executemany, no objects loaded
+		if rows:
+			self._session.execute(update(Recipe), list(rows))
+
 	def delete_recipe(self, recipe_id: int) -> bool:
 		recipe = self.get_recipe(recipe_id)
 		if recipe is None:
@@ -35,17 +232,61 @@ class RecipeRepository:
 		self._session.delete(recipe)
 		return True
 
-	def add_item(self, *, recipe: Recipe, food: Food, quantity: float) -> RecipeItem:
-		item = RecipeItem(recipe=recipe, food_id=food.id, quantity=quantity)
+	def add_item(
+		self,
+		*,
+		recipe: Recipe,
+		food_id: Optional[int] = None,
+		sub_recipe_id: Optional[int] = None,
+		quantity: float,
+		unit: str = "serving",
+	) -> RecipeItem:
+		item = RecipeItem(
+			recipe=recipe,
+			food_id=food_id,
+			sub_recipe_id=sub_recipe_id,
+			quantity=quantity,
+			unit=unit,
+		)
+		bump_version(recipe)
 		self._session.add(item)
 		self._session.flush()
 		return item
 
+	def replace_items(
+		self,
+		*,
+		recipe: Recipe,
+		added: Sequence[Dict[str, Any]],
+		changed: Sequence[Tuple[RecipeItem, float, str]],
+		removed: Sequence[RecipeItem],
+	) -> None:
+		"""
+		Apply an item diff to a recipe with loaded items; the next flush writes it in one
+		batch per kind of change.
+		"""
+		for item in removed:
+			recipe.items.remove(item)  # delete-orphan
+		for item, quantity, unit in changed:
+			item.quantity = quantity
+			item.unit = unit
+		recipe.items.extend(RecipeItem(**values) for values in added)
+		bump_version(recipe)
+
+	def flush(self) -> None:
+		self._session.flush()
+
 	def update_item_quantity(self, *, item: RecipeItem, quantity: float) -> RecipeItem:
 		item.quantity = quantity
+		bump_version(item.recipe)
 		return item
 
 	def remove_item(self, *, item: RecipeItem) -> None:
+		recipe = item.recipe
+		# Keep an already-loaded collection in sync without loading it just to drop one row
+		if "items" not in inspect(recipe).unloaded:
+			recipe.items.remove(item)
+		bump_version(recipe)
 		self._session.delete(item)
 
 	def get_item(self, *, recipe_id: int, item_id: int) -> Optional[RecipeItem]:
@@ -54,3 +295,6 @@ class RecipeRepository:
 	def iter_items(self, *, recipe: Recipe) -> Iterable[RecipeItem]:
 		stmt = select(RecipeItem).where(RecipeItem.recipe_id == recipe.id)
 		return self._session.scalars(stmt)
+
+	def record_change(self, *, recipe_id: int, action: Action) -> None:
+		publish_after_commit(self._session, Change("recipe", recipe_id, action))
@@ -1,8 +1,36 @@
-from app.domain.schemas.food import FoodCreate, FoodOut, FoodUpdate  # noqa: F401
+from app.domain.schemas.food import (
+	FoodBatchIn,
+	FoodBatchOut,
+	FoodCacheStatsOut,
+	FoodCreate,
+	FoodImportError,
+	FoodImportResult,
+	FoodOut,
+	FoodSearchHit,
+	FoodUpdate,
+)  # noqa: F401
+from app.domain.schemas.meal_log import (
+	DailyIntakeOut,
+	IntakeSummaryOut,
+	IntakeTotals,
+	MealLogEntryIn,
+	MealLogEntryOut,
+)  # noqa: F401
 from app.domain.schemas.recipe import (
+	RecipeBatchIn,
+	RecipeBatchOut,
 	RecipeCreate,
 	RecipeItemIn,
 	RecipeItemOut,
 	RecipeOut,
 	RecipeUpdate,
+	RecipeWithFoodsOut,
+)  # noqa: F401
+from app.domain.schemas.recompute import RecomputeJobOut, RecomputeStatusOut  # noqa: F401
+from app.domain.schemas.scenario import (
+	ScenarioBatchIn,
+	ScenarioBatchOut,
+	ScenarioIn,
+	ScenarioItemIn,
+	ScenarioOut,
 )  # noqa: F401
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, List
 
 from pydantic import BaseModel, ConfigDict, Field
 
+# Ids accepted by one multi-get request
+MAX_BATCH_IDS = 500
+
 
 class FoodBase(BaseModel):
 	model_config = ConfigDict(from_attributes=True)
@@ -52,3 +55,41 @@ class FoodUpdate(BaseModel):
 
 class FoodOut(FoodBase):
 	id: int
+
+
+class FoodBatchIn(BaseModel):
+	ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class FoodBatchOut(BaseModel):
+	items: List[FoodOut] = Field(default_factory=list)  # found foods, in request order
+	missing_ids: List[int] = Field(default_factory=list)
+
+
+class FoodImportError(BaseModel):
+	line: int
+	message: str
+
+
+class FoodImportResult(BaseModel):
+	inserted: int = 0
+	updated: int = 0
+	skipped: int = 0  # name conflicts left untouched (on_conflict=skip)
+	failed: int = 0
+	errors: List[FoodImportError] = Field(default_factory=list)  # first max_errors failures
+
+
+class FoodSearchHit(BaseModel):
+	food: FoodOut
+	score: float  # higher is better; bm25-based for token hits, trigram overlap for fuzzy hits
+	match: str  # token|fuzzy
+
+
+class FoodCacheStatsOut(BaseModel):
+	model_config = ConfigDict(from_attributes=True)
+
+	size: int
+	max_size: int
+	hits: int
+	misses: int
+	evictions: int
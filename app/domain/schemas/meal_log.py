@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+
+class MealLogEntryIn(BaseModel):
+	day: date
+	food_id: Optional[int] = Field(default=None, ge=1)
+	recipe_id: Optional[int] = Field(default=None, ge=1)
+	# Measured like a recipe item: food servings, or servings of the recipe's yield
+	quantity: float = Field(gt=0)
+	unit: str = Field(pattern=r"^(serving|g|ml|piece)$", default="serving")
+
+	@model_validator(mode="after")
+	def _one_source(self) -> MealLogEntryIn:
+		if (self.food_id is None) == (self.recipe_id is None):
+			raise ValueError("Exactly one of food_id or recipe_id is required")
+		return self
+
+
+class IntakeTotals(BaseModel):
+	model_config = ConfigDict(from_attributes=True)
+
+	calories: int
+	protein_g: float
+	carbs_g: float
+	fat_g: float
+	fiber_g: float
+	sugar_g: float
+	saturated_fat_g: float
+	sodium_mg: float
+	potassium_mg: float
+	cholesterol_mg: float
+	additional_nutrients: Dict[str, float] = Field(default_factory=dict)
+
+
+class MealLogEntryOut(IntakeTotals):
+	id: int
+	day: date
+	food_id: Optional[int] = None
+	recipe_id: Optional[int] = None
+	name: str
+	quantity: float
+	unit: str
+
+
+class DailyIntakeOut(IntakeTotals):
+	day: date
+	entries: int
+
+
+class IntakeSummaryOut(BaseModel):
+	start: date
+	end: date
+	days: int  # calendar days in the range
+	entries: int
+	# Core nutrients and the additional nutrients logged in the range; totals and per calendar day
+	totals: Dict[str, float]
+	daily_average: Dict[str, float]
@@ -2,14 +2,24 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.domain.schemas.food import MAX_BATCH_IDS, FoodOut
 
 
 class RecipeItemIn(BaseModel):
-	food_id: int = Field(ge=1)
+	food_id: Optional[int] = Field(default=None, ge=1)
+	# Another recipe used as an ingredient; quantity/unit are measured against its servings
+	sub_recipe_id: Optional[int] = Field(default=None, ge=1)
 	quantity: float = Field(gt=0)
 	unit: str = Field(pattern=r"^(serving|g|ml|piece)$", default="serving")
 
+	@model_validator(mode="after")
+	def _one_source(self) -> RecipeItemIn:
+		if (self.food_id is None) == (self.sub_recipe_id is None):
+			raise ValueError("Exactly one of food_id or sub_recipe_id is required")
+		return self
+
 
 class RecipeBase(BaseModel):
 	model_config = ConfigDict(from_attributes=True)
@@ -35,7 +45,8 @@ class RecipeUpdate(BaseModel):
 
 class RecipeItemOut(BaseModel):
 	id: int
-	food_id: int
+	food_id: Optional[int] = None
+	sub_recipe_id: Optional[int] = None
 	quantity: float
 	unit: str
 
@@ -56,3 +67,18 @@ class RecipeOut(RecipeBase):
 	# Derived per serving (server-side convenience)
 	per_serving: Dict[str, float] = Field(default_factory=dict)
 	items: List[RecipeItemOut] = Field(default_factory=list)
+
+
+class RecipeWithFoodsOut(RecipeOut):
+	# Foods used directly by the items, in first-use order; null unless requested
+	foods: Optional[List[FoodOut]] = None
+
+
+class RecipeBatchIn(BaseModel):
+	ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+	include_foods: bool = False
+
+
+class RecipeBatchOut(BaseModel):
+	items: List[RecipeWithFoodsOut] = Field(default_factory=list)  # found recipes, in request order
+	missing_ids: List[int] = Field(default_factory=list)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class RecomputeJobOut(BaseModel):
+	model_config = ConfigDict(from_attributes=True)
+
+	id: int
+	food_id: Optional[int] = None
+	recipe_id: Optional[int] = None  # a changed sub-recipe
+	status: str  # queued|running|done|failed
+	total: Optional[int] = None  # dependent recipes, known once the food or recipe is resolved
+	done: int = 0
+	error: Optional[str] = None
+	created_at: datetime
+	finished_at: Optional[datetime] = None
+
+
+class RecomputeStatusOut(BaseModel):
+	pending_foods: int
+	pending_components: int
+	pending_recipes: int
+	recomputed_total: int
+	active_jobs: List[RecomputeJobOut]
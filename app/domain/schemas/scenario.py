@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.domain.schemas.meal_log import IntakeTotals
+
+MAX_SCENARIOS = 1000
+MAX_SCENARIO_ITEMS = 200
+
+
+class ScenarioItemIn(BaseModel):
+	food_id: int = Field(ge=1)
+	quantity: float = Field(gt=0)
+	unit: str = Field(pattern=r"^(serving|g|ml|piece)$", default="serving")
+
+
+class ScenarioIn(BaseModel):
+	"""An ad-hoc ingredient list, evaluated like a recipe but never stored."""
+
+	# Echoed back, for the caller's bookkeeping
+	label: Optional[str] = Field(default=None, max_length=160)
+	servings: float = Field(gt=0, default=1.0)
+	items: List[ScenarioItemIn] = Field(default_factory=list, max_length=MAX_SCENARIO_ITEMS)
+
+
+class ScenarioBatchIn(BaseModel):
+	scenarios: List[ScenarioIn] = Field(min_length=1, max_length=MAX_SCENARIOS)
+
+
+class ScenarioOut(IntakeTotals):
+	label: Optional[str] = None
+	servings: float
+	per_serving: Dict[str, float] = Field(default_factory=dict)
+	# Items whose food does not exist contribute nothing and are listed here
+	missing_food_ids: List[int] = Field(default_factory=list)
+
+
+class ScenarioBatchOut(BaseModel):
+	scenarios: List[ScenarioOut]
@@ -1,2 +1,13 @@
+from app.domain.services.async_services import (  # noqa: F401
+	AsyncFoodService,
+	AsyncMealLogService,
+	AsyncRecipeService,
+)
+from app.domain.services.change_feed import ChangeFeed, change_feed  # noqa: F401
+from app.domain.services.food_filter_index import FoodFilterIndex, food_filter_index  # noqa: F401
+from app.domain.services.food_import import FoodImporter  # noqa: F401
 from app.domain.services.food_service import FoodService  # noqa: F401
+from app.domain.services.meal_log_service import MealLogService  # noqa: F401
+from app.domain.services.recipe_reads import RecipeRead, RecipeReads, recipe_reads  # noqa: F401
 from app.domain.services.recipe_service import RecipeService  # noqa: F401
+from app.domain.services.recompute_queue import RecomputeQueue, recompute_queue  # noqa: F401
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.filters import NutrientRange
+from app.core.pagination import Cursor, SortKey
+from app.domain.repositories import FoodRepository, MealLogRepository, RecipeRepository
+from app.domain.schemas import (
+	DailyIntakeOut,
+	FoodBatchOut,
+	FoodCreate,
+	FoodOut,
+	FoodSearchHit,
+	FoodUpdate,
+	IntakeSummaryOut,
+	MealLogEntryIn,
+	MealLogEntryOut,
+	RecipeBatchOut,
+	RecipeCreate,
+	RecipeItemIn,
+	RecipeOut,
+	RecipeUpdate,
+	ScenarioIn,
+	ScenarioOut,
+)
+from app.domain.services.food_service import FoodService
+from app.domain.services.meal_log_service import MealLogService
+from app.domain.services.recipe_service import RecipeService
+
+T = TypeVar("T")
+
+
+def _food_service(session: Session) -> FoodService:
+	return FoodService(FoodRepository(session))
+
+
+def _recipe_service(session: Session) -> RecipeService:
+	return RecipeService(RecipeRepository(session), FoodRepository(session))
+
+
+def _meal_log_service(session: Session) -> MealLogService:
+	return MealLogService(
+		MealLogRepository(session),
+		RecipeRepository(session),
+		FoodRepository(session),
+	)
+
+
+class AsyncFoodService:
+	"""
+	FoodService over an AsyncSession.
+	Each call runs the synchronous service inside AsyncSession.run_sync: repository code is
+	shared with the sync path, while every DB round trip is awaited through aiosqlite.
+	"""
+
+	def __init__(self, session: AsyncSession) -> None:
+		self._session = session
+
+	async def _run(self, call: Callable[[FoodService], T]) -> T:
+		return await self._session.run_sync(lambda session: call(_food_service(session)))
+
+	async def create_food(self, *, data: FoodCreate) -> FoodOut:
+		return await self._run(lambda s: s.create_food(data=data))
+
+	async def get_food(self, *, food_id: int) -> FoodOut | None:
+		return await self._run(lambda s: s.get_food(food_id=food_id))
+
+	async def get_foods(self, *, food_ids: Sequence[int]) -> FoodBatchOut:
+		return await self._run(lambda s: s.get_foods(food_ids=food_ids))
+
+	async def food_etag(self, *, food_id: int) -> Optional[str]:
+		return await self._run(lambda s: s.food_etag(food_id=food_id))
+
+	async def list_foods(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+		ranges: Sequence[NutrientRange] = (),
+	) -> List[FoodOut]:
+		return await self._run(
+			lambda s: list(
+				s.list_foods(
+					limit=limit,
+					offset=offset,
+					sort=sort,
+					after=after,
+					ranges=ranges,
+				)
+			)
+		)
+
+	async def list_food_payloads(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+		ranges: Sequence[NutrientRange] = (),
+	) -> List[Dict[str, Any]]:
+		return await self._run(
+			lambda s: s.list_food_payloads(
+				limit=limit,
+				offset=offset,
+				sort=sort,
+				after=after,
+				ranges=ranges,
+			)
+		)
+
+	async def search_foods(
+		self,
+		*,
+		query: str,
+		limit: int = 20,
+		fuzzy: bool = True,
+	) -> List[FoodSearchHit]:
+		return await self._run(lambda s: s.search_foods(query=query, limit=limit, fuzzy=fuzzy))
+
+	async def update_food(self, *, food_id: int, data: FoodUpdate) -> FoodOut | None:
+		return await self._run(lambda s: s.update_food(food_id=food_id, data=data))
+
+	async def delete_food(self, *, food_id: int) -> bool:
+		return await self._run(lambda s: s.delete_food(food_id=food_id))
+
+
+class AsyncRecipeService:
+	"""RecipeService over an AsyncSession; see AsyncFoodService."""
+
+	def __init__(self, session: AsyncSession) -> None:
+		self._session = session
+
+	async def _run(self, call: Callable[[RecipeService], T]) -> T:
+		return await self._session.run_sync(lambda session: call(_recipe_service(session)))
+
+	async def create_recipe(self, data: RecipeCreate) -> RecipeOut:
+		return await self._run(lambda s: s.create_recipe(data))
+
+	async def get_recipe(self, recipe_id: int) -> Optional[RecipeOut]:
+		return await self._run(lambda s: s.get_recipe(recipe_id))
+
+	async def get_recipes(
+		self,
+		recipe_ids: Sequence[int],
+		*,
+		include_foods: bool = False,
+	) -> RecipeBatchOut:
+		return await self._run(lambda s: s.get_recipes(recipe_ids, include_foods=include_foods))
+
+	async def recipe_etag(self, recipe_id: int) -> Optional[str]:
+		return await self._run(lambda s: s.recipe_etag(recipe_id))
+
+	async def list_recipes(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+	) -> List[RecipeOut]:
+		return await self._run(
+			lambda s: list(s.list_recipes(limit=limit, offset=offset, sort=sort, after=after))
+		)
+
+	async def list_recipe_payloads(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+	) -> List[Dict[str, Any]]:
+		return await self._run(
+			lambda s: s.list_recipe_payloads(limit=limit, offset=offset, sort=sort, after=after)
+		)
+
+	async def evaluate(self, scenarios: Sequence[ScenarioIn]) -> List[ScenarioOut]:
+		return await self._run(lambda s: s.evaluate(scenarios))
+
+	async def update_recipe(self, recipe_id: int, data: RecipeUpdate) -> Optional[RecipeOut]:
+		return await self._run(lambda s: s.update_recipe(recipe_id, data))
+
+	async def delete_recipe(self, recipe_id: int) -> bool:
+		return await self._run(lambda s: s.delete_recipe(recipe_id))
+
+	async def add_item(self, recipe_id: int, item: RecipeItemIn) -> Optional[RecipeOut]:
+		return await self._run(lambda s: s.add_item(recipe_id, item))
+
+	async def replace_items(
+		self,
+		recipe_id: int,
+		items: Sequence[RecipeItemIn],
+	) -> Optional[RecipeOut]:
+		return await self._run(lambda s: s.replace_items(recipe_id, items))
+
+	async def update_item_quantity(
+		self,
+		recipe_id: int,
+		item_id: int,
+		quantity: float,
+	) -> Optional[RecipeOut]:
+		return await self._run(lambda s: s.update_item_quantity(recipe_id, item_id, quantity))
+
+	async def remove_item(self, recipe_id: int, item_id: int) -> bool:
+		return await self._run(lambda s: s.remove_item(recipe_id, item_id))
+
+
+class AsyncMealLogService:
+	"""MealLogService over an AsyncSession; see AsyncFoodService."""
+
+	def __init__(self, session: AsyncSession) -> None:
+		self._session = session
+
+	async def _run(self, call: Callable[[MealLogService], T]) -> T:
+		return await self._session.run_sync(lambda session: call(_meal_log_service(session)))
+
+	async def log_entry(self, data: MealLogEntryIn) -> MealLogEntryOut:
+		return await self._run(lambda s: s.log_entry(data))
+
+	async def get_entry(self, entry_id: int) -> Optional[MealLogEntryOut]:
+		return await self._run(lambda s: s.get_entry(entry_id))
+
+	async def list_entries(
+		self,
+		*,
+		start: date,
+		end: date,
+		limit: int = 100,
+		offset: int = 0,
+	) -> List[MealLogEntryOut]:
+		return await self._run(
+			lambda s: s.list_entries(start=start, end=end, limit=limit, offset=offset)
+		)
+
+	async def delete_entry(self, entry_id: int) -> bool:
+		return await self._run(lambda s: s.delete_entry(entry_id))
+
+	async def daily_intake(self, *, start: date, end: date) -> List[DailyIntakeOut]:
+		return await self._run(lambda s: s.daily_intake(start=start, end=end))
+
+	async def summary(self, *, start: date, end: date) -> IntakeSummaryOut:
+		return await self._run(lambda s: s.summary(start=start, end=end))
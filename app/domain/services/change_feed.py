@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Optional, cast
+
+from sqlalchemy import Engine
+
+from app.core.config import settings
+from app.core.database import get_read_session, get_session, probe_engine as default_probe_engine
+from app.core.events import PROCESS_ORIGIN, Action, Change, ChangeBus, Entity, changes
+from app.domain.repositories import ChangeLogRepository
+from app.domain.services.recompute_queue import SessionScope
+
+logger = logging.getLogger(__name__)
+
+ResetHook = Callable[[], None]
+
+
+class ChangeFeed:
+	"""
+	Replays changes committed by other worker processes onto the local change bus.
+	- Every commit with domain changes also appends them to the change_log table.
+	- A background thread polls PRAGMA data_version, which moves only when another
+		connection commits, and reads new log rows only then.
+	- Rows written by this process are skipped (already published locally); the rest are
+		published with remote=True, so caches invalidate but background work is not repeated.
+	- If the log was pruned past this worker's position, reset hooks drop whole caches.
+	"""
+
+	def __init__(
+		self,
+		bus: ChangeBus = changes,
+		*,
+		probe_engine: Engine = default_probe_engine,
+		read_scope: SessionScope = get_read_session,
+		write_scope: SessionScope = get_session,
+		origin: str = PROCESS_ORIGIN,
+		poll_interval: float = settings.change_feed.poll_interval_seconds,
+		batch_size: int = settings.change_feed.batch_size,
+		retain_rows: int = settings.change_feed.retain_rows,
+		prune_interval: float = settings.change_feed.prune_interval_seconds,
+	) -> None:
+		self._bus = bus
+		self._probe_engine = probe_engine
+		self._read_scope = read_scope
+		self._write_scope = write_scope
+		self._origin = origin
+		self._poll_interval = poll_interval
+		self._batch_size = batch_size
+		self._retain_rows = retain_rows
+		self._prune_interval = prune_interval
+		self._reset_hooks: List[ResetHook] = []
+		self._last_id: Optional[int] = None
+		self._data_version: Optional[int] = None
+		self._probe: Any = None
+		self._next_prune = 0.0
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	@property
+	def last_id(self) -> Optional[int]:
+		return self._last_id
+
+	def add_reset_hook(self, hook: ResetHook) -> None:
+		if hook not in self._reset_hooks:
+			self._reset_hooks.append(hook)
+
+	def start(self) -> None:
+		"""Follow the log from its current end on a background thread."""
+		if self._thread is not None and self._thread.is_alive():
+			return
+		with self._read_scope() as session:
+			self._last_id = ChangeLogRepository(session).latest_id()
+		self._next_prune = time.monotonic() + self._prune_interval
+		self._stop.clear()
+		self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+		self._thread.start()
+
+	def stop(self, timeout: Optional[float] = 5.0) -> None:
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join(timeout)
+		self._thread = None
+		if self._probe is not None:
+			self._probe.close()
+			self._probe = None
+
+	def poll_once(self) -> int:
+		"""Publish remote changes committed since the last poll; returns how many."""
+		version = self._read_data_version()
+		if version == self._data_version:
+			return 0
+		published = self._replay()
+		self._data_version = version
+		return published
+
+	def prune(self) -> int:
+		with self._write_scope() as session:
+			return ChangeLogRepository(session).prune(keep=self._retain_rows)
+
+	def _replay(self) -> int:
+		published = 0
+		with self._read_scope() as session:
+			log = ChangeLogRepository(session)
+			if self._last_id is None:
+				self._last_id = log.latest_id()
+				return 0
+			oldest = log.oldest_id()
+			if oldest is not None and oldest > self._last_id + 1:
+				logger.warning(
+					"Change log pruned past position %d; resetting caches",
+					self._last_id,
+				)
+				self._reset()
+				self._last_id = oldest - 1
+			while True:
+				rows = log.entries_after(after_id=self._last_id, limit=self._batch_size)
+				for row in rows:
+					if row.origin != self._origin:
+						self._bus.publish(
+							Change(
+								cast(Entity, row.entity),
+								row.entity_id,
+								cast(Action, row.action),
+								remote=True,
+							)
+						)
+						published += 1
+				if rows:
+					self._last_id = rows[-1].id
+				if len(rows) < self._batch_size:
+					return published
+
+	def _read_data_version(self) -> int:
+		# Checked on one long-lived connection, opened outside the reader pool: the value moves
+		# when any other connection commits
+		if self._probe is None:
+			self._probe = self._probe_engine.raw_connection()
+		cursor = self._probe.cursor()
+		try:
+			cursor.execute("PRAGMA data_version")
+			return int(cursor.fetchone()[0])
+		finally:
+			cursor.close()
+
+	def _reset(self) -> None:
+		for hook in list(self._reset_hooks):
+			try:
+				hook()
+			except Exception:
+				logger.exception("Change feed reset hook %r failed", hook)
+
+	def _run(self) -> None:
+		while not self._stop.wait(self._poll_interval):
+			try:
+				self.poll_once()
+				if time.monotonic() >= self._next_prune:
+					self._next_prune = time.monotonic() + self._prune_interval
+					self.prune()
+			except Exception:
+				logger.exception("Change feed poll failed")
+
+
+change_feed = ChangeFeed()
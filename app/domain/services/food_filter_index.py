@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from importlib.util import find_spec
+import logging
+import threading
+from typing import TYPE_CHECKING, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from app.core.config import settings
+from app.core.database import get_read_session
+from app.core.events import Change
+from app.core.filters import NutrientRange
+from app.core.pagination import Cursor, SortKey
+from app.domain.repositories import FoodCatalog, FoodRepository, food_catalog
+from app.domain.services.recompute_queue import SessionScope
+
+if TYPE_CHECKING:
+	from app.domain.services.nutrient_engine import NutrientIndex
+
+logger = logging.getLogger(__name__)
+
+
+class FoodFilterIndex:
+	"""
+	Process-wide NutrientIndex over the food catalog, serving nutrient range filters.
+	- The snapshot is built on a background thread on first use; until it is ready callers
+		fall back to SQL. With a mapped food catalog it is built from the shared arrays
+		instead of a catalog scan.
+	- Foods changed since the snapshot are tracked as dirty ids: lookups skip them and the
+		caller re-checks them in SQL. Past max_dirty the snapshot is rebuilt.
+	"""
+
+	def __init__(
+		self,
+		read_scope: SessionScope = get_read_session,
+		*,
+		enabled: bool = settings.filter_index.enabled,
+		max_dirty: int = settings.filter_index.max_dirty,
+		catalog: FoodCatalog = food_catalog,
+	) -> None:
+		self._read_scope = read_scope
+		self._catalog = catalog
+		self._enabled = enabled and find_spec("numpy") is not None
+		self._max_dirty = max_dirty
+		self._lock = threading.Lock()
+		self._index: Optional[NutrientIndex] = None
+		self._dirty: Set[int] = set()
+		# Changes seen while a build is reading the catalog; they become the new dirty set
+		self._building: Optional[Set[int]] = None
+		self._thread: Optional[threading.Thread] = None
+
+	@property
+	def ready(self) -> bool:
+		return self._index is not None
+
+	def handle_change(self, change: Change) -> None:
+		if change.entity != "food":
+			return
+		with self._lock:
+			self._dirty.add(change.entity_id)
+			if self._building is not None:
+				self._building.add(change.entity_id)
+			if self._index is not None and len(self._dirty) > self._max_dirty:
+				self._start_build()
+
+	def lookup(
+		self,
+		ranges: Sequence[NutrientRange],
+		*,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+		limit: int = 100,
+	) -> Optional[Tuple[List[int], FrozenSet[int]]]:
+		"""
+		(page ids from the snapshot, dirty ids to re-check in SQL), or None when the
+		snapshot cannot answer and the caller should run the whole query in SQL.
+		"""
+		if not self._enabled:
+			return None
+		with self._lock:
+			index, dirty = self._index, frozenset(self._dirty)
+			if index is None:
+				self._start_build()
+				return None
+		if sort == "name" and after is not None and after.last_id in dirty:
+			return None  # the cursor row may have been renamed since the snapshot
+		ids = index.page(ranges, sort=sort, after=after, limit=limit, exclude=dirty)
+		return None if ids is None else (ids, dirty)
+
+	def rebuild(self) -> None:
+		"""Build a fresh snapshot in the calling thread and swap it in."""
+		from app.domain.services.nutrient_engine import NutrientIndex
+
+		with self._lock:
+			self._building = set()
+		stale: FrozenSet[int] = frozenset()
+		try:
+			view = self._catalog.view()
+			# A catalog staler than this index tolerates would only trigger another rebuild
+			if view is None or len(view[1]) > self._max_dirty:
+				with self._read_scope() as session:
+					index = NutrientIndex(FoodRepository(session).iter_rows())
+			else:
+				catalog, stale = view
+				index = NutrientIndex.from_catalog(catalog)
+		except BaseException:
+			with self._lock:
+				self._building = None
+			raise
+		with self._lock:
+			self._index = index
+			self._dirty = set(stale) | (self._building or set())
+			self._building = None
+
+	def invalidate(self) -> None:
+		"""Drop the snapshot; the next lookup starts a rebuild."""
+		with self._lock:
+			self._index = None
+			self._dirty = set()
+
+	def wait_ready(self, timeout: Optional[float] = None) -> bool:
+		thread = self._thread
+		if thread is not None:
+			thread.join(timeout)
+		return self.ready
+
+	def stop(self, timeout: Optional[float] = 5.0) -> None:
+		thread = self._thread
+		if thread is not None:
+			thread.join(timeout)
+		self._thread = None
+
+	def _start_build(self) -> None:
+		# Caller holds the lock
+		if self._building is not None or (self._thread is not None and self._thread.is_alive()):
+			return
+		self._thread = threading.Thread(target=self._build, name="food-filter-index", daemon=True)
+		self._thread.start()
+
+	def _build(self) -> None:
+		try:
+			self.rebuild()
+		except Exception:
+			logger.exception("Food filter index build failed")
+
+
+food_filter_index = FoodFilterIndex()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import csv
+import json
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from app.domain.repositories import FoodRepository
+from app.domain.schemas import FoodCreate, FoodImportError, FoodImportResult
+
+ImportFormat = Literal["ndjson", "csv"]
+ConflictPolicy = Literal["skip", "update"]
+
+_FOOD_FIELDS = frozenset(FoodCreate.model_fields)
+
+
+class FoodImporter:
+	"""
+	Chunked bulk loader for FoodCreate rows.
+	- Feed it (line number, raw line) chunks; each chunk is validated, then written with a
+		single INSERT ... ON CONFLICT(name) executemany.
+	- CSV input needs a header line; columns that are not Food fields become
+		additional_nutrients. Quoted values spanning several lines are not supported.
+	- Invalid rows are reported by line number and never abort the import.
+	"""
+
+	def __init__(
+		self,
+		repository: FoodRepository,
+		*,
+		format: ImportFormat = "ndjson",
+		on_conflict: ConflictPolicy = "skip",
+		max_errors: int = 1000,
+	) -> None:
+		self._repository = repository
+		self._format = format
+		self._on_conflict = on_conflict
+		self._max_errors = max_errors
+		self._header: Optional[List[str]] = None
+		self.result = FoodImportResult()
+
+	def feed(self, lines: Sequence[Tuple[int, str]]) -> None:
+		rows: Dict[str, Dict[str, Any]] = {}
+		for line_no, raw in lines:
+			if not raw.strip():
+				continue
+			try:
+				record = self._parse(raw)
+				if record is None:
+					continue
+				food = FoodCreate.model_validate(record)
+			except (ValueError, ValidationError) as exc:
+				self._fail(line_no, exc)
+				continue
+			if food.name in rows and self._on_conflict == "skip":
+				self.result.skipped += 1
+				continue
+			# Last row wins for a name repeated within the chunk
+			rows[food.name] = food.model_dump()
+		self._write(list(rows.values()))
+
+	def _write(self, rows: List[Dict[str, Any]]) -> None:
+		if not rows:
+			return
+		update = self._on_conflict == "update"
+		existing = self._repository.ids_by_name([r["name"] for r in rows]) if update else {}
+		written = self._repository.bulk_upsert(rows, update=update)
+		for name, food_id in written.items():
+			if name in existing:
+				self.result.updated += 1
+				self._repository.record_change(food_id=food_id, action="updated")
+			else:
+				self.result.inserted += 1
+				self._repository.record_change(food_id=food_id, action="created")
+		self.result.skipped += len(rows) - len(written)
+
+	def _parse(self, raw: str) -> Optional[Dict[str, Any]]:
+		if self._format == "ndjson":
+			record = json.loads(raw)
+			if not isinstance(record, dict):
+				raise ValueError("Expected a JSON object")
+			return record
+		values = next(csv.reader([raw]))
+		if self._header is None:
+			self._header = [h.strip() for h in values]
+			return None
+		if len(values) != len(self._header):
+			raise ValueError(f"Expected {len(self._header)} columns, got {len(values)}")
+		record: Dict[str, Any] = {}
+		additional: Dict[str, float] = {}
+		for column, value in zip(self._header, values, strict=True):
+			value = value.strip()
+			if not value:
+				continue
+			if column == "additional_nutrients":
+				parsed = json.loads(value)
+				if not isinstance(parsed, dict):
+					raise ValueError("Expected a JSON object in additional_nutrients")
+				additional.update(parsed)
+			elif column in _FOOD_FIELDS:
+				record[column] = value
+			else:
+				additional[column] = float(value)
+		if additional:
+			record["additional_nutrients"] = additional
+		return record
+
+	def _fail(self, line_no: int, exc: Exception) -> None:
+		self.result.failed += 1
+		if len(self.result.errors) >= self._max_errors:
+			return
+		if isinstance(exc, ValidationError):
+			message = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+		else:
+			message = str(exc)
+		self.result.errors.append(FoodImportError(line=line_no, message=message))
@@ -1,15 +1,43 @@
 from __future__ import annotations
 
-from typing import Iterable
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+from sqlalchemy import Row
+
+from app.core.etags import make_etag
+from app.core.filters import NutrientRange
+from app.core.pagination import Cursor, SortKey
 from app.domain.models import Food
 from app.domain.repositories import FoodRepository
-from app.domain.schemas import FoodCreate, FoodOut, FoodUpdate
+from app.domain.schemas import FoodBatchOut, FoodCreate, FoodOut, FoodSearchHit, FoodUpdate
+from app.domain.services.food_filter_index import FoodFilterIndex, food_filter_index
+
+_WORD_RE = re.compile(r"\w+")
+# Fuzzy search: trigram candidates fetched per requested hit, and share of query trigrams to keep
+_FUZZY_CANDIDATES = 10
+_FUZZY_MIN_OVERLAP = 0.5
+# Columns copied into list payloads, in FoodOut field order
+_OUT_FIELDS = tuple(FoodOut.model_fields)
+
+
+def _payload(row: Row[Any]) -> Dict[str, Any]:
+	values = row._mapping
+	return {name: values[name] for name in _OUT_FIELDS}
+
+
+def _trigrams(words: Sequence[str]) -> Set[str]:
+	return {w[i : i + 3] for w in words for i in range(len(w) - 2)}
 
 
 class FoodService:
-	def __init__(self, repository: FoodRepository) -> None:
+	def __init__(
+		self,
+		repository: FoodRepository,
+		filter_index: FoodFilterIndex = food_filter_index,
+	) -> None:
 		self._repository = repository
+		self._filter_index = filter_index
 
 	def create_food(self, *, data: FoodCreate) -> FoodOut:
 		existing = self._repository.get_by_name(name=data.name)
@@ -33,23 +61,190 @@ class FoodService:
 			grams_per_ml=data.grams_per_ml,
 		)
 		food = self._repository.create(obj_in=food)
+		self._repository.record_change(food_id=food.id, action="created")
 		return FoodOut.model_validate(food)
 
 	def get_food(self, *, food_id: int) -> FoodOut | None:
-		food = self._repository.get_by_id(food_id=food_id)
+		food = self._repository.get_snapshot(food_id=food_id)
 		return None if food is None else FoodOut.model_validate(food)
 
-	def list_foods(self, *, limit: int = 100, offset: int = 0) -> Iterable[FoodOut]:
-		rows = self._repository.list_all(limit=limit, offset=offset)
+	def get_foods(self, *, food_ids: Sequence[int]) -> FoodBatchOut:
+		"""Many foods by id through the shared cache (at most one IN query), in request order."""
+		ids = list(dict.fromkeys(food_ids))
+		found = self._repository.get_snapshots(ids)
+		return FoodBatchOut(
+			items=[FoodOut.model_validate(found[i]) for i in ids if i in found],
+			missing_ids=[i for i in ids if i not in found],
+		)
+
+	def food_etag(self, *, food_id: int) -> Optional[str]:
+		food = self._repository.get_snapshot(food_id=food_id)
+		return None if food is None else make_etag("f", food.id, food.version)
+
+	def list_foods(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+		ranges: Sequence[NutrientRange] = (),
+	) -> Iterable[FoodOut]:
+		if ranges and not offset:
+			page = self._filtered_page(
+				ranges=ranges,
+				sort=sort,
+				after=after,
+				limit=limit,
+				rows=False,
+			)
+			if page is not None:
+				return [FoodOut.model_validate(food) for food in page]
+		rows = self._repository.list_all(
+			limit=limit,
+			offset=offset,
+			sort=sort,
+			after=after,
+			ranges=ranges,
+		)
 		return (FoodOut.model_validate(row) for row in rows)
 
+	def list_food_payloads(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+		ranges: Sequence[NutrientRange] = (),
+	) -> List[Dict[str, Any]]:
+		"""
+		list_foods as FoodOut-shaped dicts for the JSON fast path: plain rows, no Food objects,
+		and no validation of values the columns already constrain.
+		"""
+		if ranges and not offset:
+			page = self._filtered_page(
+				ranges=ranges,
+				sort=sort,
+				after=after,
+				limit=limit,
+				rows=True,
+			)
+			if page is not None:
+				return [_payload(row) for row in page]
+		rows = self._repository.list_rows(
+			limit=limit,
+			offset=offset,
+			sort=sort,
+			after=after,
+			ranges=ranges,
+		)
+		return [_payload(row) for row in rows]
+
+	def _filtered_page(
+		self,
+		*,
+		ranges: Sequence[NutrientRange],
+		sort: SortKey,
+		after: Optional[Cursor],
+		limit: int,
+		rows: bool,
+	) -> Optional[List[Any]]:
+		# Snapshot page, merged with foods changed since the snapshot (re-checked in SQL)
+		found = self._filter_index.lookup(ranges, sort=sort, after=after, limit=limit)
+		if found is None:
+			return None
+		ids, dirty = found
+		if rows:
+			foods: List[Any] = self._repository.rows_by_ids(ids)
+			if dirty:
+				foods.extend(
+					self._repository.list_rows(
+						limit=limit,
+						sort=sort,
+						after=after,
+						ranges=ranges,
+						ids=dirty,
+					)
+				)
+		else:
+			foods = self._repository.list_by_ids(ids)
+			if dirty:
+				foods.extend(
+					self._repository.list_all(
+						limit=limit,
+						sort=sort,
+						after=after,
+						ranges=ranges,
+						ids=dirty,
+					)
+				)
+		foods.sort(key=(lambda f: f.name) if sort == "name" else (lambda f: f.id))
+		return foods[:limit]
+
+	def export_foods(self, *, batch_size: int = 1000) -> Iterator[FoodOut]:
+		# Rows are streamed from the cursor and never enter the identity map
+		rows = self._repository.iter_rows(batch_size=batch_size)
+		return (FoodOut.model_validate(row) for row in rows)
+
+	def search_foods(
+		self,
+		*,
+		query: str,
+		limit: int = 20,
+		fuzzy: bool = True,
+	) -> List[FoodSearchHit]:
+		"""
+		Ranked name search.
+		- Every query word must prefix-match a word of the name (FTS5, bm25 order).
+		- If that leaves room and fuzzy is set, names sharing enough trigrams with the
+			query fill the rest, which tolerates typos ("chiken" -> "Chicken Breast").
+		"""
+		words = _WORD_RE.findall(query.lower())
+		if not words:
+			return []
+		match = " ".join(f'"{w}"*' for w in words)
+		hits = [
+			FoodSearchHit(food=FoodOut.model_validate(food), score=round(-rank, 4), match="token")
+			for food, rank in self._repository.search_tokens(match=match, limit=limit)
+		]
+		grams = _trigrams(words)
+		if not fuzzy or len(hits) >= limit or not grams:
+			return hits
+
+		seen = {hit.food.id for hit in hits}
+		scored: List[Tuple[float, Food]] = []
+		candidates = self._repository.search_trigrams(
+			match=" OR ".join(f'"{g}"' for g in sorted(grams)), limit=limit * _FUZZY_CANDIDATES
+		)
+		for food in candidates:
+			if food.id in seen:
+				continue
+			overlap = len(grams & _trigrams(_WORD_RE.findall(food.name.lower()))) / len(grams)
+			if overlap >= _FUZZY_MIN_OVERLAP:
+				scored.append((overlap, food))
+		scored.sort(key=lambda pair: (-pair[0], len(pair[1].name)))
+		hits.extend(
+			FoodSearchHit(food=FoodOut.model_validate(food), score=round(overlap, 4), match="fuzzy")
+			for overlap, food in scored[: limit - len(hits)]
+		)
+		return hits
+
 	def update_food(self, *, food_id: int, data: FoodUpdate) -> FoodOut | None:
 		food = self._repository.get_by_id(food_id=food_id)
 		if food is None:
 			return None
 		for field_name, value in data.model_dump(exclude_unset=True).items():
 			setattr(food, field_name, value)
+		# Evicted now and again once this commits (change bus), so no reader keeps the old row
+		self._repository.evict_cached(food_id=food.id)
+		# Dependent recipe totals are refreshed in the background once this commits
+		self._repository.record_change(food_id=food.id, action="updated")
 		return FoodOut.model_validate(food)
 
 	def delete_food(self, *, food_id: int) -> bool:
-		return self._repository.delete(food_id=food_id)
+		deleted = self._repository.delete(food_id=food_id)
+		if deleted:
+			self._repository.evict_cached(food_id=food_id)
+			self._repository.record_change(food_id=food_id, action="deleted")
+		return deleted
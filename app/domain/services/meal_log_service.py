@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.core.units import to_serving_multiplier
+from app.domain.models import NUTRIENT_COLUMNS, DailyIntake, MealLogEntry
+from app.domain.repositories import (
+	FoodRepository,
+	FoodSnapshot,
+	MealLogRepository,
+	RecipeRepository,
+)
+from app.domain.schemas import DailyIntakeOut, IntakeSummaryOut, MealLogEntryIn, MealLogEntryOut
+
+
+class MealLogService:
+	"""
+	Meal log with incrementally maintained daily rollups.
+	Every entry write adjusts its day's totals and the running totals from that day on, so range
+	summaries ("sodium over the last 90 days") read two rollup rows instead of every entry.
+	"""
+
+	def __init__(
+		self, meal_repo: MealLogRepository, recipe_repo: RecipeRepository, food_repo: FoodRepository
+	) -> None:
+		self._meals = meal_repo
+		self._recipes = recipe_repo
+		self._foods = food_repo
+
+	def log_entry(self, data: MealLogEntryIn) -> MealLogEntryOut:
+		if data.recipe_id is not None:
+			# Stored recipe totals, measured against the recipe's yield like a sub-recipe
+			source = self._recipes.component_snapshots([data.recipe_id]).get(data.recipe_id)
+			if source is None:
+				raise ValueError("Recipe not found")
+		else:
+			source = self._foods.get_snapshot(food_id=data.food_id)  # type: ignore[arg-type]
+			if source is None:
+				raise ValueError("Food not found")
+		values = _contribution(source, quantity=data.quantity, unit=data.unit)
+		entry = self._meals.add_entry(
+			MealLogEntry(
+				day=data.day,
+				food_id=data.food_id,
+				recipe_id=data.recipe_id,
+				name=source.name,
+				quantity=data.quantity,
+				unit=data.unit,
+				**values,
+			)
+		)
+		self._meals.apply_to_day(day=entry.day, delta=values, entries=1)
+		return MealLogEntryOut.model_validate(entry)
+
+	def get_entry(self, entry_id: int) -> Optional[MealLogEntryOut]:
+		entry = self._meals.get_entry(entry_id=entry_id)
+		return None if entry is None else MealLogEntryOut.model_validate(entry)
+
+	def list_entries(
+		self,
+		*,
+		start: date,
+		end: date,
+		limit: int = 100,
+		offset: int = 0,
+	) -> List[MealLogEntryOut]:
+		entries = self._meals.list_entries(start=start, end=end, limit=limit, offset=offset)
+		return [MealLogEntryOut.model_validate(e) for e in entries]
+
+	def delete_entry(self, entry_id: int) -> bool:
+		entry = self._meals.get_entry(entry_id=entry_id)
+		if entry is None:
+			return False
+		delta: Dict[str, Any] = {name: -getattr(entry, name) for name in NUTRIENT_COLUMNS}
+		extra = entry.additional_nutrients or {}
+		delta["additional_nutrients"] = {k: -v for k, v in extra.items()}
+		self._meals.apply_to_day(day=entry.day, delta=delta, entries=-1)
+		self._meals.delete_entry(entry)
+		return True
+
+	def daily_intake(self, *, start: date, end: date) -> List[DailyIntakeOut]:
+		"""Rollups of the logged days in the range (days without entries are omitted)."""
+		rows = self._meals.daily_rows(start=start, end=end)
+		return [DailyIntakeOut.model_validate(row) for row in rows]
+
+	def summary(self, *, start: date, end: date) -> IntakeSummaryOut:
+		"""Range totals and per-day averages from two running-total rows, whatever the range."""
+		upper = self._meals.running_totals(on_or_before=end)
+		lower = self._meals.running_totals(on_or_before=start - timedelta(days=1))
+		days = (end - start).days + 1
+		totals = {
+			name: round(_running(upper, name) - _running(lower, name), 2)
+			for name in NUTRIENT_COLUMNS
+		}
+		upper_extra, lower_extra = _running_extra(upper), _running_extra(lower)
+		for key in sorted(upper_extra.keys() | lower_extra.keys()):
+			value = round(upper_extra.get(key, 0.0) - lower_extra.get(key, 0.0), 2)
+			if value:
+				totals[key] = value
+		return IntakeSummaryOut(
+			start=start,
+			end=end,
+			days=days,
+			entries=int(_running(upper, "entries") - _running(lower, "entries")),
+			totals=totals,
+			daily_average={name: round(value / days, 2) for name, value in totals.items()},
+		)
+
+
+def _running(row: Optional[DailyIntake], name: str) -> float:
+	return 0 if row is None else getattr(row, f"cum_{name}")
+
+
+def _running_extra(row: Optional[DailyIntake]) -> Dict[str, float]:
+	return {} if row is None else row.cum_additional_nutrients
+
+
+def _contribution(source: FoodSnapshot, *, quantity: float, unit: str) -> Dict[str, Any]:
+	mult = to_serving_multiplier(
+		quantity=quantity,
+		unit=unit,  # type: ignore[arg-type]
+		food_serving_size=source.serving_size,
+		food_serving_unit=source.serving_unit,  # type: ignore[arg-type]
+		grams_per_ml=source.grams_per_ml,
+	)
+	# Calories are rounded per entry, as they are per recipe item
+	values: Dict[str, Any] = {"calories": int(round(source.calories * mult))}
+	for name in NUTRIENT_COLUMNS[1:]:
+		values[name] = getattr(source, name) * mult
+	values["additional_nutrients"] = {k: v * mult for k, v in source.additional_nutrients.items()}
+	return values
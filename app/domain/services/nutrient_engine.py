@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import (
+	TYPE_CHECKING,
+	Any,
+	Collection,
+	Dict,
+	Iterable,
+	List,
+	Mapping,
+	Optional,
+	Protocol,
+	Sequence,
+	Tuple,
+)
+
+import numpy as np
+import numpy.typing as npt
+
+from app.core.filters import NutrientRange
+from app.core.pagination import Cursor, SortKey
+from app.core.units import to_serving_multipliers, unit_codes
+from app.domain.models import NUTRIENT_COLUMNS
+
+if TYPE_CHECKING:
+	from app.domain.repositories import CatalogSnapshot
+
+CORE_NUTRIENTS: Tuple[str, ...] = NUTRIENT_COLUMNS
+
+
+class FoodLike(Protocol):
+	"""Anything exposing Food's nutrient and serving attributes (ORM rows, Core rows, snapshots)."""
+
+	id: int
+	name: str
+	calories: int
+	protein_g: float
+	carbs_g: float
+	fat_g: float
+	fiber_g: float
+	sugar_g: float
+	saturated_fat_g: float
+	sodium_mg: float
+	potassium_mg: float
+	cholesterol_mg: float
+	additional_nutrients: Mapping[str, float]
+	serving_size: float
+	serving_unit: str
+	grams_per_ml: Optional[float]
+
+
+@dataclass
+class RecipeTotals:
+	"""Aggregated (recipes x nutrients) result of NutrientMatrix.aggregate."""
+
+	columns: Tuple[str, ...]
+	values: npt.NDArray[np.float64]
+	# (recipes x additional columns): whether any item's food carries that additional nutrient
+	present: npt.NDArray[np.bool_]
+
+	def totals(self, index: int, overrides: Optional[Mapping[str, float]] = None) -> Dict[str, Any]:
+		"""Recipe-column values for one row, matching RecipeService._recalculate_totals."""
+		row = self.values[index]
+		out: Dict[str, Any] = {"calories": int(row[0])}
+		for j, name in enumerate(CORE_NUTRIENTS[1:], start=1):
+			out[name] = float(row[j])
+		additional: Dict[str, float] = {}
+		extra = self.columns[len(CORE_NUTRIENTS) :]
+		for j in np.flatnonzero(self.present[index]):
+			additional[extra[j]] = float(row[len(CORE_NUTRIENTS) + j])
+		for k, v in (overrides or {}).items():
+			additional[k] = additional.get(k, 0.0) + v
+		out["additional_nutrients"] = additional
+		return out
+
+
+class NutrientMatrix:
+	"""
+	Dense foods x nutrients view of the catalog for vectorized recipe aggregation.
+	- Columns are the ten core nutrients followed by interned additional_nutrients keys.
+	- Recipes are aggregated as a sparse (recipes x foods) multiplier matrix, given in COO
+		form (one entry per recipe item), times the nutrient matrix.
+	"""
+
+	def __init__(self, foods: Iterable[FoodLike]) -> None:
+		ids: list[int] = []
+		core: list[list[float]] = []
+		sizes: list[float] = []
+		units: list[str] = []
+		densities: list[float] = []
+		interned: Dict[str, int] = {}
+		extra_cells: list[Tuple[int, int, float]] = []
+		for row, food in enumerate(foods):
+			ids.append(food.id)
+			core.append([getattr(food, name) for name in CORE_NUTRIENTS])
+			sizes.append(food.serving_size)
+			units.append(food.serving_unit)
+			densities.append(np.nan if food.grams_per_ml is None else food.grams_per_ml)
+			for key, value in (food.additional_nutrients or {}).items():
+				extra_cells.append((row, interned.setdefault(key, len(interned)), value))
+
+		n_core = len(CORE_NUTRIENTS)
+		values = np.zeros((len(ids), n_core + len(interned)), dtype=np.float64)
+		has_additional = np.zeros((len(ids), len(interned)), dtype=np.bool_)
+		if ids:
+			values[:, :n_core] = core
+		for row, col, value in extra_cells:
+			values[row, n_core + col] = value
+			has_additional[row, col] = True
+		self._set(
+			columns=CORE_NUTRIENTS + tuple(interned),
+			food_ids=np.asarray(ids, dtype=np.int64),
+			values=values,
+			has_additional=has_additional,
+			serving_size=np.asarray(sizes, dtype=np.float64),
+			serving_unit=unit_codes(units),
+			grams_per_ml=np.asarray(densities, dtype=np.float64),
+		)
+
+	@classmethod
+	def from_catalog(
+		cls,
+		catalog: CatalogSnapshot,
+		*,
+		exclude: Collection[int] = (),
+		foods: Iterable[FoodLike] = (),
+	) -> NutrientMatrix:
+		"""
+		Matrix over a mapped catalog snapshot without the `exclude`d ids, plus `foods`
+		(typically current copies of the excluded ones). Built from the arrays, row loops only
+		for `foods`.
+		"""
+		fresh = cls(foods)
+		n_core = len(CORE_NUTRIENTS)
+		keep = np.ones(len(catalog), dtype=np.bool_)
+		if exclude:
+			keep = ~np.isin(catalog.ids, np.fromiter(exclude, dtype=np.int64, count=len(exclude)))
+		kept = int(keep.sum())
+		known = set(catalog.keys)
+		columns = (
+			CORE_NUTRIENTS
+			+ catalog.keys
+			+ tuple(k for k in fresh.columns[n_core:] if k not in known)
+		)
+		values = np.zeros((kept + len(fresh), len(columns)), dtype=np.float64)
+		has_additional = np.zeros((kept + len(fresh), len(columns) - n_core), dtype=np.bool_)
+
+		values[:kept, :n_core] = catalog.nutrients[:, keep].T
+		# Scatter the CSR additional nutrients of the kept rows
+		owner = np.repeat(np.arange(len(catalog), dtype=np.int64), np.diff(catalog.extra_indptr))
+		cells = keep[owner]
+		rows = (np.cumsum(keep) - 1)[owner[cells]]
+		keys = catalog.extra_keys[cells].astype(np.int64)
+		values[rows, n_core + keys] = catalog.extra_values[cells]
+		has_additional[rows, keys] = True
+
+		values[kept:, :n_core] = fresh.values[:, :n_core]
+		position = {key: j for j, key in enumerate(columns[n_core:])}
+		for j, key in enumerate(fresh.columns[n_core:]):
+			values[kept:, n_core + position[key]] = fresh.values[:, n_core + j]
+			has_additional[kept:, position[key]] = fresh.has_additional[:, j]
+
+		matrix = cls.__new__(cls)
+		matrix._set(
+			columns=columns,
+			food_ids=np.concatenate((catalog.ids[keep], fresh.food_ids)),
+			values=values,
+			has_additional=has_additional,
+			serving_size=np.concatenate((catalog.serving_size[keep], fresh.serving_size)),
+			serving_unit=np.concatenate(
+				(unit_codes(catalog.units)[catalog.serving_unit[keep]], fresh.serving_unit)
+			),
+			grams_per_ml=np.concatenate((catalog.grams_per_ml[keep], fresh.grams_per_ml)),
+		)
+		return matrix
+
+	def _set(
+		self,
+		*,
+		columns: Tuple[str, ...],
+		food_ids: npt.NDArray[np.int64],
+		values: npt.NDArray[np.float64],
+		has_additional: npt.NDArray[np.bool_],
+		serving_size: npt.NDArray[np.float64],
+		serving_unit: npt.NDArray[np.int8],
+		grams_per_ml: npt.NDArray[np.float64],
+	) -> None:
+		self.columns = columns
+		self.food_ids = food_ids
+		self.values = values
+		self.has_additional = has_additional
+		self.serving_size = serving_size
+		self.serving_unit = serving_unit
+		self.grams_per_ml = grams_per_ml
+		self._order = np.argsort(self.food_ids, kind="stable")
+		self._sorted_ids = self.food_ids[self._order]
+
+	def __len__(self) -> int:
+		return len(self.food_ids)
+
+	def rows_for(self, food_ids: npt.ArrayLike) -> npt.NDArray[np.int64]:
+		"""Matrix rows for the given food ids, -1 where the food is not in the catalog."""
+		wanted = np.asarray(food_ids, dtype=np.int64)
+		if not len(self.food_ids):
+			return np.full(wanted.shape, -1, dtype=np.int64)
+		pos = np.searchsorted(self._sorted_ids, wanted)
+		pos = np.minimum(pos, len(self._sorted_ids) - 1)
+		found = self._sorted_ids[pos] == wanted
+		return np.where(found, self._order[pos], -1).astype(np.int64)
+
+	def aggregate(
+		self,
+		*,
+		recipe_index: npt.ArrayLike,
+		food_ids: npt.ArrayLike,
+		quantity: npt.ArrayLike,
+		units: Sequence[str],
+		n_recipes: int,
+	) -> RecipeTotals:
+		"""
+		Aggregate recipe items given as parallel arrays (one entry per item).
+		- recipe_index holds each item's output row in [0, n_recipes).
+		- Items whose food is missing from the catalog contribute nothing.
+		"""
+		rows = self.rows_for(food_ids)
+		keep = rows >= 0
+		rows = rows[keep]
+		recipe_rows = np.asarray(recipe_index, dtype=np.int64)[keep]
+		mult = to_serving_multipliers(
+			quantity=np.asarray(quantity, dtype=np.float64)[keep],
+			unit=unit_codes(units)[keep],
+			food_serving_size=self.serving_size[rows],
+			food_serving_unit=self.serving_unit[rows],
+			grams_per_ml=self.grams_per_ml[rows],
+		)
+
+		values = np.zeros((n_recipes, len(self.columns)), dtype=np.float64)
+		for col in range(len(self.columns)):
+			contribution = self.values[rows, col] * mult
+			if col == 0:
+				# Calories are rounded per item, as in the scalar path (round half to even)
+				contribution = np.rint(contribution)
+			values[:, col] = np.bincount(recipe_rows, weights=contribution, minlength=n_recipes)
+
+		present = np.zeros((n_recipes, self.has_additional.shape[1]), dtype=np.bool_)
+		if present.shape[1]:
+			np.logical_or.at(present, recipe_rows, self.has_additional[rows])
+		return RecipeTotals(columns=self.columns, values=values, present=present)
+
+
+# Ranges matching more than 1/N of the catalog are served by an ordered scan, not a sort
+_SCAN_SELECTIVITY = 8
+
+
+@dataclass
+class _Column:
+	# Rows (ascending positions) that carry the nutrient, or None when every row does
+	rows: Optional[npt.NDArray[np.int64]]
+	values: npt.NDArray[np.float64]
+	# Built on first query: values ascending, with the row of each value
+	sorted_values: Optional[npt.NDArray[np.float64]] = None
+	sorted_rows: Optional[npt.NDArray[np.int64]] = None
+
+
+class NutrientIndex:
+	"""
+	Immutable column-store snapshot of food nutrients for multi-predicate range filters.
+	- Rows are foods in id order. Core nutrients are dense columns; additional_nutrients keys
+		are sparse columns holding only the foods that carry them.
+	- Each column's values are sorted once, on first use, so one range costs two binary
+		searches. A query narrows to the most selective range, then checks the remaining
+		ranges against the dense/sparse values of those candidates only.
+	"""
+
+	def __init__(self, foods: Iterable[FoodLike]) -> None:
+		ids: list[int] = []
+		names: list[str] = []
+		core: list[list[float]] = []
+		extra: Dict[str, Tuple[list[int], list[float]]] = {}
+		for row, food in enumerate(foods):
+			ids.append(food.id)
+			names.append(food.name)
+			core.append([getattr(food, name) for name in CORE_NUTRIENTS])
+			for key, value in (food.additional_nutrients or {}).items():
+				rows, values = extra.setdefault(key, ([], []))
+				rows.append(row)
+				values.append(value)
+
+		self.ids = np.asarray(ids, dtype=np.int64)
+		if np.any(np.diff(self.ids) <= 0):
+			raise ValueError("NutrientIndex expects foods in ascending id order")
+		dense = np.asarray(core, dtype=np.float64).reshape(len(ids), len(CORE_NUTRIENTS))
+		self._columns: Dict[str, _Column] = {
+			name: _Column(rows=None, values=np.ascontiguousarray(dense[:, j]))
+			for j, name in enumerate(CORE_NUTRIENTS)
+		}
+		for key, (rows, values) in extra.items():
+			self._columns[key] = _Column(
+				rows=np.asarray(rows, dtype=np.int64), values=np.asarray(values, dtype=np.float64)
+			)
+		# Position of each row in name order (str order matches SQLite's BINARY collation)
+		self._set_name_order(
+			np.asarray(sorted(range(len(ids)), key=names.__getitem__), dtype=np.int64)
+		)
+
+	@classmethod
+	def from_catalog(cls, catalog: CatalogSnapshot) -> NutrientIndex:
+		"""
+		Index over a mapped catalog snapshot. Core columns and the name order are views of the
+		shared file; only the sparse additional columns are regrouped per key.
+		"""
+		index = cls.__new__(cls)
+		index.ids = catalog.ids
+		index._columns = {
+			name: _Column(rows=None, values=catalog.nutrients[j])
+			for j, name in enumerate(CORE_NUTRIENTS)
+		}
+		owner = np.repeat(np.arange(len(catalog), dtype=np.int64), np.diff(catalog.extra_indptr))
+		# Stable: within a key, cells stay in ascending row order
+		order = np.argsort(catalog.extra_keys, kind="stable")
+		bounds = np.searchsorted(catalog.extra_keys[order], np.arange(len(catalog.keys) + 1))
+		for k, key in enumerate(catalog.keys):
+			cells = order[bounds[k] : bounds[k + 1]]
+			index._columns[key] = _Column(rows=owner[cells], values=catalog.extra_values[cells])
+		index._set_name_order(catalog.by_name)
+		return index
+
+	def _set_name_order(self, by_name: npt.NDArray[np.int64]) -> None:
+		self.by_name = by_name
+		self.name_rank = np.empty(len(by_name), dtype=np.int64)
+		self.name_rank[by_name] = np.arange(len(by_name))
+
+	def __len__(self) -> int:
+		return len(self.ids)
+
+	def position(self, food_id: int) -> int:
+		"""Row of a food id, or -1 when it is not in the snapshot."""
+		pos = int(np.searchsorted(self.ids, food_id))
+		return pos if pos < len(self.ids) and self.ids[pos] == food_id else -1
+
+	def select(self, ranges: Sequence[NutrientRange]) -> npt.NDArray[np.int64]:
+		"""Ascending rows matching every range."""
+		spans = self._spans(ranges)
+		if spans is None:
+			return np.empty(0, dtype=np.int64)
+		if not spans:
+			return np.arange(len(self.ids), dtype=np.int64)
+		return self._narrow(spans)
+
+	def page(
+		self,
+		ranges: Sequence[NutrientRange],
+		*,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+		limit: int = 100,
+		exclude: Collection[int] = (),
+	) -> Optional[List[int]]:
+		"""
+		Food ids of one page of matches in `sort` order, skipping `exclude`d ids.
+		Returns None when a name cursor points at a food missing from the snapshot.
+		"""
+		spans = self._spans(ranges)
+		if spans is None:
+			return []
+		# First position to consider: a row in id order, or a rank in name order
+		start = 0
+		if after is not None and sort == "id":
+			start = int(np.searchsorted(self.ids, after.last_id, side="right"))
+		elif after is not None:
+			pos = self.position(after.last_id)
+			if pos < 0:
+				return None
+			start = int(self.name_rank[pos]) + 1
+		excluded = np.fromiter(exclude, dtype=np.int64, count=len(exclude)) if exclude else None
+
+		if spans and spans[0][0] * _SCAN_SELECTIVITY < len(self.ids):
+			rows = self._narrow(spans)
+			if excluded is not None:
+				rows = rows[~np.isin(self.ids[rows], excluded)]
+			if sort == "id":
+				return self.ids[rows[np.searchsorted(rows, start) :][:limit]].tolist()
+			rank = self.name_rank[rows]
+			keep = rank >= start
+			rows, rank = rows[keep], rank[keep]
+			if len(rows) > limit:
+				top = np.argpartition(rank, limit)[:limit]
+				rows, rank = rows[top], rank[top]
+			return self.ids[rows[np.argsort(rank)]].tolist()
+
+		# Most rows match: walk rows in sort order in growing chunks until the page is full
+		found: List[npt.NDArray[np.int64]] = []
+		remaining = limit
+		chunk = max(4 * limit, 1024)
+		while start < len(self.ids) and remaining > 0:
+			stop = min(start + chunk, len(self.ids))
+			rows = (
+				np.arange(start, stop, dtype=np.int64) if sort == "id" else self.by_name[start:stop]
+			)
+			for _, r, _ in spans:
+				rows = rows[self._in_range(r, rows)]
+			if excluded is not None:
+				rows = rows[~np.isin(self.ids[rows], excluded)]
+			found.append(rows[:remaining])
+			remaining -= len(found[-1])
+			start, chunk = stop, chunk * 2
+		return self.ids[np.concatenate(found)].tolist() if found else []
+
+	def _spans(
+		self, ranges: Sequence[NutrientRange]
+	) -> Optional[List[Tuple[int, NutrientRange, npt.NDArray[np.int64]]]]:
+		"""
+		(match count, range, matching rows) per range, most selective first; None if one can
+		never match.
+		"""
+		spans = []
+		for r in ranges:
+			column = self._columns.get(r.nutrient)
+			if column is None:
+				return None
+			sorted_values, sorted_rows = self._sorted(column)
+			low_side = "left" if r.low_inclusive else "right"
+			high_side = "right" if r.high_inclusive else "left"
+			lo = 0 if r.low is None else np.searchsorted(sorted_values, r.low, side=low_side)
+			hi = (
+				len(sorted_values)
+				if r.high is None
+				else np.searchsorted(sorted_values, r.high, side=high_side)
+			)
+			spans.append((max(int(hi) - int(lo), 0), r, sorted_rows[lo:hi]))
+		spans.sort(key=lambda span: span[0])
+		return spans
+
+	def _narrow(
+		self,
+		spans: List[Tuple[int, NutrientRange, npt.NDArray[np.int64]]],
+	) -> npt.NDArray[np.int64]:
+		rows = np.sort(spans[0][2])
+		for _, r, _ in spans[1:]:
+			if not len(rows):
+				break
+			rows = rows[self._in_range(r, rows)]
+		return rows
+
+	def _sorted(self, column: _Column) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+		if column.sorted_values is None or column.sorted_rows is None:
+			order = np.argsort(column.values, kind="stable")
+			column.sorted_rows = order if column.rows is None else column.rows[order]
+			column.sorted_values = column.values[order]
+		return column.sorted_values, column.sorted_rows
+
+	def _in_range(self, r: NutrientRange, rows: npt.NDArray[np.int64]) -> npt.NDArray[np.bool_]:
+		column = self._columns[r.nutrient]
+		if column.rows is None:
+			values = column.values[rows]
+		else:
+			at = np.minimum(np.searchsorted(column.rows, rows), len(column.rows) - 1)
+			values = np.where(column.rows[at] == rows, column.values[at], np.nan)
+		mask = ~np.isnan(values)
+		if r.low is not None:
+			mask &= values >= r.low if r.low_inclusive else values > r.low
+		if r.high is not None:
+			mask &= values <= r.high if r.high_inclusive else values < r.high
+		return mask
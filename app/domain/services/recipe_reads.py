@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from sqlalchemy import Connection, event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_async_read_session
+from app.core.events import Change
+from app.core.metrics import recipe_reads_total
+from app.core.serialization import dumps
+from app.core.singleflight import SingleFlight
+from app.domain.models import Recipe
+from app.domain.services.async_services import AsyncRecipeService
+
+AsyncSessionScope = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+
+
+@dataclass(frozen=True)
+class RecipeRead:
+	"""One GET /recipes/{id} answer, serialized once and shared by coalesced requests."""
+
+	etag: Optional[str]  # None when the recipe does not exist
+	body: bytes
+
+
+class RecipeReads:
+	"""
+	The GET /recipes/{id} read path behind single-flight: a burst of identical requests costs
+	one read session, one load and one JSON encoding instead of one per request.
+	- ETag-only lookups (conditional requests) are coalesced separately, so 304s still never
+		load items.
+	- A recipe change drops that recipe's entries; a food change moves ETags of recipes
+		using it, so it drops them all.
+	"""
+
+	def __init__(
+		self,
+		session_scope: AsyncSessionScope = get_async_read_session,
+		*,
+		coalesce: bool = settings.recipe_reads.coalesce,
+		cache_ttl_seconds: float = settings.recipe_reads.cache_ttl_seconds,
+		cache_max_entries: int = settings.recipe_reads.cache_max_entries,
+	) -> None:
+		self._session_scope = session_scope
+		self._reads: SingleFlight[int, RecipeRead] = SingleFlight(
+			enabled=coalesce, ttl_seconds=cache_ttl_seconds, max_entries=cache_max_entries
+		)
+		self._etags: SingleFlight[int, Optional[str]] = SingleFlight(
+			enabled=coalesce, ttl_seconds=cache_ttl_seconds, max_entries=cache_max_entries
+		)
+
+	async def get(self, recipe_id: int) -> RecipeRead:
+		read, source = await self._reads.do(recipe_id, lambda: self._load(recipe_id))
+		recipe_reads_total.inc(source=source)
+		return read
+
+	async def etag(self, recipe_id: int) -> Optional[str]:
+		etag, _ = await self._etags.do(recipe_id, lambda: self._load_etag(recipe_id))
+		return etag
+
+	def handle_change(self, change: Change) -> None:
+		if change.entity == "recipe":
+			self._reads.invalidate(change.entity_id)
+			self._etags.invalidate(change.entity_id)
+		else:
+			self.clear()
+
+	def clear(self) -> None:
+		self._reads.clear()
+		self._etags.clear()
+
+	async def _load(self, recipe_id: int) -> RecipeRead:
+		async with self._session_scope() as session:
+			service = AsyncRecipeService(session)
+			# Tag first, body second: a body newer than its tag is harmless, the reverse is not
+			etag = await service.recipe_etag(recipe_id)
+			recipe = None if etag is None else await service.get_recipe(recipe_id)
+		if recipe is None:
+			return RecipeRead(etag=None, body=b"null")
+		return RecipeRead(etag=etag, body=dumps(recipe.model_dump()))
+
+	async def _load_etag(self, recipe_id: int) -> Optional[str]:
+		async with self._session_scope() as session:
+			return await AsyncRecipeService(session).recipe_etag(recipe_id)
+
+
+recipe_reads = RecipeReads()
+
+
+@event.listens_for(Recipe.__table__, "after_create")
+@event.listens_for(Recipe.__table__, "after_drop")
+def _clear_on_schema_change(target: Any, connection: Connection, **kw: Any) -> None:
+	recipe_reads.clear()
@@ -1,16 +1,55 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, Optional
+from collections import deque
+from importlib.util import find_spec
+from typing import (
+	TYPE_CHECKING,
+	Any,
+	Deque,
+	Dict,
+	Iterable,
+	Iterator,
+	List,
+	Mapping,
+	Optional,
+	Sequence,
+	Set,
+	Tuple,
+)
+
+from sqlalchemy import Row
 
+from app.core.etags import make_etag
+from app.core.metrics import recipe_aggregation_seconds, timed
+from app.core.pagination import Cursor, SortKey
 from app.core.units import to_serving_multiplier
 from app.domain.models import Food, Recipe, RecipeItem
-from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.repositories import FoodRepository, FoodSnapshot, RecipeRepository
 from app.domain.schemas import (
+	FoodOut,
+	RecipeBatchOut,
 	RecipeCreate,
 	RecipeItemIn,
-	RecipeItemOut,
 	RecipeOut,
 	RecipeUpdate,
+	RecipeWithFoodsOut,
+	ScenarioIn,
+	ScenarioOut,
+)
+
+if TYPE_CHECKING:
+	from app.domain.services.nutrient_engine import NutrientMatrix
+
+_FLOAT_TOTALS = (
+	"protein_g",
+	"carbs_g",
+	"fat_g",
+	"fiber_g",
+	"sugar_g",
+	"saturated_fat_g",
+	"sodium_mg",
+	"potassium_mg",
+	"cholesterol_mg",
 )
 
 
@@ -19,52 +58,60 @@ class RecipeService:
 		self._recipes = recipe_repo
 		self._foods = food_repo
 
-	def _recalculate_totals(self, recipe: Recipe) -> None:
-		# Reset totals
+	def _recalculate_totals(
+		self,
+		recipe: Recipe,
+		foods: Mapping[int, FoodSnapshot],
+		components: Optional[Mapping[int, FoodSnapshot]] = None,
+	) -> None:
+		# Full rebuild from the items; `foods` / `components` must hold every item's food or
+		# sub-recipe (missing ones count as 0)
 		recipe.calories = 0
-		recipe.protein_g = 0.0
-		recipe.carbs_g = 0.0
-		recipe.fat_g = 0.0
-		recipe.fiber_g = 0.0
-		recipe.sugar_g = 0.0
-		recipe.saturated_fat_g = 0.0
-		recipe.sodium_mg = 0.0
-		recipe.potassium_mg = 0.0
-		recipe.cholesterol_mg = 0.0
-		merged_additional: Dict[str, float] = {}
-
-		items = list(self._recipes.iter_items(recipe=recipe))
-		for item in items:
-			food: Optional[Food] = self._foods.get_by_id(food_id=item.food_id)
-			if food is None:
-				continue
-			mult = to_serving_multiplier(
-				quantity=item.quantity,
-				unit=item.unit,  # type: ignore[arg-type]
-				food_serving_size=food.serving_size,
-				food_serving_unit=food.serving_unit,  # type: ignore[arg-type]
-				grams_per_ml=food.grams_per_ml,
-			)
-			recipe.calories += int(round(food.calories * mult))
-			recipe.protein_g += food.protein_g * mult
-			recipe.carbs_g += food.carbs_g * mult
-			recipe.fat_g += food.fat_g * mult
-			recipe.fiber_g += food.fiber_g * mult
-			recipe.sugar_g += food.sugar_g * mult
-			recipe.saturated_fat_g += food.saturated_fat_g * mult
-			recipe.sodium_mg += food.sodium_mg * mult
-			recipe.potassium_mg += food.potassium_mg * mult
-			recipe.cholesterol_mg += food.cholesterol_mg * mult
-			for k, v in food.additional_nutrients.items():
-				merged_additional[k] = merged_additional.get(k, 0.0) + (v * mult)
-
-		# Merge recipe-level additional nutrients (manual overrides) additively
-		for k, v in (recipe.additional_nutrients or {}).items():
-			merged_additional[k] = merged_additional.get(k, 0.0) + v
-
-		recipe.additional_nutrients = merged_additional
-
-	def _per_serving(self, recipe: Recipe) -> Dict[str, float]:
+		for field_name in _FLOAT_TOTALS:
+			setattr(recipe, field_name, 0.0)
+		# Recipe-level additional nutrients (manual overrides) are merged additively
+		recipe.additional_nutrients = dict(recipe.nutrient_overrides or {})
+		for item in recipe.items:
+			self._apply_item(recipe, item, _source(item, foods, components or {}), sign=1)
+
+	def _item_source(self, item: RecipeItem) -> Optional[FoodSnapshot]:
+		if item.sub_recipe_id is not None:
+			return self._recipes.component_snapshots([item.sub_recipe_id]).get(item.sub_recipe_id)
+		return self._foods.get_snapshot(food_id=item.food_id)  # type: ignore[arg-type]
+
+	def _apply_item(
+		self, recipe: Recipe, item: RecipeItem, food: Optional[Food | FoodSnapshot], *, sign: int
+	) -> None:
+		"""Add (sign=1) or subtract (sign=-1) a single item's contribution to the stored totals."""
+		if food is None:
+			return
+		mult = to_serving_multiplier(
+			quantity=item.quantity,
+			unit=item.unit,  # type: ignore[arg-type]
+			food_serving_size=food.serving_size,
+			food_serving_unit=food.serving_unit,  # type: ignore[arg-type]
+			grams_per_ml=food.grams_per_ml,
+		)
+		recipe.calories += sign * int(round(food.calories * mult))
+		for field_name in _FLOAT_TOTALS:
+			value = getattr(recipe, field_name) + sign * getattr(food, field_name) * mult
+			setattr(recipe, field_name, _snap(value))
+		merged = dict(recipe.additional_nutrients or {})
+		for k, v in food.additional_nutrients.items():
+			merged[k] = _snap(merged.get(k, 0.0) + sign * v * mult)
+		# Reassign so the JSON column is flagged as modified
+		recipe.additional_nutrients = merged
+
+	def _apply_overrides(self, recipe: Recipe, overrides: Dict[str, float]) -> None:
+		merged = dict(recipe.additional_nutrients or {})
+		for k, v in (recipe.nutrient_overrides or {}).items():
+			merged[k] = _snap(merged.get(k, 0.0) - v)
+		for k, v in overrides.items():
+			merged[k] = merged.get(k, 0.0) + v
+		recipe.nutrient_overrides = dict(overrides)
+		recipe.additional_nutrients = merged
+
+	def _per_serving(self, recipe: Recipe | Row[Any]) -> Dict[str, float]:
 		if recipe.servings <= 0:
 			return {}
 		s = recipe.servings
@@ -82,76 +129,325 @@ class RecipeService:
 			**{k: round(v / s, 2) for k, v in (recipe.additional_nutrients or {}).items()},
 		}
 
-	def _to_out(self, recipe: Recipe) -> RecipeOut:
-		return RecipeOut(
-			id=recipe.id,
-			name=recipe.name,
-			calories=recipe.calories,
-			protein_g=recipe.protein_g,
-			carbs_g=recipe.carbs_g,
-			fat_g=recipe.fat_g,
-			fiber_g=recipe.fiber_g,
-			sugar_g=recipe.sugar_g,
-			saturated_fat_g=recipe.saturated_fat_g,
-			sodium_mg=recipe.sodium_mg,
-			potassium_mg=recipe.potassium_mg,
-			cholesterol_mg=recipe.cholesterol_mg,
-			additional_nutrients=recipe.additional_nutrients or {},
-			servings=recipe.servings,
-			serving_unit=recipe.serving_unit,
-			per_serving=self._per_serving(recipe),
-			items=[
-				RecipeItemOut(id=i.id, food_id=i.food_id, quantity=i.quantity, unit=i.unit)
-				for i in self._recipes.iter_items(recipe=recipe)
-			],
-		)
+	def _payload(self, recipe: Recipe | Row[Any], items: List[Dict[str, Any]]) -> Dict[str, Any]:
+		# RecipeOut as plain values: stored totals and item columns already satisfy the schema
+		return {
+			"name": recipe.name,
+			"additional_nutrients": recipe.additional_nutrients or {},
+			"servings": recipe.servings,
+			"serving_unit": recipe.serving_unit,
+			"id": recipe.id,
+			"calories": recipe.calories,
+			"protein_g": recipe.protein_g,
+			"carbs_g": recipe.carbs_g,
+			"fat_g": recipe.fat_g,
+			"fiber_g": recipe.fiber_g,
+			"sugar_g": recipe.sugar_g,
+			"saturated_fat_g": recipe.saturated_fat_g,
+			"sodium_mg": recipe.sodium_mg,
+			"potassium_mg": recipe.potassium_mg,
+			"cholesterol_mg": recipe.cholesterol_mg,
+			"per_serving": self._per_serving(recipe),
+			"items": items,
+		}
+
+	def _to_out(
+		self,
+		recipe: Recipe | Row[Any],
+		items: Optional[Iterable[Any]] = None,
+	) -> RecipeOut:
+		if items is None:
+			items = recipe.items
+		return RecipeOut.model_validate(self._payload(recipe, _item_payloads(items)))
 
 	def create_recipe(self, data: RecipeCreate) -> RecipeOut:
 		if self._recipes.get_recipe_by_name(name=data.name) is not None:
 			raise ValueError("Recipe with this name already exists")
 		recipe = Recipe(
 			name=data.name,
-			additional_nutrients=data.additional_nutrients,
+			additional_nutrients=dict(data.additional_nutrients),
+			nutrient_overrides=data.additional_nutrients,
 			servings=data.servings,
 			serving_unit=data.serving_unit,
+			items=[],
 		)
 		recipe = self._recipes.create_recipe(recipe)
-		for item in data.items:
-			self._add_item_internal(recipe=recipe, item=item)
-		self._recalculate_totals(recipe)
+		self._replace_items(recipe, data.items)
+		self._recipes.record_change(recipe_id=recipe.id, action="created")
 		return self._to_out(recipe)
 
 	def get_recipe(self, recipe_id: int) -> Optional[RecipeOut]:
-		recipe = self._recipes.get_recipe(recipe_id)
+		# Stored totals are authoritative: reads never aggregate nor dirty the row
+		recipe = self._recipes.get_recipe(recipe_id, with_items=True)
 		if recipe is None:
 			return None
-		self._recalculate_totals(recipe)
 		return self._to_out(recipe)
 
-	def list_recipes(self, *, limit: int = 100, offset: int = 0) -> Iterable[RecipeOut]:
-		rows = self._recipes.list_recipes(limit=limit, offset=offset)
+	def get_recipes(
+		self,
+		recipe_ids: Sequence[int],
+		*,
+		include_foods: bool = False,
+	) -> RecipeBatchOut:
+		"""
+		Many recipes by id in request order: one IN query for the recipes and one for their items.
+		With include_foods each recipe carries the foods its items use, read through the food
+		cache in one more query at most; sub-recipes are referenced by id only.
+		"""
+		ids = list(dict.fromkeys(recipe_ids))
+		found = {r.id: r for r in self._recipes.list_by_ids(ids, with_items=True)}
+		recipes = [found[i] for i in ids if i in found]
+		foods: Dict[int, FoodSnapshot] = {}
+		if include_foods:
+			food_ids = {i.food_id for r in recipes for i in r.items if i.food_id is not None}
+			foods = self._foods.get_snapshots(food_ids)
+		items = []
+		for recipe in recipes:
+			payload = self._payload(recipe, _item_payloads(recipe.items))
+			if include_foods:
+				used = dict.fromkeys(i.food_id for i in recipe.items if i.food_id in foods)
+				payload["foods"] = [FoodOut.model_validate(foods[f]) for f in used]
+			items.append(RecipeWithFoodsOut.model_validate(payload))
+		return RecipeBatchOut(items=items, missing_ids=[i for i in ids if i not in found])
+
+	def recipe_etag(self, recipe_id: int) -> Optional[str]:
+		"""ETag from the versions of the recipe and what it uses; builds no items or totals."""
+		key = self._recipes.version_key(recipe_id)
+		if key is None:
+			return None
+		version, dependencies = key
+		return make_etag("r", recipe_id, version, dependencies)
+
+	def list_recipes(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+	) -> Iterable[RecipeOut]:
+		rows = self._recipes.list_recipes(
+			limit=limit,
+			offset=offset,
+			sort=sort,
+			after=after,
+			with_items=True,
+		)
 		for r in rows:
-			self._recalculate_totals(r)
 			yield self._to_out(r)
 
+	def list_recipe_payloads(
+		self,
+		*,
+		limit: int = 100,
+		offset: int = 0,
+		sort: SortKey = "id",
+		after: Optional[Cursor] = None,
+	) -> List[Dict[str, Any]]:
+		"""
+		list_recipes as RecipeOut-shaped dicts for the JSON fast path: two plain-row queries,
+		no Recipe/RecipeItem objects and no RecipeOut validation.
+		"""
+		recipes = self._recipes.list_recipe_rows(limit=limit, offset=offset, sort=sort, after=after)
+		items: Dict[int, List[Dict[str, Any]]] = {}
+		rows = self._recipes.item_rows([r.id for r in recipes])
+		for item_id, recipe_id, food_id, sub_recipe_id, quantity, unit in rows:
+			items.setdefault(recipe_id, []).append(
+				{
+					"id": item_id,
+					"food_id": food_id,
+					"sub_recipe_id": sub_recipe_id,
+					"quantity": quantity,
+					"unit": unit,
+				}
+			)
+		return [self._payload(r, items.get(r.id, [])) for r in recipes]
+
+	def export_recipes(self, *, batch_size: int = 1000) -> Iterator[RecipeOut]:
+		"""Stream every recipe with items and per-serving values, holding one batch at a time."""
+		for recipes, items in self._recipes.iter_recipe_batches(batch_size=batch_size):
+			for recipe in recipes:
+				yield self._to_out(recipe, items.get(recipe.id, []))
+
 	def update_recipe(self, recipe_id: int, data: RecipeUpdate) -> Optional[RecipeOut]:
 		recipe = self._recipes.get_recipe(recipe_id)
 		if recipe is None:
 			return None
-		for field_name, value in data.model_dump(exclude_unset=True).items():
+		changes = data.model_dump(exclude_unset=True)
+		if "additional_nutrients" in changes:
+			self._apply_overrides(recipe, changes.pop("additional_nutrients") or {})
+		for field_name, value in changes.items():
 			setattr(recipe, field_name, value)
-		self._recalculate_totals(recipe)
+		self._recipes.record_change(recipe_id=recipe.id, action="updated")
 		return self._to_out(recipe)
 
 	def delete_recipe(self, recipe_id: int) -> bool:
-		return self._recipes.delete_recipe(recipe_id)
+		if self._recipes.recipe_ids_using_recipe(recipe_id=recipe_id):
+			raise ValueError("Recipe is used as a sub-recipe")
+		deleted = self._recipes.delete_recipe(recipe_id)
+		if deleted:
+			self._recipes.record_change(recipe_id=recipe_id, action="deleted")
+		return deleted
+
+	@timed(recipe_aggregation_seconds, operation="recalculate")
+	def recalculate(self, recipe_id: int) -> Optional[RecipeOut]:
+		"""Rebuild a recipe's stored totals from scratch, e.g. after its foods changed."""
+		recipe = self._recipes.get_recipe(recipe_id, with_items=True)
+		if recipe is None:
+			return None
+		foods = self._foods.get_snapshots(i.food_id for i in recipe.items if i.food_id is not None)
+		components = self._recipes.component_snapshots(
+			i.sub_recipe_id for i in recipe.items if i.sub_recipe_id is not None
+		)
+		self._recalculate_totals(recipe, foods, components)
+		self._recipes.record_change(recipe_id=recipe.id, action="updated")
+		return self._to_out(recipe)
+
+	@timed(recipe_aggregation_seconds, operation="recalculate_many")
+	def recalculate_many(self, recipe_ids: Sequence[int]) -> int:
+		"""
+		Rebuild totals for a batch of recipes, loading all items, foods and sub-recipes up front.
+		Recipes nested inside others of the same batch are rebuilt first and feed their parents.
+		"""
+		recipes = {r.id: r for r in self._recipes.list_by_ids(recipe_ids, with_items=True)}
+		items = [i for r in recipes.values() for i in r.items]
+		foods = self._foods.get_snapshots(i.food_id for i in items if i.food_id is not None)
+		components = self._recipes.component_snapshots(
+			i.sub_recipe_id
+			for i in items
+			if i.sub_recipe_id is not None and i.sub_recipe_id not in recipes
+		)
+		edges = [(i.sub_recipe_id, i.recipe_id) for i in items if i.sub_recipe_id in recipes]
+		for recipe_id in _topological(recipes, edges):
+			recipe = recipes[recipe_id]
+			self._recalculate_totals(recipe, foods, components)
+			components[recipe.id] = self._recipes.as_component(recipe)
+			self._recipes.record_change(recipe_id=recipe.id, action="updated")
+		return len(recipes)
+
+	def recompute_order(
+		self,
+		recipe_ids: Sequence[int],
+		*,
+		include_seeds: bool = True,
+	) -> List[int]:
+		"""
+		The given recipes and every recipe using them at any depth, each after its sub-recipes.
+		Only that ancestor subgraph is visited; without `include_seeds`, a given recipe is kept
+		only if it also depends on another one.
+		"""
+		edges = self._recipes.ancestor_edges(recipe_ids)
+		parents = {parent for _, parent in edges}
+		order = _topological(set(recipe_ids) | parents, edges)
+		if include_seeds:
+			return order
+		seeds = set(recipe_ids)
+		return [i for i in order if i not in seeds or i in parents]
+
+	@timed(recipe_aggregation_seconds, operation="recalculate_all")
+	def recalculate_all(self, *, batch_size: int = 5000) -> int:
+		"""
+		Rebuild every recipe's stored totals with the vectorized engine (without numpy, through
+		recalculate_many). Recipes are processed in id-ordered batches; only rows whose totals
+		changed are written. Recipes with sub-recipes are rebuilt afterwards, in topological order.
+		"""
+		matrix: Optional[NutrientMatrix] = None
+		if find_spec("numpy") is not None:
+			from app.domain.services.nutrient_engine import NutrientMatrix
+
+			view = self._foods.catalog_view()
+			if view is None:
+				matrix = NutrientMatrix(self._foods.iter_rows())
+			else:
+				# Shared snapshot arrays, with current rows for the foods changed since it
+				catalog, stale = view
+				fresh = self._foods.get_snapshots(stale).values()
+				matrix = NutrientMatrix.from_catalog(catalog, exclude=stale, foods=fresh)
+		changed = 0
+		after_id = 0
+		nested: Set[int] = set()
+		while True:
+			recipes = self._recipes.recipe_rows_after(after_id=after_id, limit=batch_size)
+			if not recipes:
+				break
+			after_id = recipes[-1].id
+			position = {r.id: i for i, r in enumerate(recipes)}
+			rows = self._recipes.item_rows([r.id for r in recipes])
+			nested.update(i.recipe_id for i in rows if i.sub_recipe_id is not None)
+			if matrix is None:
+				changed += self.recalculate_many([r.id for r in recipes if r.id not in nested])
+				continue
+			items = [i for i in rows if i.food_id is not None]
+			result = matrix.aggregate(
+				recipe_index=[position[i.recipe_id] for i in items],
+				food_ids=[i.food_id for i in items],
+				quantity=[i.quantity for i in items],
+				units=[i.unit for i in items],
+				n_recipes=len(recipes),
+			)
+			updates = []
+			for i, recipe in enumerate(recipes):
+				if recipe.id in nested:
+					continue
+				totals = result.totals(i, recipe.nutrient_overrides)
+				if not _same_totals(recipe._asdict(), totals):
+					updates.append({"id": recipe.id, "version": recipe.version + 1, **totals})
+			self._recipes.bulk_update_totals(updates)
+			for row in updates:
+				self._recipes.record_change(recipe_id=row["id"], action="updated")
+			changed += len(updates)
+		order = self.recompute_order(sorted(nested))
+		for start in range(0, len(order), batch_size):
+			changed += self.recalculate_many(order[start : start + batch_size])
+		return changed
+
+	@timed(recipe_aggregation_seconds, operation="evaluate")
+	def evaluate(self, scenarios: Sequence[ScenarioIn]) -> List[ScenarioOut]:
+		"""
+		Totals and per-serving values of ad-hoc ingredient lists, computed like recipe totals
+		but never stored. All foods are resolved at once (cache, then a single IN query) and,
+		with numpy, every scenario is aggregated in one vectorized pass.
+		"""
+		foods = self._foods.get_snapshots({i.food_id for s in scenarios for i in s.items})
+		if find_spec("numpy") is not None:
+			totals = _vectorized_totals(scenarios, foods)
+		else:
+			totals = [_scalar_totals(s, foods) for s in scenarios]
+		results = []
+		for scenario, values in zip(scenarios, totals, strict=True):
+			missing = dict.fromkeys(i.food_id for i in scenario.items if i.food_id not in foods)
+			result = ScenarioOut(
+				label=scenario.label,
+				servings=scenario.servings,
+				missing_food_ids=list(missing),
+				**values,
+			)
+			result.per_serving = self._per_serving(result)
+			results.append(result)
+		return results
 
 	def _add_item_internal(self, *, recipe: Recipe, item: RecipeItemIn) -> RecipeItem:
-		food = self._foods.get_by_id(food_id=item.food_id)
-		if food is None:
-			raise ValueError("Food not found")
-		rec_item = self._recipes.add_item(recipe=recipe, food=food, quantity=item.quantity)
-		rec_item.unit = item.unit
+		if item.sub_recipe_id is not None:
+			# Cycle check: the new sub-recipe must not already contain this recipe at any depth
+			if item.sub_recipe_id == recipe.id or recipe.id in self._recipes.descendant_ids(
+				recipe_id=item.sub_recipe_id
+			):
+				raise ValueError("Sub-recipe would make the recipe contain itself")
+			source = self._recipes.component_snapshots([item.sub_recipe_id]).get(item.sub_recipe_id)
+			if source is None:
+				raise ValueError("Sub-recipe not found")
+		else:
+			source = self._foods.get_snapshot(food_id=item.food_id)  # type: ignore[arg-type]
+			if source is None:
+				raise ValueError("Food not found")
+		rec_item = self._recipes.add_item(
+			recipe=recipe,
+			food_id=item.food_id,
+			sub_recipe_id=item.sub_recipe_id,
+			quantity=item.quantity,
+			unit=item.unit,
+		)
+		self._apply_item(recipe, rec_item, source, sign=1)
 		return rec_item
 
 	def add_item(self, recipe_id: int, item: RecipeItemIn) -> Optional[RecipeOut]:
@@ -159,9 +455,72 @@ class RecipeService:
 		if recipe is None:
 			return None
 		self._add_item_internal(recipe=recipe, item=item)
-		self._recalculate_totals(recipe)
+		self._recipes.record_change(recipe_id=recipe.id, action="updated")
+		return self._to_out(recipe)
+
+	def replace_items(self, recipe_id: int, items: Sequence[RecipeItemIn]) -> Optional[RecipeOut]:
+		"""
+		Make a recipe's items exactly `items`, e.g. at the end of an edit session.
+		Submitted items are matched to existing rows by food / sub-recipe, so unchanged ingredients
+		keep their ids; the diff is written in one flush and the totals are rebuilt once.
+		"""
+		recipe = self._recipes.get_recipe(recipe_id, with_items=True)
+		if recipe is None:
+			return None
+		if self._replace_items(recipe, items):
+			self._recipes.record_change(recipe_id=recipe.id, action="updated")
 		return self._to_out(recipe)
 
+	def _replace_items(self, recipe: Recipe, items: Sequence[RecipeItemIn]) -> bool:
+		foods, components = self._resolve_sources(recipe, items)
+		existing: Dict[Tuple[Optional[int], Optional[int]], Deque[RecipeItem]] = {}
+		for row in recipe.items:
+			existing.setdefault((row.food_id, row.sub_recipe_id), deque()).append(row)
+		added: List[Dict[str, Any]] = []
+		changed: List[Tuple[RecipeItem, float, str]] = []
+		for item in items:
+			matches = existing.get((item.food_id, item.sub_recipe_id))
+			if matches:
+				row = matches.popleft()
+				if (row.quantity, row.unit) != (item.quantity, item.unit):
+					changed.append((row, item.quantity, item.unit))
+			else:
+				added.append(item.model_dump())
+		removed = [row for rows in existing.values() for row in rows]
+		if not (added or changed or removed):
+			return False
+		self._recipes.replace_items(recipe=recipe, added=added, changed=changed, removed=removed)
+		self._recalculate_totals(recipe, foods, components)
+		# Items and totals go out together; new items get their ids here
+		self._recipes.flush()
+		return True
+
+	def _resolve_sources(
+		self,
+		recipe: Recipe,
+		items: Sequence[RecipeItemIn],
+	) -> Tuple[Dict[int, FoodSnapshot], Dict[int, FoodSnapshot]]:
+		"""
+		Every food and sub-recipe the items use, one IN query each; ValueError if any is
+		missing or would make the recipe contain itself.
+		"""
+		food_ids = {i.food_id for i in items if i.food_id is not None}
+		foods = self._foods.get_snapshots(food_ids)
+		if food_ids - foods.keys():
+			raise ValueError(f"Food not found: {_id_list(food_ids - foods.keys())}")
+		sub_recipe_ids = {i.sub_recipe_id for i in items if i.sub_recipe_id is not None}
+		if not sub_recipe_ids:
+			return foods, {}
+		# A sub-recipe may not be this recipe or any recipe containing it
+		ancestors = {parent for _, parent in self._recipes.ancestor_edges([recipe.id])}
+		if recipe.id in sub_recipe_ids or sub_recipe_ids & ancestors:
+			raise ValueError("Sub-recipe would make the recipe contain itself")
+		components = self._recipes.component_snapshots(sub_recipe_ids)
+		missing = sub_recipe_ids - components.keys()
+		if missing:
+			raise ValueError(f"Sub-recipe not found: {_id_list(missing)}")
+		return foods, components
+
 	def update_item_quantity(self, recipe_id: int, item_id: int, quantity: float) -> Optional[RecipeOut]:
 		recipe = self._recipes.get_recipe(recipe_id)
 		if recipe is None:
@@ -169,8 +528,11 @@ class RecipeService:
 		item = self._recipes.get_item(recipe_id=recipe_id, item_id=item_id)
 		if item is None or item.recipe_id != recipe.id:
 			return None
+		source = self._item_source(item)
+		self._apply_item(recipe, item, source, sign=-1)
 		self._recipes.update_item_quantity(item=item, quantity=quantity)
-		self._recalculate_totals(recipe)
+		self._apply_item(recipe, item, source, sign=1)
+		self._recipes.record_change(recipe_id=recipe.id, action="updated")
 		return self._to_out(recipe)
 
 	def remove_item(self, recipe_id: int, item_id: int) -> bool:
@@ -180,6 +542,112 @@ class RecipeService:
 		item = self._recipes.get_item(recipe_id=recipe_id, item_id=item_id)
 		if item is None or item.recipe_id != recipe.id:
 			return False
+		self._apply_item(recipe, item, self._item_source(item), sign=-1)
 		self._recipes.remove_item(item=item)
-		self._recalculate_totals(recipe)
+		self._recipes.record_change(recipe_id=recipe.id, action="updated")
 		return True
+
+
+def _source(
+	item: RecipeItem, foods: Mapping[int, FoodSnapshot], components: Mapping[int, FoodSnapshot]
+) -> Optional[FoodSnapshot]:
+	if item.sub_recipe_id is not None:
+		return components.get(item.sub_recipe_id)
+	return foods.get(item.food_id)  # type: ignore[arg-type]
+
+
+def _item_payloads(items: Iterable[Any]) -> List[Dict[str, Any]]:
+	return [
+		{
+			"id": i.id,
+			"food_id": i.food_id,
+			"sub_recipe_id": i.sub_recipe_id,
+			"quantity": i.quantity,
+			"unit": i.unit,
+		}
+		for i in items
+	]
+
+
+def _id_list(ids: Iterable[int]) -> str:
+	return ", ".join(str(i) for i in sorted(ids))
+
+
+def _vectorized_totals(
+	scenarios: Sequence[ScenarioIn],
+	foods: Mapping[int, FoodSnapshot],
+) -> List[Dict[str, Any]]:
+	from app.domain.services.nutrient_engine import NutrientMatrix
+
+	items = [(index, item) for index, scenario in enumerate(scenarios) for item in scenario.items]
+	result = NutrientMatrix(foods.values()).aggregate(
+		recipe_index=[index for index, _ in items],
+		food_ids=[item.food_id for _, item in items],
+		quantity=[item.quantity for _, item in items],
+		units=[item.unit for _, item in items],
+		n_recipes=len(scenarios),
+	)
+	return [result.totals(index) for index in range(len(scenarios))]
+
+
+def _scalar_totals(scenario: ScenarioIn, foods: Mapping[int, FoodSnapshot]) -> Dict[str, Any]:
+	# Same arithmetic as _apply_item, for installs without numpy
+	totals: Dict[str, Any] = {"calories": 0, **{name: 0.0 for name in _FLOAT_TOTALS}}
+	additional: Dict[str, float] = {}
+	for item in scenario.items:
+		food = foods.get(item.food_id)
+		if food is None:
+			continue
+		mult = to_serving_multiplier(
+			quantity=item.quantity,
+			unit=item.unit,  # type: ignore[arg-type]
+			food_serving_size=food.serving_size,
+			food_serving_unit=food.serving_unit,  # type: ignore[arg-type]
+			grams_per_ml=food.grams_per_ml,
+		)
+		totals["calories"] += int(round(food.calories * mult))
+		for name in _FLOAT_TOTALS:
+			totals[name] += getattr(food, name) * mult
+		for key, value in food.additional_nutrients.items():
+			additional[key] = additional.get(key, 0.0) + value * mult
+	totals["additional_nutrients"] = additional
+	return totals
+
+
+def _topological(nodes: Iterable[int], edges: Iterable[Tuple[int, int]]) -> List[int]:
+	"""Kahn's algorithm over (child, parent) edges: each recipe comes after its sub-recipes."""
+	waiting = {node: 0 for node in sorted(nodes)}
+	parents: Dict[int, List[int]] = {}
+	for child, parent in set(edges):
+		if child in waiting and parent in waiting:
+			parents.setdefault(child, []).append(parent)
+			waiting[parent] += 1
+	ready = deque(node for node, count in waiting.items() if count == 0)
+	order: List[int] = []
+	while ready:
+		node = ready.popleft()
+		order.append(node)
+		for parent in parents.get(node, ()):
+			waiting[parent] -= 1
+			if not waiting[parent]:
+				ready.append(parent)
+	return order
+
+
+def _same_totals(stored: Mapping[str, Any], totals: Mapping[str, Any]) -> bool:
+	for name, value in totals.items():
+		current = stored[name]
+		if name == "additional_nutrients":
+			current = current or {}
+			if current.keys() != value.keys() or any(
+				abs(current[k] - value[k]) > 1e-9 for k in value
+			):
+				return False
+		elif abs(current - value) > 1e-9:
+			return False
+	return True
+
+
+def _snap(value: float) -> float:
+	# Absorb float drift left behind when a contribution is subtracted again
+	return 0.0 if abs(value) < 1e-9 else value
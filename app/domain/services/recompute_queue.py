@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import itertools
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, cast
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_read_session, get_session
+from app.core.events import Change
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.schemas import RecomputeJobOut, RecomputeStatusOut
+from app.domain.services.recipe_service import RecipeService
+
+logger = logging.getLogger(__name__)
+
+SessionScope = Callable[[], AbstractContextManager[Session]]
+
+
+def _now() -> datetime:
+	return datetime.now(timezone.utc)
+
+
+@dataclass
+class RecomputeJob:
+	id: int
+	# The changed food, or the changed recipe whose ancestors need rebuilding
+	food_id: Optional[int] = None
+	recipe_id: Optional[int] = None
+	status: str = "queued"
+	total: Optional[int] = None
+	done: int = 0
+	error: Optional[str] = None
+	created_at: datetime = field(default_factory=_now)
+	finished_at: Optional[datetime] = None
+
+	def _finish(self, status: str, error: Optional[str] = None) -> None:
+		self.status = status
+		self.error = error
+		self.finished_at = _now()
+
+
+class RecomputeQueue:
+	"""
+	Background refresh of stored recipe totals after the foods or sub-recipes they use change.
+	- Changed foods are resolved to dependent recipes through the food -> recipes reverse index,
+		then up to every recipe nesting those; a changed recipe resolves to its ancestors only.
+	- Recipe ids are deduplicated across jobs and recomputed in batches on one worker thread,
+		in topological order: a recipe is always rebuilt after the sub-recipes it uses.
+	"""
+
+	def __init__(
+		self,
+		session_scope: SessionScope = get_session,
+		read_scope: SessionScope = get_read_session,
+		*,
+		batch_size: int = settings.recompute.batch_size,
+		job_history: int = settings.recompute.job_history,
+	) -> None:
+		self._session_scope = session_scope
+		self._read_scope = read_scope
+		self._batch_size = batch_size
+		self._job_history = job_history
+		self._cond = threading.Condition()
+		self._ids = itertools.count(1)
+		self._jobs: "OrderedDict[int, RecomputeJob]" = OrderedDict()
+		# food_id / changed recipe_id -> job waiting to be resolved;
+		# recipe_id -> jobs waiting on that recipe
+		self._foods: "OrderedDict[int, RecomputeJob]" = OrderedDict()
+		self._components: "OrderedDict[int, RecomputeJob]" = OrderedDict()
+		self._recipes: "OrderedDict[int, List[RecomputeJob]]" = OrderedDict()
+		self._recomputed_total = 0
+		self._busy = False
+		self._stopping = False
+		self._thread: Optional[threading.Thread] = None
+
+	def handle_change(self, change: Change) -> None:
+		# Remote changes were already recomputed by the worker that committed them
+		if change.remote:
+			return
+		if change.entity == "food" and change.action != "created":
+			self.submit_food(change.entity_id)
+		# The worker's own commits rebuild ancestors it has already resolved and ordered
+		elif change.entity == "recipe" and change.action == "updated":
+			if threading.current_thread() is not self._thread:
+				self.submit_recipe(change.entity_id)
+
+	def submit_food(self, food_id: int) -> RecomputeJobOut:
+		with self._cond:
+			job = self._foods.get(food_id)
+			if job is None:
+				job = RecomputeJob(id=next(self._ids), food_id=food_id)
+				self._submit(self._foods, food_id, job)
+			return RecomputeJobOut.model_validate(job)
+
+	def submit_recipe(self, recipe_id: int) -> RecomputeJobOut:
+		"""Rebuild every recipe that uses this one as a sub-recipe, at any depth."""
+		with self._cond:
+			job = self._components.get(recipe_id)
+			if job is None:
+				job = RecomputeJob(id=next(self._ids), recipe_id=recipe_id)
+				self._submit(self._components, recipe_id, job)
+			return RecomputeJobOut.model_validate(job)
+
+	def get_job(self, job_id: int) -> Optional[RecomputeJobOut]:
+		with self._cond:
+			job = self._jobs.get(job_id)
+			return None if job is None else RecomputeJobOut.model_validate(job)
+
+	def list_jobs(
+		self, *, food_id: Optional[int] = None, recipe_id: Optional[int] = None, limit: int = 100
+	) -> List[RecomputeJobOut]:
+		with self._cond:
+			jobs = [
+				j
+				for j in reversed(self._jobs.values())
+				if (food_id is None or j.food_id == food_id)
+				and (recipe_id is None or j.recipe_id == recipe_id)
+			]
+			return [RecomputeJobOut.model_validate(j) for j in jobs[:limit]]
+
+	def status(self) -> RecomputeStatusOut:
+		with self._cond:
+			return RecomputeStatusOut(
+				pending_foods=len(self._foods),
+				pending_components=len(self._components),
+				pending_recipes=len(self._recipes),
+				recomputed_total=self._recomputed_total,
+				active_jobs=[
+					RecomputeJobOut.model_validate(j)
+					for j in self._jobs.values()
+					if j.status in ("queued", "running")
+				],
+			)
+
+	def wait_idle(self, timeout: Optional[float] = None) -> bool:
+		with self._cond:
+			return self._cond.wait_for(self._is_idle, timeout)
+
+	def stop(self, timeout: Optional[float] = 5.0) -> None:
+		with self._cond:
+			self._stopping = True
+			self._cond.notify_all()
+			thread = self._thread
+		if thread is not None:
+			thread.join(timeout)
+		with self._cond:
+			self._thread = None
+			self._stopping = False
+
+	def _is_idle(self) -> bool:
+		return not (self._busy or self._foods or self._components or self._recipes)
+
+	def _submit(
+		self,
+		pending: "OrderedDict[int, RecomputeJob]",
+		key: int,
+		job: RecomputeJob,
+	) -> None:
+		self._remember(job)
+		pending[key] = job
+		self._ensure_worker()
+		self._cond.notify_all()
+
+	def _remember(self, job: RecomputeJob) -> None:
+		self._jobs[job.id] = job
+		while len(self._jobs) > self._job_history:
+			self._jobs.popitem(last=False)
+
+	def _ensure_worker(self) -> None:
+		if self._thread is None or not self._thread.is_alive():
+			self._thread = threading.Thread(target=self._run, name="recipe-recompute", daemon=True)
+			self._thread.start()
+
+	def _run(self) -> None:
+		while True:
+			resolve_jobs: List[RecomputeJob] = []
+			batch: List[Tuple[int, List[RecomputeJob]]] = []
+			with self._cond:
+				self._cond.wait_for(lambda: self._stopping or not self._is_idle())
+				if self._stopping:
+					return
+				self._busy = True
+				if self._foods or self._components:
+					resolve_jobs = [*self._foods.values(), *self._components.values()]
+					self._foods.clear()
+					self._components.clear()
+				else:
+					while self._recipes and len(batch) < self._batch_size:
+						batch.append(self._recipes.popitem(last=False))
+			try:
+				if resolve_jobs:
+					self._resolve(resolve_jobs)
+				else:
+					self._recompute(batch)
+			except Exception as exc:
+				logger.exception("Recipe recompute failed")
+				with self._cond:
+					failed = resolve_jobs or [job for _, jobs in batch for job in jobs]
+					for job in failed:
+						if job.status != "failed":
+							job._finish("failed", str(exc))
+			finally:
+				with self._cond:
+					self._busy = False
+					self._cond.notify_all()
+
+	def _resolve(self, jobs: List[RecomputeJob]) -> None:
+		resolved: Dict[int, List[int]] = {}
+		with self._read_scope() as session:
+			recipes = RecipeRepository(session)
+			service = RecipeService(recipes, FoodRepository(session))
+			for job in jobs:
+				if job.food_id is not None:
+					direct = recipes.recipe_ids_using_food(food_id=job.food_id)
+					resolved[job.id] = service.recompute_order(direct)
+				else:
+					recipe_id = cast(int, job.recipe_id)
+					resolved[job.id] = service.recompute_order([recipe_id], include_seeds=False)
+		with self._cond:
+			for job in jobs:
+				recipe_ids = resolved[job.id]
+				job.total = len(recipe_ids)
+				if not recipe_ids:
+					job._finish("done")
+					continue
+				job.status = "running"
+				for recipe_id in recipe_ids:
+					self._recipes.setdefault(recipe_id, []).append(job)
+					# Already-queued ids move behind this job's sub-recipes; whatever depends on
+					# them is in this job's (topologically ordered) set as well
+					self._recipes.move_to_end(recipe_id)
+
+	def _recompute(self, batch: List[Tuple[int, List[RecomputeJob]]]) -> None:
+		with self._session_scope() as session:
+			service = RecipeService(RecipeRepository(session), FoodRepository(session))
+			service.recalculate_many([recipe_id for recipe_id, _ in batch])
+		with self._cond:
+			self._recomputed_total += len(batch)
+			for _, jobs in batch:
+				for job in jobs:
+					job.done += 1
+					if job.status == "running" and job.done >= (job.total or 0):
+						job._finish("done")
+
+
+recompute_queue = RecomputeQueue()
@@ -2,14 +2,30 @@ from __future__ import annotations
 
 from fastapi import FastAPI
 
+from app.api.metrics import router as metrics_router
 from app.api.v1 import api_v1_router
 from app.core.config import settings
-from app.core.database import Base, engine
+from app.core.database import Base, async_engine, engine, get_session
+from app.core.events import changes
+from app.core.metrics import MetricsMiddleware, instrument_sql
+from app.domain.models import ensure_food_search_index, upgrade_schema
+from app.domain.repositories import FoodRepository, RecipeRepository, food_cache, food_catalog
+from app.domain.services import (
+	RecipeService,
+	change_feed,
+	food_filter_index,
+	recipe_reads,
+	recompute_queue,
+)
 
 
 def create_app() -> FastAPI:
 	app = FastAPI(title=settings.title, version=settings.version)
 	app.include_router(api_v1_router, prefix="/api/v1")
+	if settings.metrics.enabled:
+		instrument_sql()
+		app.add_middleware(MetricsMiddleware, warn_query_count=settings.metrics.warn_query_count)
+		app.include_router(metrics_router)
 	return app
 
 
@@ -19,3 +35,42 @@ app = create_app()
 @app.on_event("startup")
 def on_startup() -> None:
 	Base.metadata.create_all(bind=engine)
+	with engine.begin() as connection:
+		rebuild_totals = upgrade_schema(connection)
+		ensure_food_search_index(connection)
+	if rebuild_totals:
+		# Totals written before the upgrade may be stale or hold overrides counted twice
+		with get_session() as session:
+			RecipeService(RecipeRepository(session), FoodRepository(session)).recalculate_all()
+	# Subscribers run in order: evict cached foods before recompute work is queued
+	changes.subscribe(food_catalog.handle_change)
+	changes.subscribe(food_cache.handle_change)
+	changes.subscribe(recompute_queue.handle_change)
+	changes.subscribe(food_filter_index.handle_change)
+	changes.subscribe(recipe_reads.handle_change)
+	# Other workers' commits arrive through the change_log table
+	change_feed.add_reset_hook(food_catalog.invalidate)
+	change_feed.add_reset_hook(food_cache.clear)
+	change_feed.add_reset_hook(food_filter_index.invalidate)
+	change_feed.add_reset_hook(recipe_reads.clear)
+	if settings.change_feed.enabled:
+		change_feed.start()
+	# Maps the snapshot another worker (or an earlier run) wrote; otherwise writes one in the
+	# background
+	food_catalog.start()
+	if food_catalog.ready and settings.filter_index.enabled:
+		food_filter_index.rebuild()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+	change_feed.stop()
+	changes.unsubscribe(recipe_reads.handle_change)
+	changes.unsubscribe(recompute_queue.handle_change)
+	changes.unsubscribe(food_filter_index.handle_change)
+	changes.unsubscribe(food_cache.handle_change)
+	changes.unsubscribe(food_catalog.handle_change)
+	recompute_queue.stop()
+	food_filter_index.stop()
+	food_catalog.stop()
+	await async_engine.dispose()
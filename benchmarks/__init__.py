@@ -0,0 +1,6 @@
+"""
+Service-layer microbenchmarks over deterministic synthetic catalogs.
+
+    python -m benchmarks run --scale 1000x200 --scale 100000x20000 --output bench.json
+    python -m benchmarks compare bench.json baseline.json --threshold 0.15
+"""
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+	from benchmarks.catalog import CatalogSpec
+
+
+def _parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(
+		prog="python -m benchmarks",
+		description="Service-layer microbenchmarks",
+	)
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	run = commands.add_parser("run", help="build synthetic catalogs and time the service layer")
+	run.add_argument(
+		"--scale",
+		action="append",
+		dest="scales",
+		help="FOODSxRECIPES, repeatable (default: 1000x200 and 10000x2000)",
+	)
+	run.add_argument("--items", default="5-50", help="items per recipe, MIN-MAX (default: 5-50)")
+	run.add_argument("--seed", type=int, default=0)
+	run.add_argument("--repeat", type=int, default=3)
+	run.add_argument(
+		"--case",
+		action="append",
+		dest="cases",
+		help="only run these cases (repeatable)",
+	)
+	run.add_argument(
+		"--database",
+		type=Path,
+		help="SQLite file to (re)create; default: a temporary file",
+	)
+	run.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+	run.add_argument(
+		"--baseline",
+		type=Path,
+		help="compare against this results file after the run",
+	)
+	run.add_argument("--threshold", type=float, default=0.15)
+
+	load = commands.add_parser(
+		"load",
+		help="drive app.main:app in-process with concurrent simulated clients",
+	)
+	load.add_argument(
+		"--scale",
+		default="2000x400",
+		help="catalog FOODSxRECIPES (default: 2000x400)",
+	)
+	load.add_argument("--clients", type=int, default=32)
+	load.add_argument("--duration", type=float, default=10.0, help="seconds (default: 10)")
+	load.add_argument("--requests", type=int, help="stop after this many requests in total")
+	load.add_argument(
+		"--mix",
+		help="operation weights, e.g. food_get=60,recipe_get=30,food_update=10",
+	)
+	load.add_argument("--seed", type=int, default=0)
+	load.add_argument(
+		"--database",
+		type=Path,
+		help="SQLite file to (re)create; default: a temporary file",
+	)
+	load.add_argument("--output", type=Path, help="also write the report as JSON")
+
+	cmp = commands.add_parser("compare", help="compare a results file against a baseline")
+	cmp.add_argument("current", type=Path)
+	cmp.add_argument("baseline", type=Path)
+	cmp.add_argument(
+		"--threshold",
+		type=float,
+		default=0.15,
+		help="relative change flagged (default: 0.15)",
+	)
+	return parser
+
+
+def _compare(current: dict, baseline_path: Path, threshold: float) -> int:  # type: ignore[type-arg]
+	from benchmarks.compare import compare, format_table
+
+	rows = compare(current, json.loads(baseline_path.read_text()), threshold=threshold)
+	print(format_table(rows))
+	regressions = [r for r in rows if r.status == "regression"]
+	if regressions:
+		print(f"{len(regressions)} regression(s) above {threshold:.0%}", file=sys.stderr)
+		return 1
+	return 0
+
+
+def _load(args: argparse.Namespace, spec: "CatalogSpec") -> int:
+	import asyncio
+
+	from benchmarks.load import DEFAULT_MIX, LoadProfile, format_report, run_app_under_load
+
+	profile = LoadProfile(
+		clients=args.clients,
+		duration=args.duration,
+		max_requests=args.requests,
+		mix=LoadProfile.parse_mix(args.mix) if args.mix else dict(DEFAULT_MIX),
+		seed=args.seed,
+	)
+	report = asyncio.run(run_app_under_load(spec, profile))
+	print(format_report(report))
+	if args.output is not None:
+		args.output.write_text(json.dumps(report, indent=2) + "\n")
+	return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	args = _parser().parse_args(argv)
+	if args.command == "compare":
+		return _compare(json.loads(args.current.read_text()), args.baseline, args.threshold)
+
+	# The engines are created at import time from settings: point them at the bench database first
+	database = args.database or Path(tempfile.mkdtemp(prefix="nutrition-bench-")) / "bench.db"
+	os.environ["APP_SQLITE__DATABASE_PATH"] = f"sqlite+sqlite:///{database}"
+	from benchmarks.catalog import CatalogSpec
+
+	if args.command == "load":
+		return _load(args, CatalogSpec.parse(args.scale, seed=args.seed))
+
+	from benchmarks.suite import run_suite
+
+	low, _, high = args.items.partition("-")
+	specs = [
+		CatalogSpec.parse(value, min_items=int(low), max_items=int(high or low), seed=args.seed)
+		for value in (args.scales or ["1000x200", "10000x2000"])
+	]
+	results = run_suite(specs, repeat=args.repeat, cases=args.cases, log=print)
+	args.output.write_text(json.dumps(results, indent=2) + "\n")
+	print(f"wrote {args.output} ({database})")
+	if args.baseline is not None:
+		return _compare(results, args.baseline, args.threshold)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import importlib.util
+import random
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.domain.models import Food, Recipe, RecipeItem
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.services import RecipeService
+
+_WORDS = (
+	"apple", "barley", "bean", "beef", "broth", "butter", "carrot", "cheese", "chicken", "corn",
+	"cream", "egg", "flour", "garlic", "honey", "lentil", "milk", "oat", "onion", "pasta",
+	"pepper", "pork", "potato", "rice", "salmon", "spinach", "sugar", "tofu", "tomato", "yogurt",
+)  # fmt: skip
+
+
+@dataclass(frozen=True)
+class CatalogSpec:
+	"""Size and shape of a synthetic catalog; the same spec and seed always give the same rows."""
+
+	foods: int
+	recipes: int
+	min_items: int = 5
+	max_items: int = 50
+	seed: int = 0
+
+	@property
+	def label(self) -> str:
+		return f"{self.foods}x{self.recipes}"
+
+	@classmethod
+	def parse(cls, value: str, **kwargs: Any) -> CatalogSpec:
+		"""'100000x20000' -> 100k foods and 20k recipes."""
+		foods, _, recipes = value.lower().partition("x")
+		return cls(foods=int(foods), recipes=int(recipes or 0), **kwargs)
+
+
+def food_rows(spec: CatalogSpec) -> Iterator[Dict[str, Any]]:
+	rng = random.Random(spec.seed)
+	for i in range(1, spec.foods + 1):
+		unit = rng.choices(("serving", "g", "ml"), weights=(6, 3, 1))[0]
+		protein, carbs, fat = rng.uniform(0, 30), rng.uniform(0, 80), rng.uniform(0, 40)
+		additional = {"vitamin_c_mg": round(rng.uniform(0, 90), 2)} if rng.random() < 0.2 else {}
+		if rng.random() < 0.05:
+			additional["iron_mg"] = round(rng.uniform(0, 8), 2)
+		yield {
+			"name": f"{rng.choice(_WORDS).title()} {rng.choice(_WORDS)} {i:07d}",
+			"calories": int(protein * 4 + carbs * 4 + fat * 9),
+			"protein_g": round(protein, 2),
+			"carbs_g": round(carbs, 2),
+			"fat_g": round(fat, 2),
+			"fiber_g": round(rng.uniform(0, 12), 2),
+			"sugar_g": round(rng.uniform(0, carbs), 2),
+			"saturated_fat_g": round(rng.uniform(0, fat), 2),
+			"sodium_mg": round(rng.uniform(0, 1500), 1),
+			"potassium_mg": round(rng.uniform(0, 900), 1),
+			"cholesterol_mg": round(rng.uniform(0, 200), 1),
+			"additional_nutrients": additional,
+			"serving_size": 1.0 if unit == "serving" else 100.0,
+			"serving_unit": unit,
+			"grams_per_ml": round(rng.uniform(0.8, 1.4), 3) if unit == "ml" else None,
+			"version": 1,
+		}
+
+
+def recipe_rows(spec: CatalogSpec) -> Iterator[Dict[str, Any]]:
+	rng = random.Random(spec.seed + 1)
+	for i in range(1, spec.recipes + 1):
+		yield {
+			"name": f"Recipe {i:07d}",
+			"servings": float(rng.randint(1, 8)),
+			"serving_unit": "serving",
+			"additional_nutrients": {},
+			"nutrient_overrides": {},
+			"version": 1,
+		}
+
+
+def item_rows(spec: CatalogSpec) -> Iterator[Dict[str, Any]]:
+	"""Items for recipes 1..spec.recipes, each using min_items..max_items random foods."""
+	rng = random.Random(spec.seed + 2)
+	for recipe_id in range(1, spec.recipes + 1):
+		for _ in range(rng.randint(spec.min_items, spec.max_items)):
+			unit = rng.choices(("serving", "g", "ml", "piece"), weights=(5, 3, 1, 1))[0]
+			food_id = rng.randint(1, spec.foods)
+			if unit in ("g", "ml"):
+				quantity = round(rng.uniform(5, 250), 1)
+			else:
+				quantity = float(rng.randint(1, 4))
+			yield {"recipe_id": recipe_id, "food_id": food_id, "quantity": quantity, "unit": unit}
+
+
+def build_catalog(session: Session, spec: CatalogSpec, *, chunk_size: int = 10_000) -> None:
+	"""
+	Bulk-insert the catalog into empty tables (ids then run 1..n) and store every recipe's totals.
+	Totals use the vectorized engine when numpy is installed.
+	"""
+	for model, rows in (
+		(Food, food_rows(spec)),
+		(Recipe, recipe_rows(spec)),
+		(RecipeItem, item_rows(spec)),
+	):
+		chunk: List[Dict[str, Any]] = []
+		for row in rows:
+			chunk.append(row)
+			if len(chunk) >= chunk_size:
+				session.execute(insert(model), chunk)
+				chunk = []
+		if chunk:
+			session.execute(insert(model), chunk)
+	session.commit()
+
+	service = RecipeService(RecipeRepository(session), FoodRepository(session))
+	if importlib.util.find_spec("numpy") is not None:
+		service.recalculate_all()
+	else:
+		ids = list(session.scalars(select(Recipe.id).order_by(Recipe.id)))
+		for start in range(0, len(ids), 500):
+			service.recalculate_many(ids[start : start + 500])
+			session.flush()
+	session.commit()
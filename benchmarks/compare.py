@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+@dataclass
+class Comparison:
+	case: str
+	scale: str
+	baseline_us: Optional[float]
+	current_us: float
+	ratio: Optional[float]
+	status: str  # ok|regression|improvement|new
+
+
+def compare(
+	current: Mapping[str, Any],
+	baseline: Mapping[str, Any],
+	*,
+	threshold: float = 0.15,
+	metric: str = "median_us",
+) -> List[Comparison]:
+	"""
+	Match results on (case, scale) and flag medians that moved by more than `threshold`
+	(0.15 = 15% slower is a regression, 15% faster an improvement).
+	"""
+	previous: Dict[Tuple[str, str], float] = {
+		(r["case"], r["scale"]): r[metric] for r in baseline["results"]
+	}
+	out = []
+	for result in current["results"]:
+		before = previous.get((result["case"], result["scale"]))
+		now = result[metric]
+		if before is None:
+			out.append(Comparison(result["case"], result["scale"], None, now, None, "new"))
+			continue
+		ratio = now / before if before > 0 else float("inf")
+		if ratio > 1 + threshold:
+			status = "regression"
+		elif ratio < 1 - threshold:
+			status = "improvement"
+		else:
+			status = "ok"
+		out.append(
+			Comparison(result["case"], result["scale"], before, now, round(ratio, 3), status)
+		)
+	return out
+
+
+def format_table(rows: List[Comparison]) -> str:
+	lines = [
+		f"{'case':<40} {'scale':<14} {'baseline us':>12} {'current us':>12}"
+		f" {'ratio':>7}  status"
+	]
+	for row in rows:
+		baseline = "-" if row.baseline_us is None else f"{row.baseline_us:.2f}"
+		ratio = "-" if row.ratio is None else f"{row.ratio:.2f}"
+		lines.append(
+			f"{row.case:<40} {row.scale:<14} {baseline:>12} {row.current_us:>12.2f}"
+			f" {ratio:>7}  {row.status}"
+		)
+	return "\n".join(lines)
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+import itertools
+import json
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+from benchmarks.catalog import CatalogSpec
+
+ASGIApp = Callable[..., Awaitable[None]]
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+BUCKETS_MS: Tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+DEFAULT_MIX: Dict[str, int] = {
+	"food_get": 35,
+	"food_list": 10,
+	"food_search": 10,
+	"recipe_get": 25,
+	"recipe_list": 5,
+	"food_create": 5,
+	"food_update": 5,
+	"recipe_add_item": 5,
+}
+
+
+@dataclass
+class LoadProfile:
+	clients: int = 32
+	duration: float = 10.0
+	# Stop after this many requests in total, whichever of the two comes first
+	max_requests: Optional[int] = None
+	mix: Mapping[str, int] = field(default_factory=lambda: dict(DEFAULT_MIX))
+	seed: int = 0
+
+	@staticmethod
+	def parse_mix(value: str) -> Dict[str, int]:
+		"""'food_get=60,food_update=10' -> weights; unknown operation names are rejected."""
+		mix: Dict[str, int] = {}
+		for part in filter(None, (p.strip() for p in value.split(","))):
+			name, _, weight = part.partition("=")
+			if name not in OPERATIONS:
+				raise ValueError(
+					f"Unknown operation {name!r}; expected one of {', '.join(OPERATIONS)}"
+				)
+			mix[name] = int(weight or 1)
+		return mix
+
+
+@dataclass
+class RouteStats:
+	route: str
+	requests: int = 0
+	errors: int = 0  # 5xx or an exception
+	client_errors: int = 0  # 4xx
+	latencies_ms: List[float] = field(default_factory=list, repr=False)
+
+	def record(self, status: int, elapsed_ms: float) -> None:
+		self.requests += 1
+		self.latencies_ms.append(elapsed_ms)
+		if status >= 500 or status == 0:
+			self.errors += 1
+		elif status >= 400:
+			self.client_errors += 1
+
+	def summary(self, duration: float) -> Dict[str, Any]:
+		ordered = sorted(self.latencies_ms)
+		histogram = [0] * (len(BUCKETS_MS) + 1)
+		for value in ordered:
+			# First bucket whose bound is >= value; past the last bound lands in the overflow slot
+			histogram[bisect.bisect_left(BUCKETS_MS, value)] += 1
+		return {
+			"route": self.route,
+			"requests": self.requests,
+			"throughput_rps": round(self.requests / duration, 1) if duration else 0.0,
+			"error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+			"client_error_rate": (
+				round(self.client_errors / self.requests, 4) if self.requests else 0.0
+			),
+			"p50_ms": _percentile(ordered, 0.50),
+			"p95_ms": _percentile(ordered, 0.95),
+			"p99_ms": _percentile(ordered, 0.99),
+			"max_ms": round(ordered[-1], 3) if ordered else 0.0,
+			"histogram": {
+				**{f"<={bound:g}ms": histogram[i] for i, bound in enumerate(BUCKETS_MS)},
+				f">{BUCKETS_MS[-1]:g}ms": histogram[-1],
+			},
+		}
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+	# Nearest-rank percentile
+	if not ordered:
+		return 0.0
+	return round(ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.999999) - 1))], 3)
+
+
+async def asgi_request(
+	app: ASGIApp, method: str, path: str, *, query: str = "", body: Any = None
+) -> Tuple[int, bytes]:
+	"""One HTTP request straight into the ASGI app, with no sockets or client library in between."""
+	payload = b"" if body is None else json.dumps(body).encode()
+	scope = {
+		"type": "http",
+		"asgi": {"version": "3.0"},
+		"http_version": "1.1",
+		"method": method,
+		"scheme": "http",
+		"path": path,
+		"raw_path": path.encode(),
+		"query_string": query.encode(),
+		"root_path": "",
+		"headers": [
+			(b"host", b"loadtest"),
+			(b"content-type", b"application/json"),
+			(b"content-length", str(len(payload)).encode()),
+		],
+		"client": ("127.0.0.1", 50000),
+		"server": ("loadtest", 80),
+	}
+	received = False
+	status = 0
+	chunks: List[bytes] = []
+
+	async def receive() -> Dict[str, Any]:
+		nonlocal received
+		if not received:
+			received = True
+			return {"type": "http.request", "body": payload, "more_body": False}
+		# Only streaming responses listen for a disconnect; they are cancelled once done
+		await asyncio.Future()
+		return {"type": "http.disconnect"}
+
+	async def send(message: Dict[str, Any]) -> None:
+		nonlocal status
+		if message["type"] == "http.response.start":
+			status = message["status"]
+		elif message["type"] == "http.response.body":
+			chunks.append(message.get("body", b""))
+
+	await app(scope, receive, send)
+	return status, b"".join(chunks)
+
+
+@asynccontextmanager
+async def lifespan(app: ASGIApp) -> AsyncIterator[None]:
+	"""Run the app's startup and shutdown handlers through the ASGI lifespan protocol."""
+	inbox: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+	outbox: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+	task = asyncio.create_task(
+		app({"type": "lifespan", "asgi": {"version": "3.0"}}, inbox.get, outbox.put)
+	)
+
+	async def step(event: str) -> None:
+		await inbox.put({"type": f"lifespan.{event}"})
+		message = await outbox.get()
+		if message["type"] != f"lifespan.{event}.complete":
+			raise RuntimeError(f"Lifespan {event} failed: {message.get('message', message)}")
+
+	await step("startup")
+	try:
+		yield
+	finally:
+		await step("shutdown")
+		await task
+
+
+class _Workload:
+	"""Request factory over a catalog built from `spec`, so every id it picks exists."""
+
+	def __init__(self, spec: CatalogSpec, rng: random.Random) -> None:
+		self.rng = rng
+		self._spec = spec
+		self._names = itertools.count(1)
+
+	def new_name(self) -> str:
+		return f"Load Food {next(self._names):08d}"
+
+	def food_id(self) -> int:
+		return self.rng.randint(1, self._spec.foods)
+
+	def recipe_id(self) -> int:
+		return self.rng.randint(1, self._spec.recipes)
+
+
+Request = Tuple[str, str, str, str, Any]  # route label, method, path, query, json body
+Operation = Callable[[_Workload], Request]
+
+_SEARCH_TERMS = ("chick", "rice", "tom", "past", "oat", "yog", "salm", "pota")
+
+OPERATIONS: Dict[str, Operation] = {
+	"food_get": lambda w: ("GET /foods/{id}", "GET", f"/api/v1/foods/{w.food_id()}", "", None),
+	"food_list": lambda w: ("GET /foods", "GET", "/api/v1/foods/", "limit=50", None),
+	"food_search": lambda w: (
+		"GET /foods/search",
+		"GET",
+		"/api/v1/foods/search",
+		f"q={w.rng.choice(_SEARCH_TERMS)}&limit=20",
+		None,
+	),
+	"recipe_get": lambda w: (
+		"GET /recipes/{id}",
+		"GET",
+		f"/api/v1/recipes/{w.recipe_id()}",
+		"",
+		None,
+	),
+	"recipe_list": lambda w: ("GET /recipes", "GET", "/api/v1/recipes/", "limit=20", None),
+	"food_create": lambda w: (
+		"POST /foods",
+		"POST",
+		"/api/v1/foods/",
+		"",
+		{"name": w.new_name(), "calories": 120, "protein_g": 4, "carbs_g": 20, "fat_g": 3},
+	),
+	"food_update": lambda w: (
+		"PATCH /foods/{id}",
+		"PATCH",
+		f"/api/v1/foods/{w.food_id()}",
+		"",
+		{"calories": w.rng.randint(50, 500)},
+	),
+	"recipe_add_item": lambda w: (
+		"POST /recipes/{id}/items",
+		"POST",
+		f"/api/v1/recipes/{w.recipe_id()}/items",
+		"",
+		{"food_id": w.food_id(), "quantity": 1},
+	),
+}
+
+
+async def run_load(app: Any, spec: CatalogSpec, profile: LoadProfile) -> Dict[str, Any]:
+	"""
+	Drive `app` with `profile.clients` concurrent simulated clients, each sending requests
+	back to back (picked by the weighted mix) until the duration or request budget runs out.
+	"""
+	rng = random.Random(profile.seed)
+	workload = _Workload(spec, rng)
+	names = [name for name, weight in profile.mix.items() if weight > 0]
+	weights = [profile.mix[name] for name in names]
+	stats: Dict[str, RouteStats] = {}
+	budget = itertools.count()
+	deadline = time.perf_counter() + profile.duration
+
+	async def client() -> None:
+		while time.perf_counter() < deadline:
+			if profile.max_requests is not None and next(budget) >= profile.max_requests:
+				return
+			route, method, path, query, body = OPERATIONS[rng.choices(names, weights)[0]](workload)
+			started = time.perf_counter()
+			try:
+				status, _ = await asgi_request(app, method, path, query=query, body=body)
+			except Exception:
+				status = 0
+			elapsed_ms = (time.perf_counter() - started) * 1000
+			stats.setdefault(route, RouteStats(route)).record(status, elapsed_ms)
+
+	started = time.perf_counter()
+	await asyncio.gather(*(client() for _ in range(profile.clients)))
+	elapsed = time.perf_counter() - started
+	overall = RouteStats("*")
+	for route_stats in stats.values():
+		overall.requests += route_stats.requests
+		overall.errors += route_stats.errors
+		overall.client_errors += route_stats.client_errors
+		overall.latencies_ms.extend(route_stats.latencies_ms)
+	return {
+		"profile": {**asdict(profile), "mix": dict(profile.mix)},
+		"catalog": spec.label,
+		"elapsed_s": round(elapsed, 3),
+		"overall": overall.summary(elapsed),
+		"routes": [stats[route].summary(elapsed) for route in sorted(stats)],
+	}
+
+
+def format_report(report: Mapping[str, Any]) -> str:
+	lines = [
+		f"{report['profile']['clients']} clients, catalog {report['catalog']},"
+		f" {report['elapsed_s']}s",
+		f"{'route':<28} {'reqs':>7} {'rps':>8} {'err%':>6} {'4xx%':>6} {'p50 ms':>8}"
+		f" {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}",
+	]
+	for row in [*report["routes"], report["overall"]]:
+		lines.append(
+			f"{row['route']:<28} {row['requests']:>7} {row['throughput_rps']:>8.1f}"
+			f" {row['error_rate'] * 100:>6.2f} {row['client_error_rate'] * 100:>6.2f}"
+			f" {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}"
+			f" {row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}"
+		)
+	return "\n".join(lines)
+
+
+async def run_app_under_load(spec: CatalogSpec, profile: LoadProfile) -> Dict[str, Any]:
+	"""Build the catalog, start app.main:app's lifespan, run the load, then shut it down."""
+	from app.core.database import Base, SessionLocal, engine
+	from app.main import app
+	from benchmarks.catalog import build_catalog
+
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with SessionLocal() as session:
+		build_catalog(session, spec)
+	async with lifespan(app):
+		return await run_load(app, spec, profile)
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+import platform
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pydantic
+import sqlalchemy
+from sqlalchemy.orm import Session
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.pagination import Cursor
+from app.core.units import to_serving_multiplier
+from app.domain.repositories import FoodRepository, RecipeRepository, food_cache
+from app.domain.schemas import FoodCreate
+from app.domain.services import FoodService, RecipeService
+from benchmarks.catalog import CatalogSpec, build_catalog
+
+FORMAT_VERSION = 1
+
+
+@dataclass
+class BenchResult:
+	case: str
+	scale: str
+	ops: int
+	median_us: float
+	mean_us: float
+	p95_us: float
+	min_us: float
+
+	@classmethod
+	def from_samples(cls, case: str, scale: str, samples_ns: Sequence[float]) -> BenchResult:
+		ordered = sorted(samples_ns)
+		p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+		return cls(
+			case=case,
+			scale=scale,
+			ops=len(ordered),
+			median_us=round(statistics.median(ordered) / 1000, 3),
+			mean_us=round(statistics.fmean(ordered) / 1000, 3),
+			p95_us=round(p95 / 1000, 3),
+			min_us=round(ordered[0] / 1000, 3),
+		)
+
+
+def bench_create_food(session: Session, spec: CatalogSpec, ops: int) -> List[int]:
+	service = FoodService(FoodRepository(session))
+	samples = []
+	for i in range(ops):
+		data = FoodCreate(name=f"Bench New {i:06d}", calories=100, protein_g=5, carbs_g=10, fat_g=3)
+		start = time.perf_counter_ns()
+		service.create_food(data=data)
+		samples.append(time.perf_counter_ns() - start)
+	session.rollback()
+	return samples
+
+
+def _sample_recipe_ids(spec: CatalogSpec, ops: int) -> List[int]:
+	rng = random.Random(spec.seed + 3)
+	return rng.sample(range(1, spec.recipes + 1), min(ops, spec.recipes))
+
+
+def bench_recalculate_totals(session: Session, spec: CatalogSpec, ops: int) -> List[int]:
+	# Items and foods are loaded up front: only the in-memory aggregation is timed
+	recipes = RecipeRepository(session)
+	service = RecipeService(recipes, FoodRepository(session))
+	loaded = recipes.list_by_ids(_sample_recipe_ids(spec, ops), with_items=True)
+	foods = FoodRepository(session).get_snapshots(
+		i.food_id for r in loaded for i in r.items if i.food_id
+	)
+	samples = []
+	for recipe in loaded:
+		start = time.perf_counter_ns()
+		service._recalculate_totals(recipe, foods)
+		samples.append(time.perf_counter_ns() - start)
+	session.rollback()
+	return samples
+
+
+def bench_to_out(session: Session, spec: CatalogSpec, ops: int) -> List[int]:
+	recipes = RecipeRepository(session)
+	service = RecipeService(recipes, FoodRepository(session))
+	loaded = recipes.list_by_ids(_sample_recipe_ids(spec, ops), with_items=True)
+	samples = []
+	for recipe in loaded:
+		start = time.perf_counter_ns()
+		service._to_out(recipe)
+		samples.append(time.perf_counter_ns() - start)
+	session.rollback()
+	return samples
+
+
+def bench_list_recipes(
+	session: Session,
+	spec: CatalogSpec,
+	ops: int,
+	*,
+	page_size: int = 100,
+) -> List[int]:
+	"""One op is a keyset page of `page_size` recipes with items, materialized as RecipeOut."""
+	service = RecipeService(RecipeRepository(session), FoodRepository(session))
+	samples = []
+	after: Optional[Cursor] = None
+	for _ in range(ops):
+		start = time.perf_counter_ns()
+		page = list(service.list_recipes(limit=page_size, after=after))
+		samples.append(time.perf_counter_ns() - start)
+		# Wrap around at the end of the catalog
+		after = Cursor(sort="id", last_id=page[-1].id) if len(page) == page_size else None
+		session.expunge_all()
+	session.rollback()
+	return samples
+
+
+def bench_to_serving_multiplier(ops: int, *, batch: int = 1000) -> List[float]:
+	"""Per-call cost, measured over batches of calls to amortize the timer."""
+	cases = [
+		{
+			"quantity": 150.0,
+			"unit": "g",
+			"food_serving_size": 100.0,
+			"food_serving_unit": "g",
+			"grams_per_ml": None,
+		},
+		{
+			"quantity": 200.0,
+			"unit": "ml",
+			"food_serving_size": 100.0,
+			"food_serving_unit": "g",
+			"grams_per_ml": 1.03,
+		},
+		{
+			"quantity": 2.0,
+			"unit": "piece",
+			"food_serving_size": 1.0,
+			"food_serving_unit": "serving",
+			"grams_per_ml": None,
+		},
+	]
+	samples = []
+	for _ in range(max(1, ops // batch)):
+		start = time.perf_counter_ns()
+		for i in range(batch):
+			to_serving_multiplier(**cases[i % 3])  # type: ignore[arg-type]
+		samples.append((time.perf_counter_ns() - start) / batch)
+	return samples
+
+
+SessionCase = Callable[[Session, CatalogSpec, int], List[int]]
+
+SESSION_CASES: Dict[str, SessionCase] = {
+	"food_service.create_food": bench_create_food,
+	"recipe_service._recalculate_totals": bench_recalculate_totals,
+	"recipe_service.list_recipes": bench_list_recipes,
+	"recipe_service._to_out": bench_to_out,
+}
+
+# Ops per case and repeat
+DEFAULT_OPS: Dict[str, int] = {
+	"food_service.create_food": 200,
+	"recipe_service._recalculate_totals": 200,
+	"recipe_service.list_recipes": 20,
+	"recipe_service._to_out": 200,
+	"units.to_serving_multiplier": 100_000,
+}
+
+
+def environment() -> Dict[str, Any]:
+	try:
+		import numpy
+
+		numpy_version: Optional[str] = numpy.__version__
+	except ImportError:
+		numpy_version = None
+	return {
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"sqlalchemy": sqlalchemy.__version__,
+		"pydantic": pydantic.VERSION,
+		"numpy": numpy_version,
+	}
+
+
+def run_suite(
+	specs: Sequence[CatalogSpec],
+	*,
+	repeat: int = 3,
+	ops: Optional[Dict[str, int]] = None,
+	cases: Optional[Sequence[str]] = None,
+	log: Callable[[str], None] = lambda message: None,
+) -> Dict[str, Any]:
+	"""
+	Build each catalog into freshly created tables and time every case on it.
+	Samples from all repeats are pooled per (case, scale); the database is left holding the
+	last catalog.
+	"""
+	counts = {**DEFAULT_OPS, **(ops or {})}
+	selected = list(cases or DEFAULT_OPS)
+	results: List[BenchResult] = []
+	if "units.to_serving_multiplier" in selected:
+		samples: List[float] = []
+		for _ in range(repeat):
+			samples.extend(bench_to_serving_multiplier(counts["units.to_serving_multiplier"]))
+		results.append(BenchResult.from_samples("units.to_serving_multiplier", "-", samples))
+		log(f"  units.to_serving_multiplier              median {results[-1].median_us:>10.3f} us")
+	for spec in specs:
+		log(f"building catalog {spec.label}")
+		Base.metadata.drop_all(bind=engine)
+		Base.metadata.create_all(bind=engine)
+		with SessionLocal() as session:
+			started = time.perf_counter()
+			build_catalog(session, spec)
+			log(f"  built in {time.perf_counter() - started:.1f}s")
+		for case, bench in SESSION_CASES.items():
+			if case not in selected:
+				continue
+			samples = []
+			for _ in range(repeat):
+				# Cold food cache per repeat, so every repeat measures the same thing
+				food_cache.clear()
+				with SessionLocal() as session:
+					samples.extend(bench(session, spec, counts[case]))
+			result = BenchResult.from_samples(case, spec.label, samples)
+			log(f"  {case:<40} median {result.median_us:>10.1f} us  p95 {result.p95_us:>10.1f} us")
+			results.append(result)
+	return {
+		"format": FORMAT_VERSION,
+		"created_at": datetime.now(timezone.utc).isoformat(),
+		"environment": environment(),
+		"seed": specs[0].seed if specs else 0,
+		"results": [asdict(r) for r in results],
+	}
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.core.database import Base, engine, get_async_read_session, get_async_session
+from app.domain.schemas import FoodCreate, FoodUpdate, RecipeCreate, RecipeItemIn
+from app.domain.services import AsyncFoodService, AsyncRecipeService
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+
+
+async def _write_then_read():
+	async with get_async_session() as session:
+		foods = AsyncFoodService(session)
+		oats = await foods.create_food(
+			data=FoodCreate(name="Async Oats", calories=150, protein_g=5, carbs_g=27, fat_g=3)
+		)
+		recipe = await AsyncRecipeService(session).create_recipe(
+			RecipeCreate(name="Async Porridge", items=[RecipeItemIn(food_id=oats.id, quantity=2)])
+		)
+	async with get_async_session() as session:
+		await AsyncFoodService(session).update_food(food_id=oats.id, data=FoodUpdate(calories=160))
+	async with get_async_read_session() as session:
+		food = await AsyncFoodService(session).get_food(food_id=oats.id)
+		stored = await AsyncRecipeService(session).get_recipe(recipe.id)
+		listed = await AsyncRecipeService(session).list_recipes()
+	return food, stored, listed
+
+
+def test_async_services_write_and_read_through_async_sessions():
+	food, recipe, listed = asyncio.run(_write_then_read())
+	assert food is not None and food.calories == 160
+	assert recipe is not None and recipe.name == "Async Porridge"
+	assert [r.id for r in listed] == [recipe.id]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.core.database import Base, SessionLocal, engine
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.schemas import FoodCreate, RecipeCreate, RecipeItemIn
+from app.domain.services import FoodService, RecipeService
+from app.main import app
+
+ids: dict[str, int] = {}
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with SessionLocal() as session:
+		foods = FoodService(FoodRepository(session))
+		recipes = RecipeService(RecipeRepository(session), FoodRepository(session))
+		oats = foods.create_food(
+			data=FoodCreate(name="Batch Oats", calories=150, protein_g=5, carbs_g=27, fat_g=3)
+		)
+		milk = foods.create_food(
+			data=FoodCreate(name="Batch Milk", calories=100, protein_g=8, carbs_g=12, fat_g=2)
+		)
+		porridge = recipes.create_recipe(
+			RecipeCreate(
+				name="Batch Porridge",
+				items=[
+					RecipeItemIn(food_id=milk.id, quantity=1),
+					RecipeItemIn(food_id=oats.id, quantity=1),
+					RecipeItemIn(food_id=milk.id, quantity=0.5),
+				],
+			)
+		)
+		breakfast = recipes.create_recipe(
+			RecipeCreate(
+				name="Batch Breakfast",
+				items=[RecipeItemIn(sub_recipe_id=porridge.id, quantity=1)],
+			)
+		)
+		session.commit()
+	ids.update(oats=oats.id, milk=milk.id, porridge=porridge.id, breakfast=breakfast.id)
+
+
+def test_food_multi_get_keeps_request_order_and_reports_missing():
+	client = TestClient(app)
+	requested = f"{ids['milk']},999999,{ids['oats']},{ids['milk']}"
+	listed = client.get("/api/v1/foods/", params={"ids": requested})
+	assert listed.status_code == 200
+	assert [f["name"] for f in listed.json()] == ["Batch Milk", "Batch Oats"]
+	assert listed.headers["X-Missing-Ids"] == "999999"
+
+	payload = {"ids": [ids["oats"], 999999, ids["milk"]]}
+	batch = client.post("/api/v1/foods/batch", json=payload).json()
+	assert [f["id"] for f in batch["items"]] == [ids["oats"], ids["milk"]]
+	assert batch["missing_ids"] == [999999]
+
+	assert client.get("/api/v1/foods/", params={"ids": "1,x"}).status_code == 400
+	filtered = client.get("/api/v1/foods/", params={"ids": "1", "filter": "protein_g>1"})
+	assert filtered.status_code == 400
+	assert client.post("/api/v1/foods/batch", json={"ids": []}).status_code == 422
+
+
+def test_recipe_multi_get_can_embed_foods():
+	client = TestClient(app)
+	order = [ids["breakfast"], 999999, ids["porridge"]]
+	listed = client.get("/api/v1/recipes/", params=[("ids", str(i)) for i in order])
+	assert [r["id"] for r in listed.json()] == [ids["breakfast"], ids["porridge"]]
+	assert "foods" not in listed.json()[0]
+	assert listed.headers["X-Missing-Ids"] == "999999"
+
+	plain = client.post("/api/v1/recipes/batch", json={"ids": order}).json()
+	assert plain["missing_ids"] == [999999]
+	assert all(r["foods"] is None for r in plain["items"])
+	single = client.get(f"/api/v1/recipes/{ids['porridge']}").json()
+	assert plain["items"][1] == {**single, "foods": None}
+
+	payload = {"ids": order, "include_foods": True}
+	embedded = client.post("/api/v1/recipes/batch", json=payload).json()
+	breakfast, porridge = embedded["items"]
+	# Sub-recipes stay references; each food appears once, in first-use order
+	assert breakfast["foods"] == []
+	assert [f["name"] for f in porridge["foods"]] == ["Batch Milk", "Batch Oats"]
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from benchmarks.catalog import CatalogSpec, item_rows
+from benchmarks.compare import compare
+from benchmarks.suite import run_suite
+
+
+def test_catalog_is_deterministic_and_bounded():
+	spec = CatalogSpec.parse("50x10", min_items=2, max_items=4, seed=7)
+	items = list(item_rows(spec))
+	assert items == list(item_rows(spec))
+	assert {i["recipe_id"] for i in items} == set(range(1, 11))
+	assert all(1 <= i["food_id"] <= 50 for i in items)
+	assert 20 <= len(items) <= 40
+
+
+def test_suite_results_and_regression_flags():
+	results = run_suite(
+		[CatalogSpec(foods=60, recipes=12, min_items=2, max_items=5)],
+		repeat=1,
+		ops={
+			"food_service.create_food": 3,
+			"recipe_service.list_recipes": 2,
+			"units.to_serving_multiplier": 1000,
+		},
+	)
+	cases = {(r["case"], r["scale"]) for r in results["results"]}
+	assert ("recipe_service._recalculate_totals", "60x12") in cases
+	assert ("units.to_serving_multiplier", "-") in cases
+	assert all(r["ops"] > 0 and r["median_us"] > 0 for r in results["results"])
+
+	slower = {"results": [{**r, "median_us": r["median_us"] * 2} for r in results["results"]]}
+	statuses = {c.status for c in compare(slower, results, threshold=0.5)}
+	assert statuses == {"regression"}
+	assert {c.status for c in compare(results, results)} == {"ok"}
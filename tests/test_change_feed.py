@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from app.core.database import Base, SessionLocal, engine, get_read_session
+from app.core.events import Change, ChangeBus
+from app.domain.models import ChangeLogEntry, Food
+from app.domain.repositories import ChangeLogRepository, FoodRepository
+from app.domain.schemas import FoodCreate, FoodUpdate
+from app.domain.services import ChangeFeed, FoodService
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+
+
+def _feed(bus: ChangeBus) -> ChangeFeed:
+	# Another origin, so this process's own commits look like a second worker's
+	return ChangeFeed(bus, read_scope=get_read_session, origin="other-worker", batch_size=2)
+
+
+def test_commits_are_journaled_and_rollbacks_are_not():
+	with SessionLocal() as session:
+		service = FoodService(FoodRepository(session))
+		food = service.create_food(
+			data=FoodCreate(name="Log Apple", calories=52, protein_g=0.3, carbs_g=14, fat_g=0.2)
+		)
+		service.update_food(food_id=food.id, data=FoodUpdate(calories=53))
+		service.update_food(food_id=food.id, data=FoodUpdate(calories=54))
+		session.commit()
+		rows = session.query(ChangeLogEntry).filter(ChangeLogEntry.entity_id == food.id).all()
+		assert [(r.entity, r.action) for r in rows] == [("food", "created"), ("food", "updated")]
+
+		service.delete_food(food_id=food.id)
+		session.rollback()
+		entries = session.query(ChangeLogEntry).filter(ChangeLogEntry.entity_id == food.id)
+		assert entries.count() == 2
+
+
+def test_feed_replays_other_workers_changes_once():
+	bus = ChangeBus()
+	received: list[Change] = []
+	bus.subscribe(received.append)
+	feed = _feed(bus)
+	try:
+		feed.poll_once()  # positions the feed at the end of the log
+		with SessionLocal() as session:
+			service = FoodService(FoodRepository(session))
+			ids = [
+				service.create_food(
+					data=FoodCreate(name=f"Feed {i}", calories=1, protein_g=0, carbs_g=0, fat_g=0)
+				).id
+				for i in range(3)
+			]
+			session.commit()
+			service.delete_food(food_id=ids[0])
+			session.commit()
+
+		assert feed.poll_once() == 4
+		assert received == [Change("food", i, "created", remote=True) for i in ids] + [
+			Change("food", ids[0], "deleted", remote=True)
+		]
+		assert feed.poll_once() == 0
+	finally:
+		feed.stop()
+
+
+def test_feed_resets_caches_when_the_log_was_pruned_past_it():
+	resets: list[bool] = []
+	feed = _feed(ChangeBus())
+	feed.add_reset_hook(lambda: resets.append(True))
+	try:
+		feed.poll_once()
+		with SessionLocal() as session:
+			repo = FoodRepository(session)
+			for i in range(5):
+				food = repo.create(
+					obj_in=Food(name=f"Pruned {i}", calories=1, protein_g=0, carbs_g=0, fat_g=0)
+				)
+				repo.record_change(food_id=food.id, action="created")
+			session.commit()
+			assert ChangeLogRepository(session).prune(keep=2) > 0
+			session.commit()
+		assert feed.poll_once() == 2
+		assert resets == [True]
+	finally:
+		feed.stop()
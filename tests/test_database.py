@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import Base, ReadSessionLocal, SessionLocal, engine
+from app.domain.models import Food
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+
+
+def test_writer_connections_use_wal():
+	with SessionLocal() as session:
+		assert session.execute(text("PRAGMA journal_mode")).scalar_one() == "wal"
+
+
+def test_read_sessions_reject_writes():
+	with ReadSessionLocal() as session:
+		session.add(Food(name="Read Only Oats", calories=1, protein_g=0, carbs_g=0, fat_g=0))
+		with pytest.raises(OperationalError, match="readonly"):
+			session.flush()
+		session.rollback()
+		assert session.execute(text("PRAGMA query_only")).scalar_one() == 1
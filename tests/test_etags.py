@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.etags import etag_matches
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.schemas import FoodCreate, FoodUpdate, RecipeCreate, RecipeItemIn, RecipeUpdate
+from app.domain.services import FoodService, RecipeService
+from app.main import app
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+
+
+def _services(session):
+	foods = FoodRepository(session)
+	return FoodService(foods), RecipeService(RecipeRepository(session), foods)
+
+
+def test_if_none_match_parsing():
+	assert etag_matches('"r1-2"', '"r1-2"')
+	assert etag_matches('W/"r1-2", "x"', '"r1-2"')
+	assert etag_matches("*", '"f1-1"')
+	assert not etag_matches('"r1-3"', '"r1-2"')
+	assert not etag_matches(None, '"r1-2"')
+
+
+def test_versions_move_with_food_recipe_and_item_changes():
+	with SessionLocal() as session:
+		foods, recipes = _services(session)
+		tofu = foods.create_food(
+			data=FoodCreate(name="Tag Tofu", calories=76, protein_g=8, carbs_g=2, fat_g=4.8)
+		)
+		salt = foods.create_food(
+			data=FoodCreate(name="Tag Salt", calories=0, protein_g=0, carbs_g=0, fat_g=0)
+		)
+		recipe = recipes.create_recipe(
+			RecipeCreate(name="Tag Bowl", items=[RecipeItemIn(food_id=tofu.id, quantity=1)])
+		)
+		session.commit()
+
+		tags = [recipes.recipe_etag(recipe.id)]
+		food_tags = [foods.food_etag(food_id=tofu.id)]
+		foods.update_food(food_id=tofu.id, data=FoodUpdate(protein_g=9))
+		session.commit()
+		food_tags.append(foods.food_etag(food_id=tofu.id))
+		# The recipe row is untouched until recompute, but its foods changed
+		tags.append(recipes.recipe_etag(recipe.id))
+		recipes.update_recipe(recipe.id, RecipeUpdate(servings=2))
+		session.commit()
+		tags.append(recipes.recipe_etag(recipe.id))
+		# Zero-nutrient item: totals do not move, the item list does
+		recipes.add_item(recipe.id, RecipeItemIn(food_id=salt.id, quantity=1))
+		session.commit()
+		tags.append(recipes.recipe_etag(recipe.id))
+
+		assert len(set(food_tags)) == 2
+		assert len(set(tags)) == 4
+		assert recipes.recipe_etag(recipe.id) == tags[-1]
+		assert recipes.recipe_etag(10_000) is None
+
+
+def test_conditional_get_returns_304():
+	with SessionLocal() as session:
+		foods, recipes = _services(session)
+		food = foods.create_food(
+			data=FoodCreate(name="Tag Rice", calories=130, protein_g=2.7, carbs_g=28, fat_g=0.3)
+		)
+		recipe = recipes.create_recipe(
+			RecipeCreate(name="Tag Plate", items=[RecipeItemIn(food_id=food.id, quantity=1)])
+		)
+		session.commit()
+
+	client = TestClient(app)
+	for path in (f"/api/v1/foods/{food.id}", f"/api/v1/recipes/{recipe.id}"):
+		first = client.get(path)
+		assert first.status_code == 200 and first.headers["ETag"].startswith('"')
+		again = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+		assert again.status_code == 304
+		assert again.headers["ETag"] == first.headers["ETag"] and again.content == b""
+		assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.database import Base, SessionLocal, engine
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.schemas import FoodCreate, RecipeCreate, RecipeItemIn
+from app.domain.services import FoodService, RecipeService
+from app.main import app
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with SessionLocal() as session:
+		foods = FoodService(FoodRepository(session))
+		recipes = RecipeService(RecipeRepository(session), FoodRepository(session))
+		oats = foods.create_food(
+			data=FoodCreate(name="Export Oats", calories=150, protein_g=5, carbs_g=27, fat_g=3)
+		)
+		milk = foods.create_food(
+			data=FoodCreate(name="Export Milk", calories=100, protein_g=8, carbs_g=12, fat_g=2)
+		)
+		recipes.create_recipe(
+			RecipeCreate(
+				name="Export Porridge",
+				servings=2,
+				items=[
+					RecipeItemIn(food_id=oats.id, quantity=1),
+					RecipeItemIn(food_id=milk.id, quantity=1),
+				],
+			)
+		)
+		session.commit()
+
+
+def _lines(response):
+	assert response.status_code == 200
+	assert response.headers["content-type"].startswith("application/x-ndjson")
+	return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_food_export_streams_one_object_per_food():
+	rows = _lines(TestClient(app).get("/api/v1/foods/export"))
+	assert [r["name"] for r in rows] == ["Export Oats", "Export Milk"]
+	assert all(isinstance(r, dict) and "calories" in r for r in rows)
+
+
+def test_recipe_export_includes_items_and_per_serving():
+	rows = _lines(TestClient(app).get("/api/v1/recipes/export"))
+	assert len(rows) == 1
+	porridge = rows[0]
+	assert porridge["name"] == "Export Porridge"
+	assert len(porridge["items"]) == 2
+	assert porridge["per_serving"]["calories"] == 125
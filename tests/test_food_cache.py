@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import event
+
+from app.core.database import Base, SessionLocal, engine
+from app.domain.models import Food
+from app.domain.repositories import FoodCache, FoodRepository, FoodSnapshot, food_cache
+from app.domain.schemas import FoodUpdate
+from app.domain.services import FoodService
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with SessionLocal() as session:
+		FoodRepository(session).create(
+			obj_in=Food(name="Oats", calories=150, protein_g=5, carbs_g=27, fat_g=3)
+		)
+		session.commit()
+
+
+def _snapshot(food_id: int, calories: int = 100) -> FoodSnapshot:
+	food = Food(
+		id=food_id,
+		name=f"Food {food_id}",
+		calories=calories,
+		protein_g=0,
+		carbs_g=0,
+		fat_g=0,
+	)
+	for name in (
+		"fiber_g",
+		"sugar_g",
+		"saturated_fat_g",
+		"sodium_mg",
+		"potassium_mg",
+		"cholesterol_mg",
+	):
+		setattr(food, name, 0.0)
+	food.additional_nutrients = {}
+	food.serving_size, food.serving_unit, food.grams_per_ml = 1.0, "serving", None
+	return FoodSnapshot.from_row(food)
+
+
+def test_lru_ttl_and_counters():
+	now = [0.0]
+	cache = FoodCache(max_size=2, ttl_seconds=10, clock=lambda: now[0])
+	loads: list[list[int]] = []
+
+	def load(ids):
+		loads.append(list(ids))
+		return {i: _snapshot(i) for i in ids if i != 99}
+
+	assert set(cache.get_many([1, 2, 99], load)) == {1, 2}
+	cache.get_many([1], load)  # hit; 2 becomes least recently used
+	cache.get_many([3], load)  # evicts 2
+	cache.get_many([2], load)
+	assert loads == [[1, 2, 99], [3], [2]]
+	now[0] = 11.0
+	cache.get_many([2], load)
+	stats = cache.stats()
+	assert (stats.hits, stats.misses, stats.evictions, stats.size) == (1, 6, 2, 2)
+
+
+def test_load_racing_an_invalidation_is_not_stored():
+	cache = FoodCache(max_size=10, ttl_seconds=10)
+
+	def load(ids):
+		cache.invalidate(1)  # a writer commits while this reader is loading
+		return {i: _snapshot(i, calories=1) for i in ids}
+
+	assert cache.get_many([1], load)[1].calories == 1
+	assert cache.stats().size == 0
+
+
+def test_transaction_older_than_an_invalidation_does_not_fill_the_cache():
+	with SessionLocal() as session:
+		cache = FoodCache()
+		repo = FoodRepository(session, cache)
+		oats = repo.get_by_name(name="Oats")  # the read transaction begins here
+		assert oats is not None
+		cache.invalidate(oats.id)  # e.g. another session commits an update
+		assert repo.get_snapshot(food_id=oats.id) is not None
+		assert cache.stats().size == 0
+		session.rollback()
+		repo.get_snapshot(food_id=oats.id)
+		assert cache.stats().size == 1
+
+
+def test_hot_lookups_skip_sql_and_updates_invalidate():
+	statements: list[Any] = []
+
+	def listener(*args: Any) -> None:
+		statements.append(args[2])
+
+	with SessionLocal() as session:
+		service = FoodService(FoodRepository(session))
+		oats = FoodRepository(session).get_by_name(name="Oats")
+		assert oats is not None
+		service.get_food(food_id=oats.id)
+		event.listen(engine, "before_cursor_execute", listener)
+		try:
+			assert service.get_food(food_id=oats.id).calories == 150  # type: ignore[union-attr]
+			assert statements == []
+		finally:
+			event.remove(engine, "before_cursor_execute", listener)
+
+		service.update_food(food_id=oats.id, data=FoodUpdate(calories=160))
+		assert service.get_food(food_id=oats.id).calories == 160  # type: ignore[union-attr]
+		session.rollback()
+		# Uncommitted values were never cached, so the rollback leaves nothing stale behind
+		assert service.get_food(food_id=oats.id).calories == 150  # type: ignore[union-attr]
+
+		service.update_food(food_id=oats.id, data=FoodUpdate(calories=170))
+		session.commit()
+		assert service.get_food(food_id=oats.id).calories == 170  # type: ignore[union-attr]
+	assert food_cache.stats().hits >= 1
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.events import changes  # noqa: E402
+from app.core.filters import parse_nutrient_filters  # noqa: E402
+from app.domain.repositories import FoodCatalog, FoodRepository, FoodSnapshot  # noqa: E402
+from app.domain.schemas import FoodCreate, FoodUpdate  # noqa: E402
+from app.domain.services import FoodService  # noqa: E402
+from app.domain.services.nutrient_engine import NutrientIndex, NutrientMatrix  # noqa: E402
+
+ids: list[int] = []
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with SessionLocal() as session:
+		service = FoodService(FoodRepository(session))
+		for i in range(12):
+			food = service.create_food(
+				data=FoodCreate(
+					name=f"Catalog {'é' if i % 3 else ''}{11 - i:02d}",
+					calories=40 * i,
+					protein_g=i * 1.5,
+					carbs_g=3,
+					fat_g=0.25 * i,
+					additional_nutrients={"iron_mg": i / 4} if i % 2 else {},
+					serving_size=100 if i % 4 else 1,
+					serving_unit="g" if i % 4 else "serving",
+					grams_per_ml=1.03 if i == 5 else None,
+				)
+			)
+			ids.append(food.id)
+		session.commit()
+
+
+def _rows() -> list[FoodSnapshot]:
+	with SessionLocal() as session:
+		return [FoodSnapshot.from_row(row) for row in FoodRepository(session).iter_rows()]
+
+
+def test_snapshot_round_trips_and_is_shared_by_later_workers(tmp_path):
+	path = str(tmp_path / "foods.catalog")
+	first = FoodCatalog(path, enabled=True, max_dirty=2)
+	assert first.refresh() and first.ready
+	written = os.stat(path).st_mtime_ns
+
+	# A second worker maps the same file instead of writing its own
+	second = FoodCatalog(path, enabled=True, max_dirty=2)
+	assert second.refresh() and os.stat(path).st_mtime_ns == written
+	with SessionLocal() as session:
+		repo = FoodRepository(session, catalog=second)
+		assert repo.get_snapshots(ids) == {food.id: food for food in _rows()}
+		assert repo.get_snapshots([10_000_000]) == {}
+
+
+def test_changed_foods_are_read_elsewhere_until_the_file_is_rewritten(tmp_path):
+	path = str(tmp_path / "foods.catalog")
+	catalog = FoodCatalog(path, enabled=True, max_dirty=2)
+	catalog.refresh()
+	changes.subscribe(catalog.handle_change)
+	try:
+		with SessionLocal() as session:
+			service = FoodService(FoodRepository(session))
+			service.update_food(food_id=ids[0], data=FoodUpdate(calories=999))
+			session.commit()
+		with SessionLocal() as session:
+			snapshot = FoodRepository(session, catalog=catalog).get_snapshot(food_id=ids[0])
+			assert snapshot is not None and snapshot.calories == 999
+		# A worker mapping the file later learns the change from the change log
+		late = FoodCatalog(path, enabled=True, max_dirty=2)
+		late.refresh(write=False)
+		assert late.view()[1] == {ids[0]}  # type: ignore[index]
+
+		with SessionLocal() as session:
+			service = FoodService(FoodRepository(session))
+			for food_id in ids[1:3]:
+				service.update_food(food_id=food_id, data=FoodUpdate(fat_g=9))
+			session.commit()
+		catalog.stop()  # waits for the rewrite started past max_dirty
+		assert catalog.view()[1] == frozenset()  # type: ignore[index]
+		with SessionLocal() as session:
+			snapshots = FoodRepository(session, catalog=catalog).get_snapshots(ids)
+			assert snapshots == {f.id: f for f in _rows()}
+	finally:
+		changes.unsubscribe(catalog.handle_change)
+
+
+def test_aggregation_and_filter_index_built_from_the_snapshot_match_sql(tmp_path):
+	catalog = FoodCatalog(str(tmp_path / "foods.catalog"), enabled=True)
+	catalog.refresh()
+	snapshot, _ = catalog.view()  # type: ignore[misc]
+	foods = _rows()
+	fresh = [foods[3]]
+	items = dict(
+		recipe_index=[0, 0, 1, 1, 2],
+		quantity=[1, 250, 2, 30, 1],
+		units=["serving", "g", "serving", "ml", "g"],
+	)
+	item_ids = [foods[i].id for i in (0, 3, 5, 7, 10)]
+	expected = NutrientMatrix(foods).aggregate(food_ids=item_ids, n_recipes=3, **items)
+	result = NutrientMatrix.from_catalog(snapshot, exclude={foods[3].id}, foods=fresh).aggregate(
+		food_ids=item_ids, n_recipes=3, **items
+	)
+	assert [result.totals(i) for i in range(3)] == [expected.totals(i) for i in range(3)]
+
+	sql_index, shared_index = NutrientIndex(foods), NutrientIndex.from_catalog(snapshot)
+	for filters in (["protein_g>3"], ["iron_mg>=0.5", "calories<400"], []):
+		ranges = parse_nutrient_filters(filters)
+		for sort in ("id", "name"):
+			expected = sql_index.page(ranges, sort=sort, limit=5)
+			assert shared_index.page(ranges, sort=sort, limit=5) == expected
+
+
+def test_snapshot_of_a_recreated_database_is_rewritten(tmp_path):
+	path = str(tmp_path / "foods.catalog")
+	first = FoodCatalog(path, enabled=True)
+	assert first.refresh()
+	position = first.view()[0].position  # type: ignore[index]
+
+	# Same file, new database: log ids restart and pass the old position again
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with SessionLocal() as session:
+		service = FoodService(FoodRepository(session))
+		for i in range(position + 2):
+			data = FoodCreate(name=f"Recreated {i}", calories=i, protein_g=0, carbs_g=0, fat_g=0)
+			service.create_food(data=data)
+		session.commit()
+
+	catalog = FoodCatalog(path, enabled=True)
+	assert not catalog.refresh(write=False)
+	assert catalog.refresh()
+	with SessionLocal() as session:
+		foods = FoodRepository(session, catalog=catalog).get_snapshots(ids)
+	assert {f.name for f in foods.values()} == {f"Recreated {i}" for i in range(len(ids))}
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.core.database import Base, SessionLocal, engine, get_read_session
+from app.core.events import Change
+from app.core.filters import NutrientRange, parse_nutrient_filters
+from app.core.pagination import decode_cursor, next_cursor
+from app.domain.models import Food
+from app.domain.repositories import FoodRepository
+from app.domain.schemas import FoodUpdate
+from app.domain.services import FoodFilterIndex, FoodService
+
+FILTERS = [
+	["protein_g>20", "calories<200", "sodium_mg<300"],
+	["calories>=100", "calories<=100"],
+	["fat_g<5", "vitamin_c_mg>=15"],
+	["vitamin_c_mg>40"],
+	["protein_g>36", "carbs_g<40"],
+	["iron_mg>0"],
+]
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	rng = random.Random(11)
+	with SessionLocal() as session:
+		repo = FoodRepository(session)
+		for i in range(400):
+			extra = {"vitamin_c_mg": float(rng.randint(0, 60))} if i % 3 else {}
+			repo.create(
+				obj_in=Food(
+					name=f"Food {rng.random():.6f}",
+					calories=rng.choice([100, rng.randint(0, 600)]),
+					protein_g=rng.uniform(0, 40),
+					carbs_g=rng.uniform(0, 80),
+					fat_g=rng.uniform(0, 30),
+					sodium_mg=rng.uniform(0, 900),
+					additional_nutrients=extra,
+				)
+			)
+		session.commit()
+
+
+def _value(food, nutrient):
+	if hasattr(food, nutrient):
+		return getattr(food, nutrient)
+	return food.additional_nutrients.get(nutrient)
+
+
+def _pages(service, ranges, sort, limit=25):
+	seen, after = [], None
+	while True:
+		page = list(service.list_foods(limit=limit, sort=sort, after=after, ranges=ranges))
+		seen.extend(f.id for f in page)
+		token = next_cursor(page, sort=sort, limit=limit)
+		if token is None:
+			return seen
+		after = decode_cursor(token, sort=sort)
+
+
+def test_parse_merges_predicates_per_nutrient():
+	assert parse_nutrient_filters(["protein_g > 20", "protein_g<=35", "calories=100"]) == [
+		NutrientRange("protein_g", low=20, high=35, low_inclusive=False),
+		NutrientRange("calories", low=100, high=100),
+	]
+	for bad in ["protein_g", "protein_g>>1", "protein-g>1", "calories<1e999"]:
+		with pytest.raises(ValueError):
+			parse_nutrient_filters([bad])
+
+
+def test_sql_filters_match_python_predicates():
+	with SessionLocal() as session:
+		service = FoodService(FoodRepository(session), FoodFilterIndex(enabled=False))
+		foods = list(FoodRepository(session).list_all(limit=1000))
+		for exprs in FILTERS:
+			ranges = parse_nutrient_filters(exprs)
+			expected = [
+				f.id for f in foods if all(r.matches(_value(f, r.nutrient)) for r in ranges)
+			]
+			assert _pages(service, ranges, "id") == expected
+
+
+def test_index_pages_match_sql_and_follow_changes():
+	pytest.importorskip("numpy")
+	index = FoodFilterIndex(get_read_session, max_dirty=1000)
+	index.rebuild()
+	with SessionLocal() as session:
+		sql = FoodService(FoodRepository(session), FoodFilterIndex(enabled=False))
+		indexed = FoodService(FoodRepository(session), index)
+
+		def check():
+			for exprs in FILTERS:
+				ranges = parse_nutrient_filters(exprs)
+				for sort in ("id", "name"):
+					assert _pages(indexed, ranges, sort) == _pages(sql, ranges, sort)
+				payloads = indexed.list_food_payloads(limit=25, sort="name", ranges=ranges)
+				foods = indexed.list_foods(limit=25, sort="name", ranges=ranges)
+				assert payloads == [f.model_dump() for f in foods]
+
+		check()
+		changed = list(FoodRepository(session).list_all(limit=20))
+		for food in changed:
+			sql.update_food(
+				food_id=food.id,
+				data=FoodUpdate(protein_g=30, calories=150, name=f"Renamed {food.id}"),
+			)
+			index.handle_change(Change("food", food.id, "updated"))
+		sql.delete_food(food_id=changed[0].id)
+		session.commit()
+		index.handle_change(Change("food", changed[0].id, "deleted"))
+		check()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+
+from app.core.database import Base, SessionLocal, engine
+from app.domain.repositories import FoodRepository
+from app.domain.services import FoodImporter
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+
+
+def _ndjson(rows):
+	return [(n, json.dumps(r)) for n, r in enumerate(rows, start=1)]
+
+
+def test_ndjson_import_reports_row_errors_and_conflicts():
+	with SessionLocal() as session:
+		repo = FoodRepository(session)
+		importer = FoodImporter(repo)
+		importer.feed(
+			_ndjson(
+				[
+					dict(name="Import Oats", calories=389, protein_g=17, carbs_g=66, fat_g=7),
+					dict(name="Import Milk", calories=42, protein_g=3.4, carbs_g=5, fat_g=1),
+					dict(name="Import Bad", calories=-5, protein_g=0, carbs_g=0, fat_g=0),
+				]
+			)
+			+ [(4, "{not json")]
+		)
+		duplicate = {"name": "Import Oats", "calories": 1, "protein_g": 0, "carbs_g": 0, "fat_g": 0}
+		importer.feed([(5, json.dumps(duplicate))])
+
+		result = importer.result
+		assert (result.inserted, result.updated, result.skipped, result.failed) == (2, 0, 1, 2)
+		assert [e.line for e in result.errors] == [3, 4]
+		assert "calories" in result.errors[0].message
+		oats = repo.get_by_name(name="Import Oats")
+		assert oats is not None and oats.calories == 389
+		session.commit()
+
+
+def test_csv_upsert_updates_existing_and_collects_extra_columns():
+	with SessionLocal() as session:
+		repo = FoodRepository(session)
+		importer = FoodImporter(repo, format="csv", on_conflict="update")
+		importer.feed(
+			[
+				(1, "name,calories,protein_g,carbs_g,fat_g,iron_mg"),
+				(2, "Import Oats,380,16,66,7,4.7"),
+				(3, '"Import Rye, whole",338,10,76,1.6,'),
+			]
+		)
+
+		result = importer.result
+		assert (result.inserted, result.updated, result.failed) == (1, 1, 0)
+		session.expire_all()
+		oats = repo.get_by_name(name="Import Oats")
+		assert oats is not None and oats.calories == 380
+		assert oats.additional_nutrients == {"iron_mg": 4.7}
+		rye = repo.get_by_name(name="Import Rye, whole")
+		assert rye is not None and rye.additional_nutrients == {}
+
+
+def test_csv_additional_nutrients_must_be_a_json_object():
+	with SessionLocal() as session:
+		importer = FoodImporter(FoodRepository(session), format="csv")
+		importer.feed(
+			[
+				(1, "name,calories,protein_g,carbs_g,fat_g,additional_nutrients"),
+				(2, 'Import Kale,49,4.3,9,0.9,"[1, 2]"'),
+				(3, 'Import Chard,19,1.8,3.7,0.2,"{""iron_mg"": 1.8}"'),
+			]
+		)
+
+		result = importer.result
+		assert (result.inserted, result.failed) == (1, 1)
+		assert [e.line for e in result.errors] == [2]
+		assert "JSON object" in result.errors[0].message
+		chard = FoodRepository(session).get_by_name(name="Import Chard")
+		assert chard is not None and chard.additional_nutrients == {"iron_mg": 1.8}
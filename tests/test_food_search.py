@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from app.core.database import Base, SessionLocal, engine
+from app.domain.models import Food
+from app.domain.repositories import FoodRepository
+from app.domain.schemas import FoodUpdate
+from app.domain.services import FoodService
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with SessionLocal() as session:
+		repo = FoodRepository(session)
+		for name in [
+			"Chicken Breast 100g",
+			"Chickpeas",
+			"Grilled Chicken Thigh",
+			"Brown Rice",
+			"Crème Fraîche",
+		]:
+			repo.create(obj_in=Food(name=name, calories=100, protein_g=1, carbs_g=1, fat_g=1))
+		session.commit()
+
+
+def _names(hits):
+	return [(h.food.name, h.match) for h in hits]
+
+
+def test_prefix_and_token_matches_rank_before_fuzzy():
+	with SessionLocal() as session:
+		service = FoodService(FoodRepository(session))
+		hits = service.search_foods(query="chick", fuzzy=False)
+		chickens = {"Chicken Breast 100g", "Chickpeas", "Grilled Chicken Thigh"}
+		assert {name for name, _ in _names(hits)} == chickens
+		hits = service.search_foods(query="chicken thi")
+		assert _names(hits)[0] == ("Grilled Chicken Thigh", "token")
+		hits = service.search_foods(query="creme", fuzzy=False)
+		assert _names(hits) == [("Crème Fraîche", "token")]
+
+
+def test_typos_fall_back_to_trigram_matches():
+	with SessionLocal() as session:
+		service = FoodService(FoodRepository(session))
+		hits = service.search_foods(query="chiken", limit=5)
+		assert hits and all(h.match == "fuzzy" for h in hits)
+		assert hits[0].food.name == "Chicken Breast 100g"
+		assert "Brown Rice" not in {h.food.name for h in hits}
+
+
+def test_index_follows_renames_and_deletes():
+	with SessionLocal() as session:
+		service = FoodService(FoodRepository(session))
+		rice = FoodRepository(session).get_by_name(name="Brown Rice")
+		assert rice is not None
+		service.update_food(food_id=rice.id, data=FoodUpdate(name="Basmati Rice"))
+		session.flush()
+		assert _names(service.search_foods(query="basmati")) == [("Basmati Rice", "token")]
+		service.delete_food(food_id=rice.id)
+		session.flush()
+		assert service.search_foods(query="basmati", fuzzy=False) == []
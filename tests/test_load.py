@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from benchmarks.catalog import CatalogSpec
+from benchmarks.load import LoadProfile, run_app_under_load
+
+
+def test_load_run_reports_every_route_without_errors():
+	spec = CatalogSpec(foods=60, recipes=12, min_items=2, max_items=4)
+	profile = LoadProfile(
+		clients=4,
+		duration=30,
+		max_requests=80,
+		mix={"food_get": 3, "recipe_get": 3, "food_update": 1},
+	)
+	report = asyncio.run(run_app_under_load(spec, profile))
+
+	assert report["overall"]["requests"] == 80
+	routes = {r["route"] for r in report["routes"]}
+	assert routes == {"GET /foods/{id}", "GET /recipes/{id}", "PATCH /foods/{id}"}
+	for row in report["routes"]:
+		assert row["error_rate"] == 0 and row["client_error_rate"] == 0
+		assert 0 < row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"] <= row["max_ms"]
+		assert sum(row["histogram"].values()) == row["requests"]
+
+
+def test_mix_parsing_rejects_unknown_operations():
+	assert LoadProfile.parse_mix("food_get=5, recipe_list") == {"food_get": 5, "recipe_list": 1}
+	with pytest.raises(ValueError):
+		LoadProfile.parse_mix("food_delete=1")
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.database import Base, SessionLocal, engine
+from app.domain.models import Food
+from app.domain.repositories import FoodRepository, MealLogRepository, RecipeRepository
+from app.domain.schemas import MealLogEntryIn, RecipeCreate, RecipeItemIn
+from app.domain.services import MealLogService, RecipeService
+from app.main import app
+
+START = date(2024, 1, 1)
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+
+
+def _service(session):
+	foods = FoodRepository(session)
+	return MealLogService(MealLogRepository(session), RecipeRepository(session), foods)
+
+
+def test_range_summaries_match_the_entries_after_backdated_writes_and_deletes():
+	with SessionLocal() as session:
+		foods = FoodRepository(session)
+		soup = foods.create(
+			obj_in=Food(
+				name="Log Soup",
+				calories=90,
+				protein_g=4,
+				carbs_g=10,
+				fat_g=3,
+				sodium_mg=800,
+				serving_size=250,
+				serving_unit="ml",
+			)
+		)
+		bread = foods.create(
+			obj_in=Food(
+				name="Log Bread",
+				calories=80,
+				protein_g=3,
+				carbs_g=15,
+				fat_g=1,
+				sodium_mg=150,
+				additional_nutrients={"iron_mg": 1.2},
+			)
+		)
+		# 2-serving recipe: one serving is one bread and 250 ml of soup
+		lunch = RecipeService(RecipeRepository(session), foods).create_recipe(
+			RecipeCreate(
+				name="Log Lunch",
+				servings=2,
+				items=[
+					RecipeItemIn(food_id=soup.id, quantity=500, unit="ml"),
+					RecipeItemIn(food_id=bread.id, quantity=2),
+				],
+			)
+		)
+		service = _service(session)
+		entries = []
+		# Written out of day order, so later running totals have to move
+		for offset in (10, 0, 5, 5, 30, 2):
+			day = START + timedelta(days=offset)
+			entries.append(service.log_entry(MealLogEntryIn(day=day, food_id=bread.id, quantity=1)))
+		day = START + timedelta(days=3)
+		entries.append(service.log_entry(MealLogEntryIn(day=day, recipe_id=lunch.id, quantity=1)))
+		assert entries[-1].calories == 170 and entries[-1].sodium_mg == 950
+		assert service.delete_entry(entries[1].id)  # the only entry on day 0
+		session.commit()
+
+		logged = [e for i, e in enumerate(entries) if i != 1]
+		for lo, hi in ((0, 40), (0, 0), (3, 5), (4, 10), (11, 29), (6, 31)):
+			start, end = START + timedelta(days=lo), START + timedelta(days=hi)
+			summary = service.summary(start=start, end=end)
+			inside = [e for e in logged if start <= e.day <= end]
+			assert summary.entries == len(inside)
+			assert summary.totals["calories"] == sum(e.calories for e in inside)
+			assert summary.totals["sodium_mg"] == round(sum(e.sodium_mg for e in inside), 2)
+			iron = round(sum(e.additional_nutrients.get("iron_mg", 0) for e in inside), 2)
+			assert summary.totals.get("iron_mg", 0) == iron
+			assert summary.days == hi - lo + 1
+
+		days = service.daily_intake(start=START, end=START + timedelta(days=40))
+		assert [(d.day.day, d.entries) for d in days] == [(3, 1), (4, 1), (6, 2), (11, 1), (31, 1)]
+
+
+def test_meal_log_api():
+	client = TestClient(app)
+	with SessionLocal() as session:
+		food_id = FoodRepository(session).get_by_name(name="Log Bread").id  # type: ignore[union-attr]
+	created = client.post(
+		"/api/v1/meal-logs/",
+		json={"day": "2024-03-01", "food_id": food_id, "quantity": 2},
+	)
+	assert created.status_code == 201 and created.json()["calories"] == 160
+	missing = client.post("/api/v1/meal-logs/", json={"day": "2024-03-01", "quantity": 1})
+	assert missing.status_code == 422
+	summary = client.get(
+		"/api/v1/meal-logs/summary",
+		params={"start": "2024-02-24", "end": "2024-03-01"},
+	).json()
+	assert summary["totals"]["calories"] == 160 and summary["daily_average"]["calories"] == 22.86
+	assert client.delete(f"/api/v1/meal-logs/{created.json()['id']}").status_code == 204
+	days = client.get(
+		"/api/v1/meal-logs/days",
+		params={"start": "2024-03-01", "end": "2024-03-01"},
+	)
+	assert days.json() == []
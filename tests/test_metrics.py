@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import logging
+
+from fastapi.testclient import TestClient
+
+from app.core.database import Base, engine
+from app.core.metrics import (
+	Counter,
+	Histogram,
+	MetricsMiddleware,
+	http_request_queries,
+	http_requests,
+)
+from app.main import app
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+
+
+def test_prometheus_text_format():
+	counter = Counter("demo_total", "Demo.", ("kind",))
+	counter.inc(kind='a"b')
+	histogram = Histogram("demo_seconds", "Demo.", buckets=(0.1, 1))
+	histogram.observe(0.5)
+	histogram.observe(5)
+	assert counter.render() == [
+		"# HELP demo_total Demo.",
+		"# TYPE demo_total counter",
+		'demo_total{kind="a\\"b"} 1',
+	]
+	assert histogram.render()[2:] == [
+		'demo_seconds_bucket{le="0.1"} 0',
+		'demo_seconds_bucket{le="1"} 1',
+		'demo_seconds_bucket{le="+Inf"} 2',
+		"demo_seconds_sum 5.5",
+		"demo_seconds_count 2",
+	]
+
+
+def test_requests_are_counted_per_route_with_their_sql():
+	client = TestClient(app)
+	route = "/api/v1/foods/{food_id}"
+	before = http_requests.value(method="GET", route=route, status="200")
+	queries_before = http_request_queries.count(method="GET", route=route)
+	for food_id in (10**9, 10**9 + 1):
+		assert client.get(f"/api/v1/foods/{food_id}").json() is None
+	assert http_requests.value(method="GET", route=route, status="200") == before + 2
+	assert http_request_queries.count(method="GET", route=route) == queries_before + 2
+
+	body = client.get("/metrics").text
+	assert f'http_requests_total{{method="GET",route="{route}",status="200"}}' in body
+	assert "sql_queries_total" in body and "# TYPE http_request_duration_seconds histogram" in body
+
+
+def test_requests_over_the_query_budget_are_logged(caplog):
+	async def two_queries(scope, receive, send):
+		with engine.connect() as connection:
+			connection.exec_driver_sql("SELECT 1")
+			connection.exec_driver_sql("SELECT 2")
+		await send({"type": "http.response.start", "status": 204, "headers": []})
+		await send({"type": "http.response.body", "body": b""})
+
+	with caplog.at_level(logging.WARNING, logger="app.core.metrics"):
+		TestClient(MetricsMiddleware(two_queries, warn_query_count=2)).get("/plain")
+		assert not caplog.records
+		TestClient(MetricsMiddleware(two_queries, warn_query_count=1)).get("/plain")
+	assert "GET /plain ran 2 SQL statements" in caplog.text
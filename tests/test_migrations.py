@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+
+from sqlalchemy import inspect, text
+
+from app.core.database import Base, SessionLocal, engine
+from app.domain.models import Food, Recipe, upgrade_schema
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.services import RecipeService
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	# Roll the tables back to the layout earlier releases wrote
+	with engine.begin() as connection:
+		connection.execute(text("ALTER TABLE recipes DROP COLUMN nutrient_overrides"))
+		connection.execute(text("DROP INDEX ix_foods_calories_macros"))
+		connection.execute(text("DROP INDEX ix_foods_protein_calories"))
+		connection.execute(text("ALTER TABLE foods DROP COLUMN version"))
+		connection.execute(text("ALTER TABLE recipes DROP COLUMN version"))
+		connection.execute(text("DROP TABLE recipe_items"))
+		connection.execute(
+			text(
+				"CREATE TABLE recipe_items ("
+				" id INTEGER NOT NULL, recipe_id INTEGER NOT NULL, food_id INTEGER NOT NULL,"
+				" quantity FLOAT NOT NULL, unit VARCHAR(16) NOT NULL, PRIMARY KEY (id),"
+				" FOREIGN KEY(recipe_id) REFERENCES recipes (id) ON DELETE CASCADE,"
+				" FOREIGN KEY(food_id) REFERENCES foods (id) ON DELETE RESTRICT)"
+			)
+		)
+		for column in ("recipe_id", "food_id"):
+			connection.execute(
+				text(f"CREATE INDEX ix_recipe_items_{column} ON recipe_items ({column})")
+			)
+		connection.execute(
+			text(
+				"INSERT INTO foods (id, name, calories, protein_g, carbs_g, fat_g, fiber_g,"
+				" sugar_g, saturated_fat_g, sodium_mg, potassium_mg, cholesterol_mg,"
+				" additional_nutrients, serving_size, serving_unit)"
+				" VALUES (1, 'Legacy Oats', 150, 5, 27, 3, 4, 1, 0.5, 2, 150, 0, :extra, 40, 'g')"
+			),
+			{"extra": json.dumps({"iron_mg": 2.0})},
+		)
+		# Stored totals as the lazy recompute left them: overrides folded in, iron counted twice
+		connection.execute(
+			text(
+				"INSERT INTO recipes (id, name, calories, protein_g, carbs_g, fat_g, fiber_g,"
+				" sugar_g, saturated_fat_g, sodium_mg, potassium_mg, cholesterol_mg,"
+				" additional_nutrients, servings, serving_unit)"
+				" VALUES (1, 'Legacy Porridge', 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, :extra, 2, 'serving')"
+			),
+			{"extra": json.dumps({"iron_mg": 8.0, "vitamin_c_mg": 5.0})},
+		)
+		connection.execute(
+			text(
+				"INSERT INTO recipe_items (recipe_id, food_id, quantity, unit)"
+				" VALUES (1, 1, 80, 'g')"
+			)
+		)
+
+
+def test_upgrade_moves_overrides_and_rebuilds_totals():
+	with engine.begin() as connection:
+		assert upgrade_schema(connection)
+		assert not upgrade_schema(connection)
+		columns = {c["name"] for c in inspect(connection).get_columns("recipes")}
+		assert {"nutrient_overrides", "version"} <= columns
+		assert "version" in {c["name"] for c in inspect(connection).get_columns("foods")}
+		indexes = {i["name"] for i in inspect(connection).get_indexes("foods")}
+		assert {"ix_foods_calories_macros", "ix_foods_protein_calories"} <= indexes
+		items = {c["name"]: c for c in inspect(connection).get_columns("recipe_items")}
+		assert items["food_id"]["nullable"] and "sub_recipe_id" in items
+		checks = inspect(connection).get_check_constraints("recipe_items")
+		assert [c["name"] for c in checks] == ["ck_recipe_items_one_source"]
+		indexes = {i["name"] for i in inspect(connection).get_indexes("recipe_items")}
+		assert "ix_recipe_items_sub_recipe_id" in indexes
+
+	with SessionLocal() as session:
+		RecipeService(RecipeRepository(session), FoodRepository(session)).recalculate_all()
+		session.commit()
+	with SessionLocal() as session:
+		recipe = session.get(Recipe, 1)
+		assert recipe is not None
+		assert recipe.nutrient_overrides == {"vitamin_c_mg": 5.0}
+		assert recipe.calories == 300 and recipe.protein_g == 10
+		assert recipe.additional_nutrients == {"iron_mg": 4.0, "vitamin_c_mg": 5.0}
+		food = session.get(Food, 1)
+		assert food is not None and food.version == 1
+
+
+def test_recalculate_all_without_numpy(monkeypatch):
+	monkeypatch.setattr("app.domain.services.recipe_service.find_spec", lambda name: None)
+	with engine.begin() as connection:
+		connection.execute(text("UPDATE recipes SET calories = 0, protein_g = 0"))
+	with SessionLocal() as session:
+		service = RecipeService(RecipeRepository(session), FoodRepository(session))
+		assert service.recalculate_all() == 1
+		session.commit()
+	with SessionLocal() as session:
+		recipe = session.get(Recipe, 1)
+		assert recipe is not None and recipe.calories == 300 and recipe.protein_g == 10
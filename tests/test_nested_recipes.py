@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core.database import Base, engine, get_session
+from app.core.events import changes
+from app.domain.models import Food
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.schemas import FoodUpdate, RecipeCreate, RecipeItemIn, RecipeUpdate
+from app.domain.services import FoodService, RecipeService, RecomputeQueue
+
+ids: dict[str, int] = {}
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with get_session() as session:
+		food_repo = FoodRepository(session)
+		service = RecipeService(RecipeRepository(session), food_repo)
+		oil = food_repo.create(
+			obj_in=Food(name="Nest Oil", calories=120, protein_g=0, carbs_g=0, fat_g=14)
+		)
+		flour = food_repo.create(
+			obj_in=Food(name="Nest Flour", calories=100, protein_g=3, carbs_g=20, fat_g=1)
+		)
+		# Sauce makes 4 servings; pasta uses 2, dinner uses pasta and 1 more serving of sauce
+		sauce = service.create_recipe(
+			RecipeCreate(
+				name="Nest Sauce",
+				servings=4,
+				items=[RecipeItemIn(food_id=oil.id, quantity=4)],
+			)
+		)
+		pasta = service.create_recipe(
+			RecipeCreate(
+				name="Nest Pasta",
+				items=[
+					RecipeItemIn(food_id=flour.id, quantity=2),
+					RecipeItemIn(sub_recipe_id=sauce.id, quantity=2),
+				],
+			)
+		)
+		dinner = service.create_recipe(
+			RecipeCreate(
+				name="Nest Dinner",
+				items=[
+					RecipeItemIn(sub_recipe_id=pasta.id, quantity=1),
+					RecipeItemIn(sub_recipe_id=sauce.id, quantity=1),
+				],
+			)
+		)
+		other = service.create_recipe(
+			RecipeCreate(name="Nest Bread", items=[RecipeItemIn(food_id=flour.id, quantity=1)])
+		)
+		ids.update(
+			oil=oil.id,
+			flour=flour.id,
+			sauce=sauce.id,
+			pasta=pasta.id,
+			dinner=dinner.id,
+			other=other.id,
+		)
+
+
+def _calories() -> dict[str, int]:
+	with get_session() as session:
+		recipes = RecipeRepository(session)
+		calories = {}
+		for name in ("sauce", "pasta", "dinner"):
+			recipe = recipes.get_recipe(ids[name])
+			assert recipe is not None
+			calories[name] = recipe.calories
+		return calories
+
+
+def test_sub_recipes_contribute_per_serving():
+	assert _calories() == {"sauce": 480, "pasta": 200 + 240, "dinner": 440 + 120}
+	with pytest.raises(ValueError):
+		RecipeItemIn(food_id=1, sub_recipe_id=2, quantity=1)
+
+
+def test_cycles_and_deleting_used_sub_recipes_are_rejected():
+	with get_session() as session:
+		service = RecipeService(RecipeRepository(session), FoodRepository(session))
+		for parent, child in (("sauce", "sauce"), ("sauce", "pasta"), ("sauce", "dinner")):
+			with pytest.raises(ValueError):
+				service.add_item(ids[parent], RecipeItemIn(sub_recipe_id=ids[child], quantity=1))
+		with pytest.raises(ValueError):
+			service.delete_recipe(ids["sauce"])
+		chain = [ids["sauce"], ids["pasta"], ids["dinner"]]
+		assert service.recompute_order([ids["sauce"]]) == chain
+		assert service.recompute_order([ids["pasta"]], include_seeds=False) == [ids["dinner"]]
+		session.rollback()
+
+
+def test_changes_recompute_only_the_ancestor_subgraph_in_order():
+	queue = RecomputeQueue(batch_size=1)
+	changes.subscribe(queue.handle_change)
+	try:
+		with get_session() as session:
+			service = RecipeService(RecipeRepository(session), FoodRepository(session))
+			service.update_recipe(ids["sauce"], RecipeUpdate(servings=8))
+		assert queue.wait_idle(timeout=10)
+		(job,) = queue.list_jobs(recipe_id=ids["sauce"])
+		assert job.status == "done" and job.total == job.done == 2
+		assert _calories() == {"sauce": 480, "pasta": 200 + 120, "dinner": 320 + 60}
+
+		with get_session() as session:
+			FoodService(FoodRepository(session)).update_food(
+				food_id=ids["oil"],
+				data=FoodUpdate(calories=240),
+			)
+		assert queue.wait_idle(timeout=10)
+		(job,) = queue.list_jobs(food_id=ids["oil"])
+		assert job.total == 3
+		assert _calories() == {"sauce": 960, "pasta": 200 + 240, "dinner": 440 + 120}
+		# Recomputing ancestors does not start further jobs of its own
+		assert queue.status().recomputed_total == 5
+	finally:
+		changes.unsubscribe(queue.handle_change)
+		queue.stop()
+
+
+def test_recalculate_all_rebuilds_nested_recipes_after_their_parts():
+	pytest.importorskip("numpy")
+	with get_session() as session:
+		recipes = RecipeRepository(session)
+		stale = [{"id": ids[name], "calories": 0} for name in ("sauce", "pasta", "dinner")]
+		recipes.bulk_update_totals(stale)
+		RecipeService(recipes, FoodRepository(session)).recalculate_all(batch_size=1)
+	assert _calories() == {"sauce": 960, "pasta": 200 + 240, "dinner": 440 + 120}
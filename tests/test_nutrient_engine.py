@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import itertools
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.units import to_serving_multiplier, to_serving_multipliers, unit_codes  # noqa: E402
+from app.domain.models import Food, Recipe  # noqa: E402
+from app.domain.repositories import FoodRepository, RecipeRepository  # noqa: E402
+from app.domain.schemas import RecipeCreate, RecipeItemIn  # noqa: E402
+from app.domain.services import RecipeService  # noqa: E402
+
+UNITS = ["serving", "g", "ml", "piece"]
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+
+
+def test_vectorized_multiplier_matches_scalar():
+	cases = list(itertools.product(UNITS, UNITS, [None, 0.0, 0.91]))
+	expected = [
+		to_serving_multiplier(
+			quantity=3.0, unit=u, food_serving_size=15.0, food_serving_unit=fu, grams_per_ml=d  # type: ignore[arg-type]
+		)
+		for u, fu, d in cases
+	]
+	got = to_serving_multipliers(
+		quantity=np.full(len(cases), 3.0),
+		unit=unit_codes([u for u, _, _ in cases]),
+		food_serving_size=np.full(len(cases), 15.0),
+		food_serving_unit=unit_codes([fu for _, fu, _ in cases]),
+		grams_per_ml=np.array([np.nan if d is None else d for _, _, d in cases]),
+	)
+	assert np.allclose(got, expected)
+
+
+def test_recalculate_all_matches_scalar_recalculation():
+	rng = random.Random(7)
+	with SessionLocal() as session:
+		food_repo = FoodRepository(session)
+		service = RecipeService(RecipeRepository(session), food_repo)
+		foods = [
+			food_repo.create(
+				obj_in=Food(
+					name=f"Matrix Food {i}",
+					calories=rng.randint(0, 500),
+					protein_g=rng.uniform(0, 30),
+					carbs_g=rng.uniform(0, 60),
+					fat_g=rng.uniform(0, 20),
+					sodium_mg=rng.uniform(0, 800),
+					serving_size=rng.choice([1.0, 15.0, 100.0]),
+					serving_unit=rng.choice(UNITS),
+					grams_per_ml=rng.choice([None, 0.92, 1.03]),
+					additional_nutrients={"iron_mg": rng.uniform(0, 3)} if i % 3 == 0 else {},
+				)
+			)
+			for i in range(40)
+		]
+		recipe_ids = [
+			service.create_recipe(
+				RecipeCreate(
+					name=f"Matrix Recipe {r}",
+					additional_nutrients={"vitamin_c_mg": 5.0} if r % 4 == 0 else {},
+					items=[
+						RecipeItemIn(
+							food_id=f.id,
+							quantity=rng.uniform(0.5, 250),
+							unit=rng.choice(UNITS),
+						)
+						for f in rng.sample(foods, rng.randint(0, 12))
+					],
+				)
+			).id
+			for r in range(60)
+		]
+		session.flush()
+		expected = {
+			r.id: (r.calories, r.protein_g, r.sodium_mg, dict(r.additional_nutrients))
+			for r in session.query(Recipe)
+		}
+
+		# Corrupt the stored totals so the bulk pass has to rewrite them
+		session.query(Recipe).update({Recipe.calories: -1, Recipe.protein_g: -1.0})
+		session.expire_all()
+		assert service.recalculate_all(batch_size=16) == len(recipe_ids)
+
+		session.expire_all()
+		for r in session.query(Recipe):
+			calories, protein, sodium, additional = expected[r.id]
+			assert r.calories == calories
+			assert r.protein_g == pytest.approx(protein)
+			assert r.sodium_mg == pytest.approx(sodium)
+			assert r.additional_nutrients == pytest.approx(additional)
+		assert service.recalculate_all() == 0
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+from typing import Any
+
+from pydantic import TypeAdapter
+from sqlalchemy import event
+
 from app.core.database import Base, SessionLocal, engine
+from app.core.serialization import dumps
 from app.domain.models import Food
 from app.domain.repositories import FoodRepository, RecipeRepository
-from app.domain.schemas import RecipeCreate, RecipeItemIn
+from app.domain.schemas import RecipeCreate, RecipeItemIn, RecipeOut, RecipeUpdate
 from app.domain.services import RecipeService
 
 
@@ -55,3 +61,106 @@ def test_recipe_aggregation_and_per_serving():
 		assert recipe.calories > 0
 		assert recipe.per_serving["calories"] == round(recipe.calories / 2, 2)
 		assert recipe.per_serving["protein_g"] > 0
+
+
+def test_list_recipes_uses_constant_number_of_queries():
+	with SessionLocal() as session:
+		food_repo = FoodRepository(session)
+		service = RecipeService(RecipeRepository(session), food_repo)
+		foods = [
+			food_repo.create(
+				obj_in=Food(
+					name=f"Batch Food {i}",
+					calories=10 * i,
+					protein_g=i,
+					carbs_g=0,
+					fat_g=0,
+				)
+			)
+			for i in range(1, 6)
+		]
+		for r in range(8):
+			service.create_recipe(
+				RecipeCreate(
+					name=f"Batch Recipe {r}",
+					items=[RecipeItemIn(food_id=f.id, quantity=r + 1) for f in foods],
+				)
+			)
+		session.commit()
+		session.expunge_all()
+
+		statements: list[str] = []
+
+		def count(*args: Any) -> None:
+			statements.append(args[2])
+
+		event.listen(engine, "before_cursor_execute", count)
+		try:
+			recipes = list(service.list_recipes(limit=500))
+		finally:
+			event.remove(engine, "before_cursor_execute", count)
+
+		batch = [r for r in recipes if r.name.startswith("Batch Recipe")]
+		assert len(batch) == 8
+		assert all(len(r.items) == 5 for r in batch)
+		assert batch[0].calories == sum(10 * i for i in range(1, 6))
+		# recipes page + items, independent of page size and items per recipe; totals are stored
+		assert len(statements) == 2
+		assert all(s.lstrip().upper().startswith("SELECT") for s in statements)
+		assert not session.dirty
+
+
+def test_list_recipe_payloads_match_validated_models():
+	# JSON fast path: same values as the validated models, from plain rows
+	with SessionLocal() as session:
+		service = RecipeService(RecipeRepository(session), FoodRepository(session))
+		payloads = service.list_recipe_payloads(limit=500, sort="name")
+		assert payloads
+		assert payloads == [r.model_dump() for r in service.list_recipes(limit=500, sort="name")]
+		models = [RecipeOut.model_validate(p) for p in payloads]
+		assert dumps(payloads) == TypeAdapter(list[RecipeOut]).dump_json(models)
+
+
+def test_item_deltas_match_full_recalculation():
+	with SessionLocal() as session:
+		food_repo = FoodRepository(session)
+		recipe_repo = RecipeRepository(session)
+		service = RecipeService(recipe_repo, food_repo)
+		rice = food_repo.create(
+			obj_in=Food(
+				name="Delta Rice",
+				calories=130,
+				protein_g=2.7,
+				carbs_g=28,
+				fat_g=0.3,
+				serving_size=100,
+				serving_unit="g",
+				additional_nutrients={"iron_mg": 0.2},
+			)
+		)
+		egg = food_repo.create(
+			obj_in=Food(name="Delta Egg", calories=78, protein_g=6.3, carbs_g=0.6, fat_g=5.3)
+		)
+
+		created = service.create_recipe(
+			RecipeCreate(name="Delta Bowl", servings=2, additional_nutrients={"iron_mg": 1.0})
+		)
+		service.add_item(created.id, RecipeItemIn(food_id=rice.id, quantity=150, unit="g"))
+		out = service.add_item(created.id, RecipeItemIn(food_id=egg.id, quantity=2))
+		assert out is not None
+		egg_item = next(i for i in out.items if i.food_id == egg.id)
+		service.update_item_quantity(created.id, egg_item.id, 3)
+		rice_item = next(i for i in out.items if i.food_id == rice.id)
+		assert service.remove_item(created.id, rice_item.id)
+		updated = service.update_recipe(
+			created.id,
+			RecipeUpdate(additional_nutrients={"iron_mg": 2.0}),
+		)
+		assert updated is not None
+		session.flush()
+
+		rebuilt = service.recalculate(created.id)
+		assert rebuilt is not None
+		assert updated.calories == rebuilt.calories == 3 * 78
+		assert abs(updated.protein_g - rebuilt.protein_g) < 1e-9
+		assert updated.additional_nutrients == rebuilt.additional_nutrients == {"iron_mg": 2.0}
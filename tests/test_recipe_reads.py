@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi.testclient import TestClient
+
+from app.core.database import Base, SessionLocal, engine, get_async_read_session
+from app.core.events import Change
+from app.core.singleflight import SingleFlight
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.schemas import FoodCreate, RecipeCreate, RecipeItemIn
+from app.domain.services import FoodService, RecipeReads, RecipeService
+from app.main import app
+
+ids: dict[str, int] = {}
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with SessionLocal() as session:
+		food = FoodService(FoodRepository(session)).create_food(
+			data=FoodCreate(name="Herd Rice", calories=130, protein_g=2.7, carbs_g=28, fat_g=0.3)
+		)
+		recipe = RecipeService(RecipeRepository(session), FoodRepository(session)).create_recipe(
+			RecipeCreate(
+				name="Herd Bowl",
+				servings=3,
+				items=[RecipeItemIn(food_id=food.id, quantity=2)],
+			)
+		)
+		session.commit()
+	ids.update(food=food.id, recipe=recipe.id)
+
+
+def _counting_reads(**kwargs) -> tuple[RecipeReads, list[int]]:
+	sessions: list[int] = []
+
+	@asynccontextmanager
+	async def scope():
+		sessions.append(1)
+		async with get_async_read_session() as session:
+			yield session
+
+	return RecipeReads(scope, **kwargs), sessions
+
+
+def test_concurrent_reads_share_one_load():
+	reads, sessions = _counting_reads(cache_ttl_seconds=60)
+
+	async def burst():
+		return await asyncio.gather(*(reads.get(ids["recipe"]) for _ in range(50)))
+
+	results = asyncio.run(burst())
+	assert len(sessions) == 1 and all(r is results[0] for r in results)
+	assert asyncio.run(burst())[0] is results[0] and len(sessions) == 1  # micro-cache
+
+	reads.handle_change(Change("recipe", ids["recipe"], "updated"))
+	assert asyncio.run(burst())[0] == results[0] and len(sessions) == 2
+	missing = asyncio.run(reads.get(10_000_000))
+	assert missing.etag is None and missing.body == b"null"
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_load():
+	flights: SingleFlight[str, int] = SingleFlight()
+	loads: list[int] = []
+
+	async def load() -> int:
+		loads.append(1)
+		await asyncio.sleep(0.05)
+		return 42
+
+	async def scenario():
+		first = asyncio.ensure_future(flights.do("k", load))
+		second = asyncio.ensure_future(flights.do("k", load))
+		await asyncio.sleep(0.01)
+		first.cancel()
+		return await second
+
+	assert asyncio.run(scenario()) == (42, "shared") and loads == [1]
+
+
+def test_get_recipe_route_serves_the_shared_body():
+	client = TestClient(app)
+	path = f"/api/v1/recipes/{ids['recipe']}"
+	response = client.get(path)
+	with SessionLocal() as session:
+		service = RecipeService(RecipeRepository(session), FoodRepository(session))
+		expected = service.get_recipe(ids["recipe"])
+	assert expected is not None
+	assert response.status_code == 200
+	assert response.json() == expected.model_dump(mode="json")
+	assert client.get(path, headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+	assert client.get("/api/v1/recipes/10000000").json() is None
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from app.core.database import Base, engine, get_session
+from app.core.events import changes
+from app.domain.models import Food
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.schemas import FoodUpdate, RecipeCreate, RecipeItemIn
+from app.domain.services import FoodService, RecipeService, RecomputeQueue
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+
+
+def test_food_update_refreshes_dependent_recipes_in_background():
+	with get_session() as session:
+		food_repo = FoodRepository(session)
+		service = RecipeService(RecipeRepository(session), food_repo)
+		oil = food_repo.create(
+			obj_in=Food(name="Queue Oil", calories=120, protein_g=0, carbs_g=0, fat_g=14)
+		)
+		recipe_ids = [
+			service.create_recipe(
+				RecipeCreate(
+					name=f"Queue Dressing {i}",
+					items=[RecipeItemIn(food_id=oil.id, quantity=i)],
+				)
+			).id
+			for i in range(1, 6)
+		]
+		oil_id = oil.id
+
+	queue = RecomputeQueue(batch_size=2)
+	changes.subscribe(queue.handle_change)
+	try:
+		with get_session() as session:
+			FoodService(FoodRepository(session)).update_food(
+				food_id=oil_id,
+				data=FoodUpdate(calories=100),
+			)
+		assert queue.wait_idle(timeout=10)
+	finally:
+		changes.unsubscribe(queue.handle_change)
+		queue.stop()
+
+	(job,) = queue.list_jobs(food_id=oil_id)
+	assert job.status == "done"
+	assert job.total == job.done == 5
+	with get_session() as session:
+		recipes = RecipeRepository(session).list_by_ids(recipe_ids)
+		assert [r.calories for r in recipes] == [100 * i for i in range(1, 6)]
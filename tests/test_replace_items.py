@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import event
+
+from app.core.database import Base, SessionLocal, engine
+from app.domain.models import Food
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.schemas import RecipeCreate, RecipeItemIn
+from app.domain.services import RecipeService
+from app.main import app
+
+food_ids: list[int] = []
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with SessionLocal() as session:
+		repo = FoodRepository(session)
+		for i in range(40):
+			food = repo.create(
+				obj_in=Food(
+					name=f"Swap {i}",
+					calories=10 + i,
+					protein_g=i / 10,
+					carbs_g=1,
+					fat_g=0.5,
+				)
+			)
+			food_ids.append(food.id)
+		session.commit()
+
+
+def _service(session):
+	return RecipeService(RecipeRepository(session), FoodRepository(session))
+
+
+def _statements(run):
+	# One entry per statement execution; an executemany that SQLite runs row by row counts once
+	statements: list[str] = []
+	contexts: list[Any] = []
+
+	def count(*args: Any) -> None:
+		if not contexts or args[4] is not contexts[-1]:
+			contexts.append(args[4])
+			statements.append(args[2].lstrip().split()[0].upper())
+
+	event.listen(engine, "before_cursor_execute", count)
+	try:
+		result = run()
+	finally:
+		event.remove(engine, "before_cursor_execute", count)
+	return result, statements
+
+
+def test_replace_diffs_items_and_recomputes_once():
+	with SessionLocal() as session:
+		service = _service(session)
+		items = [RecipeItemIn(food_id=f, quantity=1) for f in food_ids[:30]]
+		data = RecipeCreate(name="Swap Stew", items=items)
+		created, create_statements = _statements(lambda: service.create_recipe(data))
+		session.commit()
+		# Name check, recipe insert, one IN query for foods, version bump, batched item insert
+		assert len(create_statements) == 5
+
+		# 0..9 unchanged, 10..19 at a new quantity, 20..29 removed, 30..39 added
+		wanted = (
+			[RecipeItemIn(food_id=f, quantity=1) for f in food_ids[:10]]
+			+ [RecipeItemIn(food_id=f, quantity=2) for f in food_ids[10:20]]
+			+ [RecipeItemIn(food_id=f, quantity=3, unit="piece") for f in food_ids[30:40]]
+		)
+		replaced, statements = _statements(lambda: service.replace_items(created.id, wanted))
+		session.commit()
+		assert replaced is not None
+		# Load recipe + items, then one statement per kind of write, independent of item counts
+		assert statements.count("INSERT") <= 2 and statements.count("DELETE") == 1
+		assert len(statements) <= 10
+
+		kept = {i.food_id: i.id for i in created.items}
+		reused = {i.food_id: i.id for i in replaced.items if i.food_id in kept}
+		assert reused == {f: kept[f] for f in food_ids[:20]}
+		remaining = sorted(i.food_id for i in replaced.items)
+		assert remaining == sorted(food_ids[:20] + food_ids[30:40])
+
+		rebuilt = service.recalculate(created.id)
+		assert rebuilt is not None and replaced.calories == rebuilt.calories
+		assert replaced.protein_g == pytest.approx(rebuilt.protein_g)
+		session.rollback()
+
+		tag = service.recipe_etag(created.id)
+		_, statements = _statements(lambda: service.replace_items(created.id, wanted))
+		assert not [s for s in statements if s != "SELECT"]
+		assert service.recipe_etag(created.id) == tag
+
+
+def test_replace_items_api():
+	client = TestClient(app)
+	payload = {"name": "Swap Salad", "items": [{"food_id": food_ids[0], "quantity": 1}]}
+	recipe = client.post("/api/v1/recipes/", json=payload)
+	recipe_id = recipe.json()["id"]
+	path = f"/api/v1/recipes/{recipe_id}/items"
+
+	items = [
+		{"food_id": food_ids[1], "quantity": 2},
+		{"food_id": 10**6, "quantity": 1},
+	]
+	response = client.put(path, json=items)
+	assert response.status_code == 409
+	assert str(10**6) in response.json()["detail"]
+	assert client.put(path, json=[{"sub_recipe_id": recipe_id, "quantity": 1}]).status_code == 409
+	assert client.put("/api/v1/recipes/999999/items", json=[]).status_code == 404
+
+	response = client.put(path, json=[{"food_id": food_ids[1], "quantity": 2}])
+	assert response.status_code == 200
+	items = [(i["food_id"], i["quantity"]) for i in response.json()["items"]]
+	assert items == [(food_ids[1], 2)]
+	assert response.json()["calories"] == 2 * 11
+	assert client.put(path, json=[]).json()["calories"] == 0
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.core.database import Base, SessionLocal, engine
+from app.domain.models import ChangeLogEntry, Food, Recipe
+from app.domain.repositories import FoodRepository, RecipeRepository
+from app.domain.schemas import RecipeCreate, RecipeItemIn, ScenarioIn, ScenarioItemIn
+from app.domain.services import RecipeService
+from app.domain.services.recipe_service import _scalar_totals, _vectorized_totals
+from app.main import app
+
+ids: dict[str, int] = {}
+
+
+def setup_module(module):
+	Base.metadata.drop_all(bind=engine)
+	Base.metadata.create_all(bind=engine)
+	with SessionLocal() as session:
+		repo = FoodRepository(session)
+		milk = repo.create(
+			obj_in=Food(
+				name="What-if Milk",
+				calories=64,
+				protein_g=3.3,
+				carbs_g=4.8,
+				fat_g=3.6,
+				serving_size=100,
+				serving_unit="ml",
+				grams_per_ml=1.03,
+				additional_nutrients={"calcium_mg": 120},
+			)
+		)
+		oats = repo.create(
+			obj_in=Food(
+				name="What-if Oats",
+				calories=389,
+				protein_g=16.9,
+				carbs_g=66,
+				fat_g=6.9,
+				serving_size=100,
+				serving_unit="g",
+			)
+		)
+		session.commit()
+		ids.update(milk=milk.id, oats=oats.id)
+
+
+def _scenarios() -> list[ScenarioIn]:
+	milk, oats = ids["milk"], ids["oats"]
+	porridge = [
+		ScenarioItemIn(food_id=oats, quantity=80, unit="g"),
+		ScenarioItemIn(food_id=milk, quantity=250, unit="ml"),
+	]
+	milk_only = [
+		ScenarioItemIn(food_id=milk, quantity=300, unit="g"),
+		ScenarioItemIn(food_id=10**6, quantity=1),
+	]
+	return [
+		ScenarioIn(label="porridge", servings=2, items=porridge),
+		ScenarioIn(items=milk_only),
+		ScenarioIn(label="empty"),
+	]
+
+
+def test_scenarios_match_stored_recipe_totals():
+	with SessionLocal() as session:
+		service = RecipeService(RecipeRepository(session), FoodRepository(session))
+		porridge, milk_only, empty = service.evaluate(_scenarios())
+		recipe = service.create_recipe(
+			RecipeCreate(
+				name="What-if Porridge",
+				servings=2,
+				items=[RecipeItemIn(**item.model_dump()) for item in _scenarios()[0].items],
+			)
+		)
+		session.rollback()
+
+	assert porridge.label == "porridge" and porridge.missing_food_ids == []
+	assert porridge.calories == recipe.calories and porridge.per_serving == recipe.per_serving
+	assert porridge.protein_g == pytest.approx(recipe.protein_g)
+	assert porridge.additional_nutrients == pytest.approx(recipe.additional_nutrients)
+	assert porridge.additional_nutrients == {"calcium_mg": 300}
+	assert milk_only.missing_food_ids == [10**6] and milk_only.calories == round(64 * 3 / 1.03)
+	assert empty.calories == 0 and empty.additional_nutrients == {}
+
+
+def test_vectorized_and_scalar_paths_agree():
+	pytest.importorskip("numpy")
+	with SessionLocal() as session:
+		foods = FoodRepository(session).get_snapshots(ids.values())
+	scenarios = _scenarios()
+	vectorized = _vectorized_totals(scenarios, foods)
+	for scenario, totals in zip(scenarios, vectorized, strict=True):
+		scalar = _scalar_totals(scenario, foods)
+		additional = totals.pop("additional_nutrients")
+		assert scalar.pop("additional_nutrients") == pytest.approx(additional)
+		assert scalar == pytest.approx(totals)
+
+
+def test_evaluate_endpoint_writes_nothing():
+	with SessionLocal() as session:
+		before = session.query(Recipe).count(), session.query(ChangeLogEntry).count()
+	body = {"scenarios": [s.model_dump() for s in _scenarios()]}
+	response = TestClient(app).post("/api/v1/recipes/evaluate", json=body)
+	assert response.status_code == 200
+	assert [s["label"] for s in response.json()["scenarios"]] == ["porridge", None, "empty"]
+	empty = TestClient(app).post("/api/v1/recipes/evaluate", json={"scenarios": []})
+	assert empty.status_code == 422
+	with SessionLocal() as session:
+		assert (session.query(Recipe).count(), session.query(ChangeLogEntry).count()) == before